@@ -1,4 +1,5 @@
 from datetime import datetime, timedelta
+from typing import Optional
 from jose import JWTError, jwt
 from passlib.context import CryptContext
 from fastapi import Depends, HTTPException, status
@@ -17,6 +18,7 @@ def get_db():
 
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/token")
+oauth2_scheme_optional = OAuth2PasswordBearer(tokenUrl="/token", auto_error=False)
 
 # Password hashing
 
@@ -76,4 +78,16 @@ def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(
     user = get_user_by_email(db, email=token_data.email)
     if user is None:
         raise credentials_exception
-    return user 
\ No newline at end of file
+    return user
+
+
+def get_current_user_from_header_or_query(token: Optional[str] = Depends(oauth2_scheme_optional),
+                                          access_token: Optional[str] = None, db: Session = Depends(get_db)):
+    """Like get_current_user, but also takes `?access_token=` for clients that can't set headers (EventSource)"""
+    if not (token or access_token):
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Not authenticated",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+    return get_current_user(token or access_token, db)
@@ -0,0 +1,91 @@
+"""
+Blink detection over eye aspect ratio (EAR) samples
+
+BlinkStateMachine is the online detector the tracker runs frame by frame:
+a blink is counted when the eye reopens after at least `consec_frames`
+closed frames (EAR below threshold), followed by a short cooldown so one
+blink isn't counted twice.
+
+detect_blinks() applies the same rules to a whole EAR array at once with
+NumPy, for re-scoring recorded sessions and parameter sweeps.
+"""
+from typing import Tuple
+
+import numpy as np
+
+from .ear_history import EAR_CLOSED, EAR_BLINK, EAR_COOLDOWN
+
+DEFAULT_EAR_THRESH = 0.25
+DEFAULT_CONSEC_FRAMES = 1
+DEFAULT_COOLDOWN_FRAMES = 3
+
+
+class BlinkStateMachine:
+    """Per-frame blink counter; feed it one mean EAR per frame with a detected face"""
+
+    def __init__(self, ear_thresh: float = DEFAULT_EAR_THRESH, consec_frames: int = DEFAULT_CONSEC_FRAMES,
+                 cooldown_frames: int = DEFAULT_COOLDOWN_FRAMES):
+        self.ear_thresh = ear_thresh
+        self.consec_frames = consec_frames
+        self.cooldown_frames = cooldown_frames
+        self.reset()
+
+    def reset(self):
+        self.blink_count = 0
+        self.frame_counter = 0  # Consecutive closed frames so far
+        self.blink_cooldown = 0  # Prevent double counting
+
+    def update(self, ear: float) -> int:
+        """Advance one frame and return its EAR_CLOSED/EAR_BLINK/EAR_COOLDOWN flags"""
+        if self.blink_cooldown > 0:
+            self.blink_cooldown -= 1
+
+        flags = EAR_COOLDOWN if self.blink_cooldown > 0 else 0
+        if ear < self.ear_thresh:
+            self.frame_counter += 1
+            flags |= EAR_CLOSED
+        else:
+            # Blink detected when coming out of closed state
+            if self.frame_counter >= self.consec_frames and self.blink_cooldown == 0:
+                self.blink_count += 1
+                self.blink_cooldown = self.cooldown_frames
+                flags |= EAR_BLINK
+            self.frame_counter = 0
+        return flags
+
+
+def detect_blinks(ear: np.ndarray, ear_thresh: float = DEFAULT_EAR_THRESH,
+                  consec_frames: int = DEFAULT_CONSEC_FRAMES,
+                  cooldown_frames: int = DEFAULT_COOLDOWN_FRAMES) -> Tuple[np.ndarray, np.ndarray]:
+    """Offline equivalent of feeding `ear` through BlinkStateMachine.update()
+
+    Returns (indices, durations): the frame index on which each blink is counted
+    (the first open frame after the closed run) and the closed-run length in
+    frames. The online detector only sees frames with a face, so callers must drop
+    the others first (see recording.rescore); a NaN left in `ear` counts as open.
+    """
+    if consec_frames < 1:
+        raise ValueError("consec_frames must be at least 1")
+    closed = np.asarray(ear) < ear_thresh
+    n = len(closed)
+
+    # Closed runs [start, end); `end` is the reopen frame where the online detector counts
+    edges = np.diff(np.concatenate(([False], closed, [False])).view(np.int8))
+    starts = np.flatnonzero(edges == 1)
+    ends = np.flatnonzero(edges == -1)
+    lengths = ends - starts
+    candidate = (ends < n) & (lengths >= consec_frames)
+    indices, durations = ends[candidate], lengths[candidate]
+
+    # Cooldown: a candidate only counts if the last counted blink is >= cooldown_frames back
+    if len(indices) > 1 and np.any(np.diff(indices) < cooldown_frames):
+        keep = np.ones(len(indices), dtype=bool)
+        last = indices[0]
+        # Candidates are sparse (one per closed run), so this loop is over blinks, not frames
+        for i in range(1, len(indices)):
+            if indices[i] - last < cooldown_frames:
+                keep[i] = False
+            else:
+                last = indices[i]
+        indices, durations = indices[keep], durations[keep]
+    return indices, durations
@@ -0,0 +1,121 @@
+"""
+Live push of new blink rows to dashboards over Server-Sent Events (GET /blinks/user/stream)
+
+Writers call BlinkFeed.notify() after storing rows; streams also re-check every POLL_INTERVAL.
+"""
+import asyncio
+import threading
+from collections import defaultdict
+from contextlib import contextmanager
+from typing import AsyncIterator, Dict, List, Optional, Set, Tuple
+
+from . import crud
+from .database import SessionLocal
+from .frame_messages import dumps
+
+POLL_INTERVAL = 5.0   # Seconds between re-checks without a notification; doubles as keepalive
+BATCH_DELAY = 0.5     # Gather rows for this long after a notification before querying
+MAX_BATCH = 1000      # Rows per event when catching up on a backlog
+RETRY_MS = 3000       # Reconnect delay suggested to EventSource
+
+
+class BlinkFeed:
+    """Per-user wake-ups for live streams; notify() may be called from any thread"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.waiters: Dict[int, Set[Tuple[asyncio.AbstractEventLoop, asyncio.Event]]] = defaultdict(set)
+
+    @contextmanager
+    def subscribe(self, user_id: int):
+        """Event set whenever new rows for `user_id` may have been stored"""
+        waiter = (asyncio.get_running_loop(), asyncio.Event())
+        with self.lock:
+            self.waiters[user_id].add(waiter)
+        try:
+            yield waiter[1]
+        finally:
+            with self.lock:
+                self.waiters[user_id].discard(waiter)
+                if not self.waiters[user_id]:
+                    del self.waiters[user_id]
+
+    def notify(self, user_id: int):
+        with self.lock:
+            waiters = list(self.waiters.get(user_id, ()))
+        for loop, event in waiters:
+            try:
+                loop.call_soon_threadsafe(event.set)
+            except RuntimeError:
+                pass  # That stream's event loop has closed
+
+
+blink_feed = BlinkFeed()
+
+
+def blink_row(blink) -> dict:
+    return {"id": blink.id, "user_id": blink.user_id, "blink_count": blink.blink_count,
+            "timestamp": blink.timestamp.isoformat()}
+
+
+def rollup_deltas(rows: List[dict], timestamps) -> List[dict]:
+    """Per-minute sample counts and max blink_count of `rows`, oldest minute first"""
+    minutes: Dict[str, dict] = {}
+    for row, timestamp in zip(rows, timestamps):
+        minute = timestamp.replace(second=0, microsecond=0).isoformat()
+        bucket = minutes.setdefault(minute, {"minute": minute, "samples": 0, "max_blink_count": row["blink_count"]})
+        bucket["samples"] += 1
+        bucket["max_blink_count"] = max(bucket["max_blink_count"], row["blink_count"])
+    return sorted(minutes.values(), key=lambda bucket: bucket["minute"])
+
+
+def format_event(event: str, data: dict, event_id: Optional[int] = None) -> str:
+    lines = [f"id: {event_id}"] if event_id is not None else []
+    lines += [f"event: {event}", f"data: {dumps(data)}"]
+    return "\n".join(lines) + "\n\n"
+
+
+def latest_id(user_id: int) -> int:
+    db = SessionLocal()
+    try:
+        return crud.get_latest_blink_id(db, user_id)
+    finally:
+        db.close()
+
+
+def fetch_after(user_id: int, cursor: int) -> Tuple[List[dict], List]:
+    db = SessionLocal()
+    try:
+        blinks = crud.get_blinks_after(db, user_id, cursor, limit=MAX_BATCH)
+        return [blink_row(blink) for blink in blinks], [blink.timestamp for blink in blinks]
+    finally:
+        db.close()
+
+
+async def blink_events(user_id: int, cursor: Optional[int], feed: BlinkFeed = blink_feed,
+                       poll_interval: float = POLL_INTERVAL, batch_delay: float = BATCH_DELAY) -> AsyncIterator[str]:
+    """SSE stream of `user_id`'s blink rows with id > cursor; None starts at the newest row"""
+    with feed.subscribe(user_id) as woken:
+        # Queries block, so they run in a worker thread rather than stalling every stream on the loop
+        if cursor is None:
+            cursor = await asyncio.to_thread(latest_id, user_id)
+        yield f"retry: {RETRY_MS}\n\n"
+        yield format_event("ready", {"cursor": cursor}, cursor)
+        while True:
+            woken.clear()
+            rows, timestamps = await asyncio.to_thread(fetch_after, user_id, cursor)
+            if rows:
+                cursor = rows[-1]["id"]
+                yield format_event("blinks", {"blinks": rows, "rollups": rollup_deltas(rows, timestamps)}, cursor)
+                if len(rows) == MAX_BATCH:
+                    continue  # More backlog to send
+            else:
+                yield ": keepalive\n\n"
+            waiter = asyncio.ensure_future(woken.wait())
+            try:
+                done, _ = await asyncio.wait({waiter}, timeout=poll_interval)
+            finally:
+                waiter.cancel()
+            if done:
+                # A session stores rows every few frames; send them together, once they have settled
+                await asyncio.sleep(max(batch_delay, crud.SETTLE_SECONDS))
@@ -0,0 +1,50 @@
+"""
+Lean JSON encoding of a user's blink history for GET /blinks/user
+
+The endpoint used to load full BlinkData ORM objects, validate each into a
+BlinkDataOut through orm_mode and encode the result with the standard json
+module, which on large histories cost far more than the query. This path
+selects only (id, blink_count, timestamp), streams them from the database in
+chunks and encodes each chunk straight to JSON bytes with orjson (the
+standard json module when it isn't installed). The output is the same JSON
+as before, and only one chunk of rows is held as Python objects at a time.
+"""
+import json
+from typing import Iterable, List, Tuple
+from datetime import datetime
+
+try:
+    import orjson
+except ImportError:  # Optional speedup; falls back to the standard library
+    orjson = None
+
+CHUNK_ROWS = 10000
+
+
+def _encode_chunk(rows: List[Tuple[int, int, datetime]], user_id: int) -> bytes:
+    """Rows as comma-separated JSON objects, keys in BlinkDataOut's order, without brackets"""
+    if orjson is not None:
+        items = [{"blink_count": count, "timestamp": timestamp, "id": blink_id, "user_id": user_id}
+                 for blink_id, count, timestamp in rows]
+        return orjson.dumps(items)[1:-1]
+    items = [{"blink_count": count, "timestamp": timestamp.isoformat() if timestamp else None,
+              "id": blink_id, "user_id": user_id} for blink_id, count, timestamp in rows]
+    return json.dumps(items, separators=(",", ":")).encode()[1:-1]
+
+
+def chunked(rows: Iterable[Tuple[int, int, datetime]],
+            size: int = CHUNK_ROWS) -> Iterable[List[Tuple[int, int, datetime]]]:
+    chunk = []
+    for row in rows:
+        chunk.append(tuple(row))
+        if len(chunk) == size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def blink_listing_json(rows: Iterable[Tuple[int, int, datetime]], user_id: int) -> bytes:
+    """JSON array of BlinkDataOut objects for (id, blink_count, timestamp) rows"""
+    parts = [part for part in (_encode_chunk(chunk, user_id) for chunk in chunked(rows)) if part]
+    return b"[" + b",".join(parts) + b"]"
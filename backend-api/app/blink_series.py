@@ -0,0 +1,56 @@
+"""
+Downsampled blink_count series for charts
+
+The dashboard chart drew every stored row, which stops being readable (and
+gets slow to fetch) after a few thousand rows. GET /blinks/user/series
+returns at most `points` samples chosen with Largest-Triangle-Three-Buckets:
+the first and last rows are kept, the rows in between are split into
+`points - 2` buckets, and from each bucket the row forming the largest
+triangle with the previously kept row and the next bucket's mean is kept.
+Peaks and dips survive, unlike with plain striding or bucket means.
+"""
+from datetime import datetime
+from typing import List, Tuple
+
+import numpy as np
+
+
+def lttb(x: np.ndarray, y: np.ndarray, points: int) -> np.ndarray:
+    """Indices of the `points` samples LTTB keeps from (x, y); every index if there are no more than that"""
+    n = len(x)
+    if points >= n:
+        return np.arange(n)
+    if points < 3:
+        raise ValueError("LTTB needs at least 3 points")
+    # Bucket i covers edges[i]:edges[i + 1]; the first and last samples are their own buckets
+    edges = np.linspace(1, n - 1, points - 1).astype(np.intp)
+    counts = np.diff(edges)
+    mean_x = np.add.reduceat(x[1:n - 1], edges[:-1] - 1) / counts
+    mean_y = np.add.reduceat(y[1:n - 1], edges[:-1] - 1) / counts
+    # The next bucket's mean for each bucket; the last bucket looks at the last sample
+    next_x = np.append(mean_x[1:], x[-1])
+    next_y = np.append(mean_y[1:], y[-1])
+
+    kept = np.empty(points, dtype=np.intp)
+    kept[0], kept[-1] = 0, n - 1
+    a = 0
+    for i in range(points - 2):
+        start, end = edges[i], edges[i + 1]
+        # Twice the triangle area; the constant factor doesn't change the argmax
+        area = np.abs((x[a] - next_x[i]) * (y[start:end] - y[a]) - (x[a] - x[start:end]) * (next_y[i] - y[a]))
+        a = start + int(np.argmax(area))
+        kept[i + 1] = a
+    return kept
+
+
+def downsample(rows: List[Tuple[datetime, int]], points: int) -> Tuple[List[datetime], List[int]]:
+    """(timestamp, blink_count) rows in time order reduced to at most `points` with LTTB"""
+    if not rows:
+        return [], []
+    timestamps = [row[0] for row in rows]
+    counts = np.fromiter((row[1] for row in rows), dtype=np.float64, count=len(rows))
+    # Seconds from the first row; only the spacing matters
+    first = timestamps[0]
+    x = np.fromiter(((t - first).total_seconds() for t in timestamps), dtype=np.float64, count=len(rows))
+    kept = lttb(x, counts, points)
+    return [timestamps[i] for i in kept], counts[kept].astype(np.int64).tolist()
@@ -0,0 +1,111 @@
+"""
+Per-user EAR threshold calibration
+
+A fixed EAR threshold of 0.25 sits too close to the open-eye EAR of users with
+narrow eyes, so ordinary jitter registers as phantom blinks. At the start of a
+session without a stored threshold the tracker feeds the first face frames to
+an EarCalibrator, which tracks the open-eye EAR baseline with a P² streaming
+quantile estimator (constant memory, no sample buffer) and derives the
+user's threshold as a fraction of that baseline.
+"""
+import math
+from typing import Optional
+
+CALIBRATION_FRAMES = 90      # ~3 seconds at 30 FPS
+BASELINE_QUANTILE = 0.5      # Median is robust to the few blinks during calibration
+THRESHOLD_RATIO = 0.8        # Eye counts as closed below 80% of its open EAR
+MIN_EAR_THRESH = 0.12
+MAX_EAR_THRESH = 0.35
+
+
+class P2Quantile:
+    """Streaming quantile estimate in O(1) memory (Jain & Chlamtac's P² algorithm)"""
+
+    def __init__(self, p: float):
+        if not 0.0 < p < 1.0:
+            raise ValueError("p must be between 0 and 1")
+        self.p = p
+        self.count = 0
+        self.heights = []                                    # Marker heights q0..q4
+        self.positions = [0, 1, 2, 3, 4]                     # Actual marker positions
+        self.desired = [0.0, 2 * p, 4 * p, 2 + 2 * p, 4.0]   # Desired marker positions
+        self.increments = [0.0, p / 2, p, (1 + p) / 2, 1.0]
+
+    def add(self, x: float):
+        self.count += 1
+        q = self.heights
+        if len(q) < 5:
+            q.append(x)
+            q.sort()
+            return
+
+        # Find the cell containing x, extending the extreme markers if needed
+        if x < q[0]:
+            q[0] = x
+            k = 0
+        elif x >= q[4]:
+            q[4] = x
+            k = 3
+        else:
+            k = 0
+            while x >= q[k + 1]:
+                k += 1
+
+        n = self.positions
+        for i in range(k + 1, 5):
+            n[i] += 1
+        for i in range(5):
+            self.desired[i] += self.increments[i]
+
+        # Nudge the middle markers toward their desired positions
+        for i in (1, 2, 3):
+            d = self.desired[i] - n[i]
+            if (d >= 1 and n[i + 1] - n[i] > 1) or (d <= -1 and n[i - 1] - n[i] < -1):
+                step = 1 if d > 0 else -1
+                candidate = self._parabolic(i, step)
+                if not q[i - 1] < candidate < q[i + 1]:
+                    candidate = q[i] + step * (q[i + step] - q[i]) / (n[i + step] - n[i])
+                q[i] = candidate
+                n[i] += step
+
+    def _parabolic(self, i: int, d: int) -> float:
+        q, n = self.heights, self.positions
+        return q[i] + d / (n[i + 1] - n[i - 1]) * (
+            (n[i] - n[i - 1] + d) * (q[i + 1] - q[i]) / (n[i + 1] - n[i])
+            + (n[i + 1] - n[i] - d) * (q[i] - q[i - 1]) / (n[i] - n[i - 1])
+        )
+
+    def value(self) -> Optional[float]:
+        if not self.heights:
+            return None
+        if self.count < 5:
+            return self.heights[min(len(self.heights) - 1, int(self.p * len(self.heights)))]
+        return self.heights[2]
+
+
+class EarCalibrator:
+    """Estimates a user's open-eye EAR over the first face frames and derives their threshold"""
+
+    def __init__(self, frames: int = CALIBRATION_FRAMES, ratio: float = THRESHOLD_RATIO):
+        self.frames = frames
+        self.ratio = ratio
+        self.baseline = P2Quantile(BASELINE_QUANTILE)
+        self.threshold: Optional[float] = None
+
+    @property
+    def done(self) -> bool:
+        return self.threshold is not None
+
+    @property
+    def baseline_ear(self) -> Optional[float]:
+        return self.baseline.value()
+
+    def update(self, ear: float) -> Optional[float]:
+        """Feed one frame's mean EAR; returns the threshold on the frame calibration completes"""
+        if self.done or not math.isfinite(ear):
+            return None
+        self.baseline.add(ear)
+        if self.baseline.count < self.frames:
+            return None
+        self.threshold = round(min(MAX_EAR_THRESH, max(MIN_EAR_THRESH, self.baseline_ear * self.ratio)), 4)
+        return self.threshold
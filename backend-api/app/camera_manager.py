@@ -0,0 +1,115 @@
+"""
+Camera handle kept open across back-to-back tracking sessions until `idle_timeout` passes unused
+
+Methods run on the event loop thread; acquire() opens and configures the device on a worker thread.
+"""
+import asyncio
+import logging
+import time
+from typing import Any, Callable, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class CameraManager:
+    def __init__(self, open_camera: Callable[[], Any], idle_timeout: float,
+                 configure: Optional[Callable[[Any], None]] = None):
+        # open_camera returns a VideoCapture-like object; configure applies settings once per open
+        self.open_camera = open_camera
+        self.configure = configure
+        self.idle_timeout = idle_timeout
+        self.cap = None
+        self.in_use = False
+        self.idle_since: Optional[float] = None
+        self.idle_handle: Optional[asyncio.TimerHandle] = None
+        self.opening = asyncio.Lock()  # One open at a time, so concurrent sessions share it
+        self.opens = 0   # Device opens, for monitoring
+        self.reuses = 0  # Sessions that got an already open camera
+
+    @property
+    def is_open(self) -> bool:
+        return self.cap is not None
+
+    async def acquire(self):
+        """The open camera, opening and configuring it if needed; None if the device won't open"""
+        async with self.opening:
+            self._cancel_idle()
+            if self.cap is not None and self.cap.isOpened():
+                self.reuses += 1
+            else:
+                self.close()
+                cap = await asyncio.to_thread(self._open)
+                if cap is None:
+                    return None
+                self.cap = cap
+                self.opens += 1
+                logger.info("📷 Camera opened")
+            self.in_use = True
+            self.idle_since = None
+            return self.cap
+
+    def _open(self):
+        # Device open and cap.set() calls can each block for a while; runs on a worker thread
+        cap = self.open_camera()
+        if not cap.isOpened():
+            cap.release()
+            return None
+        if self.configure is not None:
+            self.configure(cap)
+        return cap
+
+    def release(self):
+        """The session is done with the camera: keep it open for idle_timeout in case another follows"""
+        self._cancel_idle()
+        self.in_use = False
+        if self.cap is None:
+            return
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            loop = None
+        if self.idle_timeout <= 0 or loop is None:
+            self.close()
+            return
+        self.idle_since = time.monotonic()
+        self.idle_handle = loop.call_later(self.idle_timeout, self._close_idle)
+
+    def detach(self):
+        """Forget the handle without releasing it; whoever still reads from it releases it"""
+        self._cancel_idle()
+        cap, self.cap = self.cap, None
+        self.in_use = False
+        self.idle_since = None
+        return cap
+
+    def close(self):
+        """Release the camera now, turning it off"""
+        self._cancel_idle()
+        cap, self.cap = self.cap, None
+        self.in_use = False
+        self.idle_since = None
+        if cap is None:
+            return
+        try:
+            cap.release()
+            logger.info("📷 Camera released successfully")
+        except Exception as e:
+            logger.error(f"Error releasing camera: {e}")
+
+    def status(self) -> dict:
+        idle = time.monotonic() - self.idle_since if self.idle_since is not None else None
+        return {
+            "camera_open": self.is_open,
+            "camera_idle_s": round(idle, 1) if idle is not None else None,
+        }
+
+    def _close_idle(self):
+        self.idle_handle = None
+        if not self.in_use:
+            logger.info(f"📷 Camera unused for {self.idle_timeout:g}s")
+            self.close()
+
+    def _cancel_idle(self):
+        if self.idle_handle is not None:
+            self.idle_handle.cancel()
+            self.idle_handle = None
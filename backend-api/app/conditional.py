@@ -0,0 +1,50 @@
+"""
+Conditional GET for a user's blink listings
+
+The ETag comes from the user's newest settled blink id; a matching If-None-Match gets 304 Not Modified.
+"""
+from datetime import datetime, timezone
+from email.utils import format_datetime
+from typing import NamedTuple, Optional
+
+from fastapi import Request, Response
+from sqlalchemy.orm import Session
+
+from . import crud
+
+
+class Validators(NamedTuple):
+    blink_id: int                      # Newest row's id, 0 without rows
+    etag: str
+    last_modified: Optional[datetime]  # UTC, whole seconds
+
+    def headers(self) -> dict:
+        headers = {"ETag": self.etag, "Cache-Control": "private, no-cache"}
+        if self.last_modified is not None:
+            headers["Last-Modified"] = format_datetime(self.last_modified, usegmt=True)
+        return headers
+
+
+def blink_validators(db: Session, user_id: int) -> Validators:
+    """ETag and Last-Modified for anything built from `user_id`'s blink rows"""
+    latest = crud.get_latest_blink(db, user_id)
+    if latest is None:
+        return Validators(0, f'W/"{user_id}-0"', None)
+    blink_id, created_at = latest
+    # created_at is naive UTC; rows stored before it existed have none
+    last_modified = created_at.replace(tzinfo=timezone.utc, microsecond=0) if created_at is not None else None
+    return Validators(blink_id, f'W/"{user_id}-{blink_id}"', last_modified)
+
+
+def is_not_modified(request: Request, validators: Validators) -> bool:
+    """Whether the client's cached copy, identified by its If-None-Match, is still current"""
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is None:
+        return False
+    # Weak comparison: W/"x" matches "x"
+    tags = {tag.strip().removeprefix("W/") for tag in if_none_match.split(",")}
+    return "*" in tags or validators.etag.removeprefix("W/") in tags
+
+
+def not_modified(validators: Validators) -> Response:
+    return Response(status_code=304, headers=validators.headers())
@@ -0,0 +1,12 @@
+"""
+CPU cores available to this process
+"""
+import os
+from typing import List
+
+
+def available_cores() -> List[int]:
+    """CPU cores this process may run on"""
+    if hasattr(os, "sched_getaffinity"):
+        return sorted(os.sched_getaffinity(0))
+    return list(range(os.cpu_count() or 1))
@@ -1,9 +1,27 @@
+from sqlalchemy import func, or_
 from sqlalchemy.orm import Session
 from . import models, schemas, auth
-from typing import List
-from datetime import datetime
+from typing import Iterable, List, Optional, Tuple
+from datetime import datetime, timedelta
 import pytz
 
+# Rows are handed to cursor readers (/sync, the live stream) only once they are
+# this old. Ids are assigned at insert but rows become visible at commit, so a
+# lower id can appear after a higher one was read; waiting out the longest write
+# transaction keeps a cursor from moving past it. Assumes the API hosts' clocks agree.
+SETTLE_SECONDS = 1.0
+
+
+def to_india_time(timestamp: Optional[datetime]) -> datetime:
+    """Naive Asia/Kolkata wall time, as blink timestamps are stored; now if None"""
+    india_tz = pytz.timezone('Asia/Kolkata')
+    if timestamp is None:
+        return datetime.now(india_tz).replace(tzinfo=None)
+    if timestamp.tzinfo is not None:
+        # Clients may send UTC (e.g. JavaScript's toISOString)
+        return timestamp.astimezone(india_tz).replace(tzinfo=None)
+    return timestamp
+
 def create_user(db: Session, user: schemas.UserCreate):
     hashed_password = auth.get_password_hash(user.password)
     db_user = models.User(email=user.email, hashed_password=hashed_password, consent=user.consent)
@@ -18,13 +36,14 @@ def get_user(db: Session, user_id: int):
 def get_user_by_email(db: Session, email: str):
     return db.query(models.User).filter(models.User.email == email).first()
 
+
+def set_user_ear_threshold(db: Session, user_id: int, ear_threshold: float):
+    db.query(models.User).filter(models.User.id == user_id).update({models.User.ear_threshold: ear_threshold})
+    db.commit()
+
 def create_blink_data(db: Session, user_id: int, blink: schemas.BlinkDataCreate):
-    # Set timestamp to India timezone if not provided
-    timestamp = blink.timestamp
-    if timestamp is None:
-        india_tz = pytz.timezone('Asia/Kolkata')
-        timestamp = datetime.now(india_tz)
-    
+    # Stored in India time, now if not provided
+    timestamp = to_india_time(blink.timestamp)
     db_blink = models.BlinkData(user_id=user_id, blink_count=blink.blink_count, timestamp=timestamp)
     db.add(db_blink)
     db.commit()
@@ -32,4 +51,94 @@ def create_blink_data(db: Session, user_id: int, blink: schemas.BlinkDataCreate)
     return db_blink
 
 def get_blinks_for_user(db: Session, user_id: int) -> List[models.BlinkData]:
-    return db.query(models.BlinkData).filter(models.BlinkData.user_id == user_id).order_by(models.BlinkData.timestamp.desc()).all() 
\ No newline at end of file
+    return (db.query(models.BlinkData).filter(models.BlinkData.user_id == user_id)
+            .order_by(models.BlinkData.timestamp.desc()).all())
+
+
+def iter_blink_rows_for_user(db: Session, user_id: int, chunk_size: int = 10000) -> Iterable[Tuple[int, int, datetime]]:
+    """(id, blink_count, timestamp) of a user's rows, newest first, fetched from the database in chunks"""
+    return (db.query(models.BlinkData.id, models.BlinkData.blink_count, models.BlinkData.timestamp)
+            .filter(models.BlinkData.user_id == user_id).order_by(models.BlinkData.timestamp.desc())
+            .yield_per(chunk_size))
+
+
+def settled():
+    """Filter for rows older than SETTLE_SECONDS; rows from before created_at existed count as settled"""
+    cutoff = datetime.utcnow() - timedelta(seconds=SETTLE_SECONDS)
+    return or_(models.BlinkData.created_at.is_(None), models.BlinkData.created_at <= cutoff)
+
+
+def get_blinks_after(db: Session, user_id: int, after_id: int, limit: int = 1000) -> List[models.BlinkData]:
+    """A user's settled blink rows with id > after_id, oldest first; safe to advance a cursor past"""
+    return (db.query(models.BlinkData)
+            .filter(models.BlinkData.user_id == user_id, models.BlinkData.id > after_id, settled())
+            .order_by(models.BlinkData.id).limit(limit).all())
+
+
+def get_latest_blink_id(db: Session, user_id: int) -> int:
+    """Id of the user's newest settled blink row, 0 if there is none"""
+    return (db.query(func.max(models.BlinkData.id))
+            .filter(models.BlinkData.user_id == user_id, settled()).scalar() or 0)
+
+
+def get_latest_blink(db: Session, user_id: int) -> Optional[Tuple[int, Optional[datetime]]]:
+    """(id, created_at) of the user's newest settled blink row, without loading the row"""
+    row = (db.query(models.BlinkData.id, models.BlinkData.created_at)
+           .filter(models.BlinkData.user_id == user_id, settled()).order_by(models.BlinkData.id.desc()).first())
+    return tuple(row) if row is not None else None
+
+
+def get_blink_series(db: Session, user_id: int, start: Optional[datetime] = None,
+                     end: Optional[datetime] = None, max_id: Optional[int] = None) -> List[Tuple[datetime, int]]:
+    """(timestamp, blink_count) of a user's rows within [start, end] and with id <= max_id, oldest first"""
+    query = (db.query(models.BlinkData.timestamp, models.BlinkData.blink_count)
+             .filter(models.BlinkData.user_id == user_id))
+    if max_id is not None:
+        query = query.filter(models.BlinkData.id <= max_id)
+    if start is not None:
+        query = query.filter(models.BlinkData.timestamp >= start)
+    if end is not None:
+        query = query.filter(models.BlinkData.timestamp <= end)
+    return [tuple(row) for row in query.order_by(models.BlinkData.timestamp).all()]
+
+
+def create_tracking_session(db: Session, user_id: int, device: int, summary: dict) -> models.TrackingSession:
+    """Store a tracker's end-of-session summary; its times arrive as ISO strings"""
+    fields = {column: summary[column] for column in (
+        "duration_s", "blink_count", "blinks_per_minute", "frames", "dropped_frames",
+        "frame_age_ms", "inference_ms", "encode_ms")}
+    db_session = models.TrackingSession(
+        user_id=user_id, device=device,
+        started_at=datetime.fromisoformat(summary["started_at"]),
+        ended_at=datetime.fromisoformat(summary["ended_at"]),
+        **fields)
+    db.add(db_session)
+    db.commit()
+    db.refresh(db_session)
+    return db_session
+
+
+def get_tracking_sessions(db: Session, user_id: int, limit: int = 50,
+                          before: Optional[datetime] = None) -> List[models.TrackingSession]:
+    """A user's session summaries, newest first"""
+    query = db.query(models.TrackingSession).filter(models.TrackingSession.user_id == user_id)
+    if before is not None:
+        query = query.filter(models.TrackingSession.started_at < before)
+    return query.order_by(models.TrackingSession.started_at.desc()).limit(limit).all()
+
+
+def push_blink_records(db: Session, user_id: int, records: List[schemas.SyncRecord]) -> List[str]:
+    """Store records whose client_id this user hasn't pushed before, in one transaction"""
+    client_ids = {record.client_id for record in records}
+    if not client_ids:
+        return []
+    stored = {row[0] for row in db.query(models.BlinkData.client_id)
+              .filter(models.BlinkData.user_id == user_id, models.BlinkData.client_id.in_(client_ids))}
+    for record in records:
+        if record.client_id in stored:
+            continue
+        stored.add(record.client_id)  # Also collapses repeats within one push
+        db.add(models.BlinkData(user_id=user_id, blink_count=record.blink_count, client_id=record.client_id,
+                                timestamp=to_india_time(record.timestamp)))
+    db.commit()
+    return list(dict.fromkeys(record.client_id for record in records))
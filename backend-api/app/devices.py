@@ -0,0 +1,149 @@
+"""
+Camera devices on this node and the per-core pool of vision workers serving them
+
+Each camera gets its own EyeTrackerService (capture + FaceMesh inference) in a
+vision worker, listening on device_address(base, device). Workers run on a
+process pool sized to the cores available to this process; with more cameras
+than cores, devices share worker processes round-robin and each tracker's
+frame loop runs on that process's event loop.
+
+Run all cameras on a kiosk node with:
+    python -m app.devices --address /tmp/waw_vision.sock
+and start the API with VISION_WORKER_ADDRESS=/tmp/waw_vision.sock and
+CAMERA_DEVICES set to the same device list (e.g. 0,1,2).
+"""
+import argparse
+import asyncio
+import glob
+import logging
+import multiprocessing
+import os
+import re
+import time
+from typing import Dict, List, Optional
+
+from . import config
+from .cpu import available_cores
+from .vision_worker import VisionWorkerServer, VisionWorkerClient, default_authkey, device_address
+
+logger = logging.getLogger(__name__)
+
+MAX_PROBED_DEVICES = 8
+
+
+def enumerate_cameras(limit: int = MAX_PROBED_DEVICES) -> List[int]:
+    """Indices of cameras that open; /dev/video* nodes on Linux, probing 0..limit-1 elsewhere"""
+    from .eye_tracker_service import load_vision_stack
+    cv2 = load_vision_stack()
+
+    nodes = sorted(int(m.group(1)) for m in (re.search(r"video(\d+)$", p) for p in glob.glob("/dev/video*")) if m)
+    candidates = nodes[:limit] if nodes else range(limit)
+    found = []
+    for index in candidates:
+        cap = cv2.VideoCapture(index)
+        try:
+            if cap.isOpened() and cap.read()[0]:
+                found.append(index)
+        finally:
+            cap.release()
+    return found
+
+
+def serve_devices(devices: List[int], address: str, authkey: bytes, core: Optional[int] = None):
+    """Worker process entry point: one vision worker per device on a shared event loop"""
+    logging.basicConfig(level=logging.INFO)
+    if core is not None and hasattr(os, "sched_setaffinity"):
+        os.sched_setaffinity(0, {core})
+    from .eye_tracker_service import EyeTrackerService, face_mesh_pool
+
+    async def run():
+        servers = [VisionWorkerServer(EyeTrackerService(device=device)) for device in devices]
+        # One warm FaceMesh per camera; sessions arriving before it's ready build their own
+        asyncio.get_running_loop().run_in_executor(None, face_mesh_pool.warm, len(devices))
+        await asyncio.gather(*(server.serve(device_address(address, server.tracker.device), authkey)
+                               for server in servers))
+
+    logger.info(f"🎥 Worker {os.getpid()} serving cameras {devices}" + (f" on core {core}" if core is not None else ""))
+    asyncio.run(run())
+
+
+class DeviceManager:
+    """Runs and supervises one vision worker per camera on a core-sized process pool"""
+
+    def __init__(self, devices: List[int], address: str, authkey: Optional[bytes] = None,
+                 workers: Optional[int] = None, pin_cores: bool = False):
+        if not devices:
+            raise ValueError("No camera devices to serve")
+        self.devices = devices
+        self.address = address
+        self.authkey = authkey or default_authkey()
+        self.cores = available_cores()
+        self.workers = max(1, min(len(devices), workers or len(self.cores)))
+        self.pin_cores = pin_cores
+        # Spawn, not fork: workers must not inherit the parent's camera or OpenCV state
+        self.context = multiprocessing.get_context("spawn")
+        self.processes: Dict[int, multiprocessing.Process] = {}
+
+    def assignment(self, worker: int) -> List[int]:
+        return self.devices[worker::self.workers]
+
+    def start_worker(self, worker: int):
+        core = self.cores[worker % len(self.cores)] if self.pin_cores else None
+        process = self.context.Process(target=serve_devices, name=f"vision-worker-{worker}",
+                                       args=(self.assignment(worker), self.address, self.authkey, core),
+                                       daemon=True)
+        process.start()
+        self.processes[worker] = process
+
+    def start(self):
+        logger.info(f"🎥 Serving {len(self.devices)} camera(s) on {self.workers} worker process(es)")
+        for worker in range(self.workers):
+            self.start_worker(worker)
+
+    def supervise(self, poll: float = 1.0):
+        """Restart workers that exit (e.g. a camera driver crash) until interrupted"""
+        try:
+            while True:
+                time.sleep(poll)
+                for worker, process in list(self.processes.items()):
+                    if not process.is_alive():
+                        logger.warning(f"⚠️ Worker for cameras {self.assignment(worker)} exited "
+                                       f"({process.exitcode}), restarting")
+                        self.start_worker(worker)
+        except KeyboardInterrupt:
+            pass
+        finally:
+            self.stop()
+
+    def stop(self):
+        for process in self.processes.values():
+            process.terminate()
+        for process in self.processes.values():
+            process.join(timeout=5)
+
+
+def remote_trackers(address: str, devices: List[int]) -> Dict[int, VisionWorkerClient]:
+    """IPC clients for each device's vision worker, keyed by camera index"""
+    return {device: VisionWorkerClient(device_address(address, device)) for device in devices}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve every camera on this node from a per-core worker pool")
+    parser.add_argument("--address", default=config.VISION_WORKER_ADDRESS or "/tmp/waw_vision.sock",
+                        help="Base address; camera N listens on device_address(address, N)")
+    parser.add_argument("--devices", default=None,
+                        help="Comma-separated camera indices (default: enumerate attached cameras)")
+    parser.add_argument("--workers", type=int, default=None, help="Worker processes (default: available cores)")
+    parser.add_argument("--pin-cores", action="store_true", help="Pin each worker process to one core")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO)
+
+    devices = [int(d) for d in args.devices.split(",")] if args.devices else enumerate_cameras()
+    logger.info(f"📷 Cameras: {devices}")
+    manager = DeviceManager(devices, args.address, workers=args.workers, pin_cores=args.pin_cores)
+    manager.start()
+    manager.supervise()
+
+
+if __name__ == "__main__":
+    main()
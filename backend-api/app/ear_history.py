@@ -0,0 +1,96 @@
+"""
+Fixed-capacity per-session EAR time series
+
+Every processed frame appends one (monotonic timestamp, left EAR, right EAR,
+flags) row to a preallocated NumPy structured array used as a ring, so a
+session keeps the last few minutes of detector input without creating any
+per-frame Python objects. Frames without a face store NaN EARs.
+"""
+import numpy as np
+
+EAR_DTYPE = np.dtype([("t", "f8"), ("left", "f4"), ("right", "f4"), ("flags", "u1")])
+
+# Per-frame flags
+EAR_FACE = 1       # a face was detected
+EAR_CLOSED = 2     # mean EAR below the threshold
+EAR_BLINK = 4      # a blink was counted on this frame
+EAR_COOLDOWN = 8   # blink cooldown was active
+EAR_CALIBRATING = 16  # threshold calibration in progress, no blink detection
+
+DEFAULT_CAPACITY = 9000  # ~5 minutes at 30 FPS
+
+
+class EarHistory:
+    """Ring buffer of per-frame EAR samples backed by a structured array"""
+
+    def __init__(self, capacity: int = DEFAULT_CAPACITY):
+        self.capacity = capacity
+        self.samples = np.zeros(capacity, dtype=EAR_DTYPE)
+        self.count = 0  # Total samples ever appended
+        # Field views so append() writes scalars without building a row tuple
+        self._t = self.samples["t"]
+        self._left = self.samples["left"]
+        self._right = self.samples["right"]
+        self._flags = self.samples["flags"]
+
+    def clear(self):
+        self.count = 0
+
+    def append(self, t: float, left: float, right: float, flags: int):
+        i = self.count % self.capacity
+        self._t[i] = t
+        self._left[i] = left
+        self._right[i] = right
+        self._flags[i] = flags
+        self.count += 1
+
+    def ordered(self) -> np.ndarray:
+        """All retained samples, oldest first"""
+        if self.count <= self.capacity:
+            return self.samples[:self.count]
+        head = self.count % self.capacity
+        return np.concatenate((self.samples[head:], self.samples[:head]))
+
+    def window(self, seconds: float) -> np.ndarray:
+        """Samples from the last `seconds`, measured back from the newest sample"""
+        samples = self.ordered()
+        if len(samples) == 0:
+            return samples
+        cutoff = samples["t"][-1] - seconds
+        return samples[np.searchsorted(samples["t"], cutoff, side="left"):]
+
+    def query(self, seconds: float, points: int) -> dict:
+        """JSON-ready window of at most `points` samples, decimated server-side
+
+        Each bucket keeps its lowest EAR (so blink dips survive decimation) and the
+        OR of its flags. Timestamps are seconds relative to the newest sample.
+        """
+        samples = self.window(seconds)
+        total = len(samples)
+        if total > points:
+            samples = decimate(samples, points)
+        newest = samples["t"][-1] if len(samples) else 0.0
+        return {
+            "seconds": seconds,
+            "samples": total,
+            "t": np.round(samples["t"] - newest, 4).tolist(),
+            "left_ear": _nan_to_none(samples["left"]),
+            "right_ear": _nan_to_none(samples["right"]),
+            "flags": samples["flags"].tolist(),
+        }
+
+
+def decimate(samples: np.ndarray, points: int) -> np.ndarray:
+    """Reduce samples to `points` buckets: first timestamp, min EAR, OR of flags"""
+    starts = np.unique(np.linspace(0, len(samples), points, endpoint=False).astype(np.intp))
+    out = np.empty(len(starts), dtype=EAR_DTYPE)
+    out["t"] = samples["t"][starts]
+    out["left"] = np.fmin.reduceat(samples["left"], starts)
+    out["right"] = np.fmin.reduceat(samples["right"], starts)
+    out["flags"] = np.bitwise_or.reduceat(samples["flags"], starts)
+    return out
+
+
+def _nan_to_none(values: np.ndarray) -> list:
+    rounded = np.round(values.astype(np.float64), 4)
+    return [None if v != v else v for v in rounded.tolist()]
@@ -1,219 +1,615 @@
 """
 WebSocket-based Eye Tracker Service with video streaming and real-time blink detection
+
+OpenCV and MediaPipe are imported lazily by load_vision_stack() when the first
+tracking session starts, so REST-only workers never pay for them.
 """
-import cv2
-import mediapipe as mp
 import numpy as np
 import asyncio
 import base64
+import time
 from datetime import datetime
 import pytz
-from typing import Optional, Callable
+from typing import Optional, Callable, TYPE_CHECKING
 import logging
+from .frame_ring import FrameRing
+from .frame_grabber import LatestFrameGrabber
+from .frame_pipeline import FramePipeline
+from .frame_messages import FrameDataFilter
+from .ear_history import EarHistory, EAR_FACE, EAR_CALIBRATING
+from .blink_detection import BlinkStateMachine, DEFAULT_EAR_THRESH
+from .calibration import EarCalibrator
+from .face_tracks import FaceTracker, eye_points, batch_ear
+from .recording import SessionRecorder, recording_path
+from .face_mesh_pool import FaceMeshPool
+from .camera_manager import CameraManager
+from . import config
+
+if TYPE_CHECKING:
+    from cv2 import VideoCapture
 
 logger = logging.getLogger(__name__)
 
-mp_face_mesh = mp.solutions.face_mesh
-mp_drawing = mp.solutions.drawing_utils
+# Populated by load_vision_stack()
+cv2 = None
+mp_face_mesh = None
+mp_drawing = None
+
+
+def load_vision_stack():
+    """Import OpenCV and MediaPipe on first use and return the cv2 module"""
+    global cv2, mp_face_mesh, mp_drawing
+    if cv2 is None:
+        import cv2 as _cv2
+        import mediapipe as mp
+        mp_face_mesh = mp.solutions.face_mesh
+        mp_drawing = mp.solutions.drawing_utils
+        cv2 = _cv2
+        logger.info("📦 Vision stack (OpenCV + MediaPipe) loaded")
+    return cv2
+
+
+# Frame ring stages: inference and encode each release a slot once done with it
+FRAME_SLOTS = 4
+INFER_STAGE = 0
+ENCODE_STAGE = 1
+
+CAPTURE_FPS = 30
+
+# Video preview settings clients can change mid-session; width/height 0 means camera resolution
+DEFAULT_PREVIEW = {"width": 0, "height": 0, "quality": 70, "fps": CAPTURE_FPS}
+
+
+class FrameLoopStats:
+    """Frame rate, CPU share and frame age of one tracker's frame loop over a rolling window"""
+
+    def __init__(self, window: float = 2.0):
+        self.window = window
+        self.fps = 0.0
+        self.cpu_percent = 0.0
+        self.frame_age_ms = 0.0  # Mean capture-to-inference delay
+        self.reset()
+
+    def reset(self):
+        self.since = time.monotonic()
+        self.frames = 0
+        self.cpu = 0.0
+        self.age = 0.0
+
+    def add_cpu(self, cpu_seconds: float):
+        """CPU a frame spent in inference or encoding, measured on whichever thread ran it"""
+        self.cpu += cpu_seconds
+
+    def add_frame(self, cpu_seconds: float, frame_age: float = 0.0):
+        self.frames += 1
+        self.cpu += cpu_seconds
+        self.age += frame_age
+        elapsed = time.monotonic() - self.since
+        if elapsed >= self.window:
+            self.fps = round(self.frames / elapsed, 1)
+            self.cpu_percent = round(100.0 * self.cpu / elapsed, 1)
+            self.frame_age_ms = round(1000.0 * self.age / self.frames, 1)
+            self.reset()
+
+    def clear(self):
+        self.fps = self.cpu_percent = self.frame_age_ms = 0.0
+        self.reset()
+
+
+class SessionTotals:
+    """Counters over one whole tracking session, summarized when it ends"""
+
+    def __init__(self, tz):
+        self.tz = tz
+        self.started_at = datetime.now(tz)
+        self.started = time.monotonic()
+        self.frames = 0
+        self.blink_count = 0
+        self.frame_age = 0.0   # Camera grab to FaceMesh input
+        self.inference = 0.0   # FaceMesh
+        self.encodes = 0
+        self.encode = 0.0      # Overlay drawing + JPEG/base64, frames with video only
+
+    def add_frame(self, frame_age: float, inference: float):
+        self.frames += 1
+        self.frame_age += frame_age
+        self.inference += inference
+
+    def add_encode(self, seconds: float):
+        """Called from the encode thread; it is the only writer of these two"""
+        self.encodes += 1
+        self.encode += seconds
+
+    def summary(self, dropped_frames: int) -> dict:
+        duration = time.monotonic() - self.started
+
+        def mean_ms(total: float, count: int) -> float:
+            return round(1000.0 * total / count, 2) if count else 0.0
+
+        return {
+            "started_at": self.started_at.isoformat(),
+            "ended_at": datetime.now(self.tz).isoformat(),
+            "duration_s": round(duration, 2),
+            "blink_count": self.blink_count,
+            "blinks_per_minute": round(60.0 * self.blink_count / duration, 2) if duration > 0 else 0.0,
+            "frames": self.frames,
+            "dropped_frames": dropped_frames,
+            "frame_age_ms": mean_ms(self.frame_age, self.frames),
+            "inference_ms": mean_ms(self.inference, self.frames),
+            "encode_ms": mean_ms(self.encode, self.encodes),
+        }
 
-LEFT_EYE = [33, 160, 158, 133, 153, 144]
-RIGHT_EYE = [362, 385, 387, 263, 373, 380]
 
 class EyeTrackerService:
-    def __init__(self):
-        self.cap: Optional[cv2.VideoCapture] = None
+    def __init__(self, capture_factory: Optional[Callable[[], "VideoCapture"]] = None, device: int = 0,
+                 camera_idle_timeout: Optional[float] = None):
+        # Factory for the frame source; anything with the VideoCapture
+        # read/set/isOpened/release interface works (e.g. a fake camera)
+        self.device = device
+        self.capture_factory = capture_factory or (lambda: cv2.VideoCapture(self.device))
+        self.camera = CameraManager(
+            lambda: self.capture_factory(),
+            config.CAMERA_IDLE_TIMEOUT if camera_idle_timeout is None else camera_idle_timeout,
+            configure=self.configure_camera,
+        )
+        self.grabber: Optional[LatestFrameGrabber] = None
+        self.releasing: Optional[asyncio.Task] = None  # Joins a stopped grabber, then hands the camera back
         self.is_running = False
-        self.blink_count = 0
+        self.session_id = 0  # Bumped per start_tracking; a superseded session leaves the camera alone
         self.last_blink_count = -1
         self.EAR_THRESH = 0.25  # Increased sensitivity for faster blinks
         self.CONSEC_FRAMES = 1  # Reduced to detect very fast blinks
-        self.frame_counter = 0
-        self.blink_cooldown = 0  # Prevent double counting
+        self.detector = BlinkStateMachine(self.EAR_THRESH, self.CONSEC_FRAMES)
+        # Every visible face with its own blink counter; self.detector follows the primary face
+        self.faces = FaceTracker(self.EAR_THRESH, self.CONSEC_FRAMES)
         self.india_tz = pytz.timezone('Asia/Kolkata')
         self.send_video = True
+        self.preview = dict(DEFAULT_PREVIEW)
+        self.preview_changed = False
+        # Per-frame EAR history of the current (or last) session and who owns it
+        self.ear_history = EarHistory()
+        self.session_user_id: Optional[int] = None
+        self.stats = FrameLoopStats()
+        # Session start (start_tracking called) to its first frame_data, of the current or last session
+        self.start_ms: Optional[float] = None
         
-    def euclidean_dist(self, pt1, pt2):
-        return np.linalg.norm(np.array(pt1) - np.array(pt2))
+    @property
+    def blink_count(self):
+        return self.detector.blink_count
 
-    def eye_aspect_ratio(self, eye_landmarks):
-        A = self.euclidean_dist(eye_landmarks[1], eye_landmarks[5])
-        B = self.euclidean_dist(eye_landmarks[2], eye_landmarks[4])
-        C = self.euclidean_dist(eye_landmarks[0], eye_landmarks[3])
-        return (A + B) / (2.0 * C)
+    @property
+    def frame_counter(self):
+        return self.detector.frame_counter
 
-    def encode_frame(self, frame):
+    def encode_frame(self, frame, quality: int = 70):
         """Encode frame to base64 for WebSocket transmission"""
-        _, buffer = cv2.imencode('.jpg', frame, [cv2.IMWRITE_JPEG_QUALITY, 70])
+        _, buffer = cv2.imencode('.jpg', frame, [cv2.IMWRITE_JPEG_QUALITY, quality])
         frame_base64 = base64.b64encode(buffer).decode('utf-8')
         return frame_base64
 
-    async def start_tracking(self, callback: Callable[[dict], None], send_video: bool = True):
-        """Start eye tracking with optional video streaming"""
+    def configure_preview(self, video: Optional[bool] = None, width: Optional[int] = None,
+                          height: Optional[int] = None, quality: Optional[int] = None, fps: Optional[float] = None):
+        """Change the running session's video preview; None leaves a setting as it is
+
+        Applies from the next frame, which is preceded by a preview_settings message.
+        """
+        if video is not None:
+            self.send_video = video
+        for key, value in (("width", width), ("height", height), ("quality", quality), ("fps", fps)):
+            if value is not None:
+                self.preview[key] = value
+        self.preview_changed = True
+
+    def preview_size(self, frame_shape, preview: dict):
+        """(width, height) to scale the preview to, or None for the camera resolution"""
+        h, w = frame_shape[:2]
+        width, height = preview["width"], preview["height"]
+        if not width and not height:
+            return None
+        # Missing side keeps the camera's aspect ratio; never upscale
+        width = width or round(height * w / h)
+        height = height or round(width * h / w)
+        if width >= w and height >= h:
+            return None
+        return min(width, w), min(height, h)
+
+    def render_frame(self, frame, faces, eyes, ids, blink_count: int, time_str: str, preview: dict) -> str:
+        """Render stage: draw the overlay onto the frame and encode it (runs on the encode thread)"""
+        for face_landmarks, (face_left, face_right), track_id in zip(faces, eyes, ids):
+            # Draw face mesh
+            mp_drawing.draw_landmarks(
+                frame, face_landmarks, mp_face_mesh.FACEMESH_CONTOURS,
+                None, mp_drawing.DrawingSpec(color=(0, 255, 0), thickness=1, circle_radius=1)
+            )
+            # Draw eye contours
+            cv2.polylines(frame, [face_left, face_right], True, (255, 0, 0), 2)
+            if len(faces) > 1:
+                cv2.putText(frame, f'#{track_id}', tuple(int(v) for v in face_right[3]),
+                            cv2.FONT_HERSHEY_SIMPLEX, 0.6, (0, 255, 255), 2)
+
+        # Add overlay text
+        cv2.putText(frame, f'Blinks: {blink_count}', (30, 50),
+                    cv2.FONT_HERSHEY_SIMPLEX, 1.5, (0, 0, 255), 3)
+        cv2.putText(frame, f'Status: {"Detecting..." if self.is_running else "Stopped"}',
+                    (30, 100), cv2.FONT_HERSHEY_SIMPLEX, 0.8, (0, 255, 0), 2)
+        cv2.putText(frame, time_str, (30, frame.shape[0] - 30),
+                    cv2.FONT_HERSHEY_SIMPLEX, 0.7, (255, 255, 255), 2)
+
+        # Downscale before encoding: a 320x240 preview encodes ~4x faster and is ~4x smaller
+        size = self.preview_size(frame.shape, preview)
+        if size is not None:
+            frame = cv2.resize(frame, size, interpolation=cv2.INTER_AREA)
+        return self.encode_frame(frame, preview["quality"])
+
+    def configure_camera(self, cap):
+        """Camera properties, applied once each time the device is opened"""
+        cap.set(cv2.CAP_PROP_FRAME_WIDTH, 640)
+        cap.set(cv2.CAP_PROP_FRAME_HEIGHT, 480)
+        cap.set(cv2.CAP_PROP_FPS, CAPTURE_FPS)
+        # The grabber drains the device anyway; a short driver queue keeps frames fresh
+        cap.set(cv2.CAP_PROP_BUFFERSIZE, 1)
+
+    def capture_frame(self, ring: FrameRing, image: np.ndarray) -> bool:
+        """Capture stage: mirror the grabber's newest frame into a free ring slot"""
+        slot = ring.claim()
+        if slot is None:
+            # Downstream stages still hold every slot; drop this frame
+            return False
+        buffer = ring.frame(slot)
+        if image.shape != buffer.shape:
+            # Source changed size mid-session; scale back to the slot size
+            image = cv2.resize(image, (buffer.shape[1], buffer.shape[0]))
+        # Flip frame horizontally for mirror effect; the flip is also the copy into the slot
+        cv2.flip(image, 1, dst=buffer)
+        ring.publish(slot)
+        return True
+
+    async def ear_history_window(self, user_id: int, seconds: float, points: int) -> Optional[dict]:
+        """Recent EAR samples of the user's tracking session, or None if they don't own it"""
+        if self.session_user_id is None or self.session_user_id != user_id:
+            return None
+        window = self.ear_history.query(seconds, points)
+        window["ear_threshold"] = self.EAR_THRESH
+        return window
+
+    async def start_tracking(self, callback: Callable[[dict], None], send_video: bool = True,
+                             user_id: Optional[int] = None, ear_threshold: Optional[float] = None):
+        """Start eye tracking with optional video streaming
+
+        Without a stored per-user `ear_threshold` the session starts with a short
+        calibration phase and reports the derived threshold in a
+        `calibration_complete` message.
+        """
+        session_started = time.perf_counter()
+        self.session_id += 1
+        session = self.session_id
+        # Set before any await so preview changes sent right after connecting aren't overwritten
+        self.send_video = send_video
+        self.preview = dict(DEFAULT_PREVIEW)
+        self.preview_changed = False
+
         if self.is_running:
             logger.warning("Eye tracker already running, stopping first...")
             self.stop_tracking()
             # Give a moment for cleanup
             await asyncio.sleep(0.1)
+        if self.releasing is not None:
+            # The previous grabber may still be in cap.read() on the camera we are about to take
+            await self.releasing
             
+        ring: Optional[FrameRing] = None
+        recorder: Optional[SessionRecorder] = None
+        calibrator: Optional[EarCalibrator] = None
+        pipeline: Optional[FramePipeline] = None
+        totals: Optional[SessionTotals] = None
+        grabber: Optional[LatestFrameGrabber] = None
+        face_mesh = None
+        summary: Optional[dict] = None
         try:
-            # Try to release any existing camera first
-            if self.cap:
-                self.cap.release()
-                self.cap = None
-                await asyncio.sleep(0.1)
-            
-            self.cap = cv2.VideoCapture(0)
-            if not self.cap.isOpened():
+            # First session on this worker pays the import; keep the loop responsive meanwhile
+            if cv2 is None:
+                await asyncio.to_thread(load_vision_stack)
+
+            # Still open if a session ended within the idle timeout; otherwise opened and configured now
+            cap = await self.camera.acquire()
+            if cap is None:
                 logger.error("Could not open camera")
                 return {"success": False, "message": "Could not open camera"}
                 
-            # Set camera properties for better performance
-            self.cap.set(cv2.CAP_PROP_FRAME_WIDTH, 640)
-            self.cap.set(cv2.CAP_PROP_FRAME_HEIGHT, 480)
-            self.cap.set(cv2.CAP_PROP_FPS, 30)
-                
             self.is_running = True
-            self.send_video = send_video
-            self.blink_count = 0
+            self.start_ms = None
+            next_preview_at = 0.0
             self.last_blink_count = -1
-            self.frame_counter = 0
-            self.blink_cooldown = 0
+            self.EAR_THRESH = ear_threshold if ear_threshold is not None else DEFAULT_EAR_THRESH
+            if ear_threshold is None:
+                calibrator = EarCalibrator()
+            self.detector = BlinkStateMachine(self.EAR_THRESH, self.CONSEC_FRAMES)
+            self.faces = FaceTracker(self.EAR_THRESH, self.CONSEC_FRAMES)
+            self.ear_history.clear()
+            self.session_user_id = user_id
+            if config.RECORDINGS_DIR:
+                recorder = SessionRecorder(recording_path(config.RECORDINGS_DIR, user_id), {
+                    "user_id": user_id,
+                    "started_at": datetime.now(self.india_tz).isoformat(),
+                    "ear_thresh": self.EAR_THRESH,
+                    "consec_frames": self.CONSEC_FRAMES,
+                    "calibrating": calibrator is not None,
+                })
+                logger.info(f"🎞️ Recording session to {recorder.path}")
             
             logger.info("🚀 Starting eye tracker service with video streaming")
             
-            with mp_face_mesh.FaceMesh(
-                max_num_faces=1,
-                refine_landmarks=True,
-                min_detection_confidence=0.5,
-                min_tracking_confidence=0.5
-            ) as face_mesh:
-                
-                while self.is_running:
-                    ret, frame = self.cap.read()
-                    if not ret:
-                        break
-                    
-                    # Flip frame horizontally for mirror effect
-                    frame = cv2.flip(frame, 1)
-                    rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-                    results = face_mesh.process(rgb)
-
-                    # Draw face mesh and detect blinks
-                    if results.multi_face_landmarks:
-                        h, w, _ = frame.shape
-                        for face_landmarks in results.multi_face_landmarks:
-                            # Draw face mesh
-                            mp_drawing.draw_landmarks(
-                                frame, face_landmarks, mp_face_mesh.FACEMESH_CONTOURS,
-                                None, mp_drawing.DrawingSpec(color=(0, 255, 0), thickness=1, circle_radius=1)
-                            )
-                            
-                            # Extract eye landmarks
-                            left_eye = [(int(face_landmarks.landmark[i].x * w), 
-                                       int(face_landmarks.landmark[i].y * h)) for i in LEFT_EYE]
-                            right_eye = [(int(face_landmarks.landmark[i].x * w), 
-                                        int(face_landmarks.landmark[i].y * h)) for i in RIGHT_EYE]
-                            
-                            # Draw eye contours
-                            cv2.polylines(frame, [np.array(left_eye)], True, (255, 0, 0), 2)
-                            cv2.polylines(frame, [np.array(right_eye)], True, (255, 0, 0), 2)
-                            
-                            # Calculate eye aspect ratio
-                            left_ear = self.eye_aspect_ratio(left_eye)
-                            right_ear = self.eye_aspect_ratio(right_eye)
-                            ear = (left_ear + right_ear) / 2.0
-                            
-                            # Improved blink detection logic for fast blinks
-                            if self.blink_cooldown > 0:
-                                self.blink_cooldown -= 1
-                            
-                            if ear < self.EAR_THRESH:
-                                self.frame_counter += 1
-                            else:
-                                # Blink detected when coming out of closed state
-                                if self.frame_counter >= self.CONSEC_FRAMES and self.blink_cooldown == 0:
-                                    self.blink_count += 1
-                                    self.blink_cooldown = 3  # 3-frame cooldown to prevent double counting
-                                self.frame_counter = 0
-                    
-                    # Add overlay text
-                    cv2.putText(frame, f'Blinks: {self.blink_count}', (30, 50), 
-                               cv2.FONT_HERSHEY_SIMPLEX, 1.5, (0, 0, 255), 3)
-                    cv2.putText(frame, f'Status: {"Detecting..." if self.is_running else "Stopped"}', 
-                               (30, 100), cv2.FONT_HERSHEY_SIMPLEX, 0.8, (0, 255, 0), 2)
-                    
-                    # Get current India time
-                    current_time = datetime.now(self.india_tz)
-                    time_str = current_time.strftime('%H:%M:%S IST')
-                    cv2.putText(frame, time_str, (30, frame.shape[0] - 30), 
-                               cv2.FONT_HERSHEY_SIMPLEX, 0.7, (255, 255, 255), 2)
-                    
-                    # Send data via WebSocket
-                    message_data = {
-                        "type": "frame_data",
-                        "blink_count": self.blink_count,
-                        "timestamp": current_time.isoformat(),
-                        "ear_threshold": self.EAR_THRESH,
-                        "frame_counter": self.frame_counter
-                    }
-                    
-                    # Add video frame if streaming enabled
-                    if self.send_video:
-                        message_data["video_frame"] = self.encode_frame(frame)
-                    
-                    # Send blink count update when it changes
-                    if self.blink_count != self.last_blink_count:
-                        message_data["blink_changed"] = True
-                        self.last_blink_count = self.blink_count
-                    
+            # A warm graph from the pool; handed back in finally once inference is done with it.
+            # Builds one when the pool is empty, which takes a while, so off the event loop
+            face_mesh = await asyncio.to_thread(face_mesh_pool.acquire)
+            if self.session_id != session:
+                return {"success": False, "message": "Superseded by a newer session"}
+
+            # Drain the camera on a background thread; size the frame slots from what it delivers
+            grabber = self.grabber = LatestFrameGrabber(cap, fps=CAPTURE_FPS)
+            if not grabber.start():
+                # Don't hand a broken device to the next session
+                self.camera.close()
+                return {"success": False, "message": "Could not read from camera"}
+            ring = FrameRing(slots=FRAME_SLOTS, shape=grabber.shape, readers=2)
+            rgb = np.empty(grabber.shape, dtype=np.uint8)
+            # Frame N renders and encodes on a worker thread while frame N+1 is inferred on another
+            pipeline = FramePipeline(callback)
+            frame_filter = FrameDataFilter()
+
+            self.stats.clear()
+            totals = SessionTotals(self.india_tz)
+            while self.is_running and self.session_id == session:
+                if pipeline.error is not None:
+                    logger.error(f"Error sending data via callback: {pipeline.error}")
+                    # If we can't send data, stop tracking to prevent spam
+                    logger.info("🛑 Stopping tracker due to callback error")
+                    break
+                # Paced by the camera: waits for a frame newer than the last one processed
+                taken = await grabber.next_frame()
+                if taken is None:
+                    break
+                image, captured_at = taken
+                # This frame's CPU on the loop thread, paused across awaits where other coroutines run;
+                # inference and render measure their own thread and report through stats.add_cpu
+                loop_cpu = 0.0
+                frame_cpu = time.thread_time()
+                if not self.capture_frame(ring, image):
+                    continue
+                entry = ring.latest_for(INFER_STAGE)
+                if entry is None:
+                    continue
+                seq, slot, _ = entry
+                frame = ring.frame(slot)
+                frame_age = time.monotonic() - captured_at
+
+                cv2.cvtColor(frame, cv2.COLOR_BGR2RGB, dst=rgb)
+                loop_cpu += time.thread_time() - frame_cpu
+
+                def infer(image=rgb):
+                    infer_cpu = time.thread_time()
                     try:
-                        await callback(message_data)
-                    except Exception as e:
-                        logger.error(f"Error sending data via callback: {e}")
-                        # If we can't send data, stop tracking to prevent spam
-                        logger.info("🛑 Stopping tracker due to callback error")
-                        break
-                    
-                    # Control frame rate (~30 FPS)
-                    await asyncio.sleep(0.033)
-                    
+                        return face_mesh.process(image)
+                    finally:
+                        self.stats.add_cpu(time.thread_time() - infer_cpu)
+
+                infer_started = time.perf_counter()
+                results = await pipeline.infer(infer)
+                totals.add_frame(frame_age, time.perf_counter() - infer_started)
+                frame_cpu = time.thread_time()
+                left_ear = right_ear = np.nan
+                ring.release(INFER_STAGE, seq)
+                left_eye = right_eye = None
+                ear_flags = 0
+                calibrated_thresh = None
+                faces, eyes, ids = [], [], []
+
+                # Detect blinks; drawing happens later in the render stage
+                if results.multi_face_landmarks:
+                    h, w, _ = frame.shape
+                    faces = results.multi_face_landmarks
+
+                    # Eye landmarks and EARs of every face at once: (faces, 2, 6, 2) -> (faces, 2)
+                    eyes = eye_points(faces, w, h)
+                    eye_ears = batch_ear(eyes)
+                    ears = eye_ears.mean(axis=1)
+                    ids = self.faces.match(eyes.reshape(len(eyes), -1, 2).mean(axis=1) / (w, h))
+
+                    # The oldest visible track is the session owner's face
+                    primary = ids.index(min(ids))
+                    left_eye, right_eye = eyes[primary]
+                    left_ear, right_ear = float(eye_ears[primary, 0]), float(eye_ears[primary, 1])
+                    ear = float(ears[primary])
+
+                    if calibrator is not None and not calibrator.done:
+                        # Learn this user's open-eye EAR before counting blinks
+                        ear_flags = EAR_FACE | EAR_CALIBRATING
+                        calibrated_thresh = calibrator.update(ear)
+                    else:
+                        # Improved blink detection logic for fast blinks
+                        ear_flags = EAR_FACE | self.detector.update(ear)
+                        self.faces.update(ids, ears)
+
+                frame_time = time.monotonic()
+                self.ear_history.append(frame_time, left_ear, right_ear, ear_flags)
+                totals.blink_count = self.blink_count
+                if recorder is not None:
+                    recorder.append(frame_time, left_ear, right_ear, ear_flags, left_eye, right_eye)
+
+                if calibrated_thresh is not None:
+                    self.EAR_THRESH = calibrated_thresh
+                    self.detector = BlinkStateMachine(self.EAR_THRESH, self.CONSEC_FRAMES)
+                    self.faces.set_threshold(self.EAR_THRESH)
+                    baseline_ear = round(calibrator.baseline_ear, 4)
+                    logger.info(f"🎯 Calibrated EAR threshold {self.EAR_THRESH} (open-eye EAR {baseline_ear})")
+                    if recorder is not None:
+                        recorder.update_metadata(ear_thresh=self.EAR_THRESH, baseline_ear=baseline_ear)
+                    await pipeline.submit({
+                        "type": "calibration_complete",
+                        "ear_threshold": self.EAR_THRESH,
+                        "baseline_ear": baseline_ear,
+                    })
+
+                # Send data via WebSocket
+                message_data = {
+                    "type": "frame_data",
+                    "blink_count": self.blink_count,
+                    "ear_threshold": self.EAR_THRESH,
+                    "frame_counter": self.frame_counter,
+                    "calibrating": calibrator is not None and not calibrator.done,
+                    "faces": self.faces.summary(),
+                    "frame_age_ms": round(frame_age * 1000.0, 1),
+                }
+
+                if self.preview_changed:
+                    # Acknowledge live preview changes in frame order, right before they apply
+                    self.preview_changed = False
+                    loop_cpu += time.thread_time() - frame_cpu
+                    await pipeline.submit({"type": "preview_settings", "video": self.send_video, **self.preview})
+                    frame_cpu = time.thread_time()
+
+                # Video frames are due at the preview frame rate; other frames are only
+                # sent when their blink state changed or a heartbeat is due
+                now = time.monotonic()
+                video_due = self.send_video and (self.preview["fps"] >= CAPTURE_FPS or now >= next_preview_at)
+                if not frame_filter.should_send(message_data, now, video=video_due):
+                    ring.release(ENCODE_STAGE, seq)
+                    self.stats.add_frame(loop_cpu + time.thread_time() - frame_cpu, frame_age)
+                    continue
+
+                # Get current India time
+                current_time = datetime.now(self.india_tz)
+                message_data["timestamp"] = current_time.isoformat()
+
+                # Send blink count update when it changes
+                if self.blink_count != self.last_blink_count:
+                    message_data["blink_changed"] = True
+                    self.last_blink_count = self.blink_count
+
+                # Add video frame if streaming enabled; the slot goes back to the ring once encoded
+                if video_due:
+                    # Half a camera frame of slack so e.g. 15 FPS keeps every other frame despite jitter
+                    next_preview_at = now + 1.0 / self.preview["fps"] - 0.5 / CAPTURE_FPS
+
+                    def render(frame=frame, faces=faces, eyes=eyes, ids=ids, seq=seq,
+                               blink_count=self.blink_count, time_str=current_time.strftime('%H:%M:%S IST'),
+                               preview=dict(self.preview)):
+                        render_cpu = time.thread_time()
+                        render_started = time.perf_counter()
+                        try:
+                            return self.render_frame(frame, faces, eyes, ids, blink_count, time_str, preview)
+                        finally:
+                            ring.release(ENCODE_STAGE, seq)
+                            self.stats.add_cpu(time.thread_time() - render_cpu)
+                            totals.add_encode(time.perf_counter() - render_started)
+                else:
+                    render = None
+                    ring.release(ENCODE_STAGE, seq)
+                loop_cpu += time.thread_time() - frame_cpu
+                await pipeline.submit(message_data, render)
+                self.stats.add_frame(loop_cpu, frame_age)
+                if self.start_ms is None:
+                    self.start_ms = round((time.perf_counter() - session_started) * 1000.0, 1)
+                    logger.info(f"⏱️ First frame_data {self.start_ms} ms after session start")
+
         except Exception as e:
             logger.error(f"Eye tracker error: {e}")
             return {"success": False, "message": f"Eye tracking failed: {str(e)}"}
         finally:
-            self.stop_tracking()
+            if totals is not None:
+                # A stop request has already reset the live counters; totals kept their own
+                summary = totals.summary(grabber.skipped)
+            if self.session_id == session:
+                self.stop_tracking()
+                if self.releasing is not None:
+                    await self.releasing
+                if grabber is not None and grabber.failed:
+                    self.camera.close()
+            # Otherwise a newer session stopped this one and now owns the grabber, camera and counters
+            if pipeline is not None:
+                # Let the encode thread finish with its slot before the ring goes away
+                await pipeline.close()
+            if face_mesh is not None:
+                face_mesh_pool.release(face_mesh)
+            if ring is not None:
+                ring.close()
+            if recorder is not None:
+                recorder.close()
             
-        return {"success": True, "message": "Eye tracking completed"}
+        return {"success": True, "message": "Eye tracking completed", "summary": summary}
 
     def stop_tracking(self):
         """Stop eye tracking"""
         logger.info("🛑 Stopping eye tracker service...")
         self.is_running = False
-        
-        if self.cap:
-            try:
-                self.cap.release()
-                logger.info("📷 Camera released successfully")
-            except Exception as e:
-                logger.error(f"Error releasing camera: {e}")
-            finally:
-                self.cap = None
+
+        # The grabber thread may be inside cap.read(); it is joined off the event loop
+        # before the camera goes back, and the next session waits for that
+        if self.grabber:
+            self.grabber.stop(timeout=0)
+            self.releasing = asyncio.get_running_loop().create_task(self._release_camera(self.grabber))
+            self.grabber = None
+        elif self.releasing is None or self.releasing.done():
+            self.camera.release()
         
         # Reset counters
-        self.blink_count = 0
+        self.detector.reset()
+        self.faces.reset()
+        self.stats.clear()
         self.last_blink_count = -1
-        self.frame_counter = 0
-        self.blink_cooldown = 0
         
         logger.info("🛑 Eye tracker service stopped and cleaned up")
 
+    async def _release_camera(self, grabber: LatestFrameGrabber):
+        if not await asyncio.to_thread(grabber.stop):
+            # Still blocked in read(): reusing or closing the capture now would race it,
+            # so it is handed to the thread to release and the next session opens a new one
+            logger.warning("📷 Camera read did not return in time, releasing it once it does")
+            self.camera.detach()
+            grabber.release_on_exit()
+        # Stays open for a following session until the idle timeout turns it off
+        self.camera.release()
+
     def get_status(self):
         """Get current tracking status"""
         return {
             "is_running": self.is_running,
             "blink_count": self.blink_count,
-            "send_video": self.send_video
+            "faces": len(self.faces.tracks),
+            "send_video": self.send_video,
+            "preview": self.preview,
+            "camera_open": self.camera.is_open,
+        }
+
+    async def device_status(self) -> dict:
+        """Camera device, session state and frame loop load, for the device listing"""
+        return {
+            "device": self.device,
+            "available": True,
+            "is_running": self.is_running,
+            "user_id": self.session_user_id if self.is_running else None,
+            "fps": self.stats.fps,
+            "cpu_percent": self.stats.cpu_percent,
+            "frame_age_ms": self.stats.frame_age_ms,
+            "skipped_frames": self.grabber.skipped if self.grabber else 0,
+            "start_ms": self.start_ms,
+            **self.camera.status(),
         }
 
-# Global instance
-eye_tracker_service = EyeTrackerService()
+
+def create_face_mesh():
+    """FaceMesh configured for tracking sessions"""
+    load_vision_stack()
+    return mp_face_mesh.FaceMesh(
+        max_num_faces=config.MAX_FACES,
+        refine_landmarks=True,
+        min_detection_confidence=0.5,
+        min_tracking_confidence=0.5
+    )
+
+
+# Warm FaceMesh graphs shared by every tracker in this process
+face_mesh_pool = FaceMeshPool(create_face_mesh, size=len(config.CAMERA_DEVICES))
+
+# Global instance for the node's default camera
+eye_tracker_service = EyeTrackerService(device=config.CAMERA_DEVICES[0])
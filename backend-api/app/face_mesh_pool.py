@@ -0,0 +1,89 @@
+"""
+Warm pool of FaceMesh instances shared by a process's tracking sessions
+
+Constructing mediapipe's FaceMesh loads and initializes its model graph, and
+the first frame through a new graph is several times slower than the rest.
+The pool builds instances up front (warm(), at service start) and runs a blank
+frame through each, so a session leases a ready graph instead of paying that
+on its way to the first frame_data. Returned instances are reset() so the next
+session doesn't inherit the previous one's face tracking state.
+
+A lease when every instance is taken builds a new one (counted as a miss);
+at most `size` idle instances are kept, extra ones are closed on return.
+"""
+import logging
+import threading
+from typing import Any, Callable, List, Optional
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+WARM_FRAME_SHAPE = (480, 640, 3)
+
+
+class FaceMeshPool:
+    def __init__(self, factory: Callable[[], Any], size: int = 1):
+        # factory builds a FaceMesh-like object with process(), reset() and close()
+        self.factory = factory
+        self.size = size
+        self.lock = threading.Lock()
+        self.idle: List[Any] = []
+        self.leased = 0
+        self.hits = 0
+        self.misses = 0
+
+    def create(self):
+        """Build an instance and push one blank frame through it so the graph is initialized"""
+        mesh = self.factory()
+        mesh.process(np.zeros(WARM_FRAME_SHAPE, dtype=np.uint8))
+        mesh.reset()
+        return mesh
+
+    def warm(self, size: Optional[int] = None):
+        """Fill the pool up to `size` idle instances (blocking; run off the event loop)"""
+        if size is not None:
+            self.size = size
+        with self.lock:
+            missing = self.size - len(self.idle) - self.leased
+        created = [self.create() for _ in range(max(0, missing))]
+        with self.lock:
+            self.idle.extend(created)
+        if created:
+            logger.info(f"🔥 Warmed {len(created)} FaceMesh instance(s)")
+
+    def acquire(self):
+        """An idle warm instance, or a freshly built one if there is none (blocking)"""
+        with self.lock:
+            self.leased += 1
+            if self.idle:
+                self.hits += 1
+                return self.idle.pop()
+            self.misses += 1
+        try:
+            return self.create()
+        except BaseException:
+            with self.lock:
+                self.leased -= 1
+            raise
+
+    def release(self, mesh):
+        """Take an instance back once nothing is running inference on it"""
+        keep = False
+        try:
+            mesh.reset()
+            keep = True
+        except Exception as e:
+            logger.warning(f"FaceMesh reset failed, discarding instance: {e}")
+        with self.lock:
+            self.leased -= 1
+            if keep and len(self.idle) < self.size:
+                self.idle.append(mesh)
+                return
+        mesh.close()
+
+    def close(self):
+        with self.lock:
+            idle, self.idle = self.idle, []
+        for mesh in idle:
+            mesh.close()
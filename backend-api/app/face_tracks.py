@@ -0,0 +1,125 @@
+"""
+Multi-face tracking with batched EAR
+
+FaceMesh returns faces in no particular order, so each frame's faces are
+matched to the previous frame's tracks by nearest eye centroid, giving every
+person a stable track id and their own BlinkStateMachine. EARs for all faces
+in a frame are computed in one vectorized call over an (N, 2, 6, 2) array of
+eye landmarks instead of one norm per landmark pair per face.
+"""
+from typing import Dict, List
+
+import numpy as np
+
+from .blink_detection import BlinkStateMachine
+
+LEFT_EYE = [33, 160, 158, 133, 153, 144]
+RIGHT_EYE = [362, 385, 387, 263, 373, 380]
+EYE_LANDMARKS = LEFT_EYE + RIGHT_EYE
+
+DEFAULT_MAX_DISTANCE = 0.15  # Max centroid jump between frames, as a fraction of the frame
+DEFAULT_MAX_MISSED = 30      # Frames a track survives without a matching face (~1s)
+
+
+def eye_points(multi_face_landmarks, width: int, height: int) -> np.ndarray:
+    """Pixel eye landmarks of every face as an int array of shape (faces, 2 eyes, 6, 2)"""
+    coords = np.array([[(lm[i].x, lm[i].y) for i in EYE_LANDMARKS]
+                       for lm in (face.landmark for face in multi_face_landmarks)], dtype=np.float64)
+    coords *= (width, height)
+    return coords.astype(np.int32).reshape(len(coords), 2, 6, 2)
+
+
+def batch_ear(eyes: np.ndarray) -> np.ndarray:
+    """Eye aspect ratios for eye landmarks shaped (..., 6, 2) in one vectorized pass"""
+    eyes = np.asarray(eyes, dtype=np.float64)
+    vertical = np.linalg.norm(eyes[..., [1, 2], :] - eyes[..., [5, 4], :], axis=-1).sum(axis=-1)
+    horizontal = np.linalg.norm(eyes[..., 0, :] - eyes[..., 3, :], axis=-1)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return vertical / (2.0 * horizontal)
+
+
+class FaceTrack:
+    """One tracked face: a stable id, its last eye centroid and its own blink detector"""
+
+    def __init__(self, track_id: int, centroid: np.ndarray, detector: BlinkStateMachine):
+        self.id = track_id
+        self.centroid = centroid
+        self.detector = detector
+        self.missed = 0
+        self.ear = float("nan")
+
+
+class FaceTracker:
+    """Assigns per-frame faces to persistent tracks by nearest normalized eye centroid"""
+
+    def __init__(self, ear_thresh: float, consec_frames: int,
+                 max_distance: float = DEFAULT_MAX_DISTANCE, max_missed: int = DEFAULT_MAX_MISSED):
+        self.ear_thresh = ear_thresh
+        self.consec_frames = consec_frames
+        self.max_distance = max_distance
+        self.max_missed = max_missed
+        self.reset()
+
+    def reset(self):
+        self.tracks: Dict[int, FaceTrack] = {}
+        self.next_id = 0
+
+    def set_threshold(self, ear_thresh: float):
+        """Apply a new EAR threshold to every track, restarting their blink state"""
+        self.ear_thresh = ear_thresh
+        for track in self.tracks.values():
+            track.detector = BlinkStateMachine(ear_thresh, self.consec_frames)
+
+    def match(self, centroids: np.ndarray) -> List[int]:
+        """Track id for each face centroid (normalized 0..1 coordinates), creating tracks as needed"""
+        ids = [-1] * len(centroids)
+        live = list(self.tracks.values())
+        if live and len(centroids):
+            known = np.array([track.centroid for track in live])
+            dist = np.linalg.norm(known[:, None, :] - centroids[None, :, :], axis=-1)
+            # Greedy closest-pair assignment; both sides are at most max_num_faces long
+            for _ in range(min(dist.shape)):
+                t, f = np.unravel_index(np.argmin(dist), dist.shape)
+                if dist[t, f] > self.max_distance:
+                    break
+                ids[f] = live[t].id
+                dist[t, :] = np.inf
+                dist[:, f] = np.inf
+
+        matched = set()
+        for f, track_id in enumerate(ids):
+            if track_id < 0:
+                track_id = ids[f] = self.next_id
+                self.next_id += 1
+                self.tracks[track_id] = FaceTrack(
+                    track_id, centroids[f], BlinkStateMachine(self.ear_thresh, self.consec_frames))
+            track = self.tracks[track_id]
+            track.centroid = centroids[f]
+            track.missed = 0
+            matched.add(track_id)
+
+        for track_id in [t for t in self.tracks if t not in matched]:
+            track = self.tracks[track_id]
+            track.missed += 1
+            track.ear = float("nan")
+            if track.missed > self.max_missed:
+                del self.tracks[track_id]
+        return ids
+
+    def update(self, ids: List[int], ears: np.ndarray) -> np.ndarray:
+        """Feed each matched face's mean EAR to its track's detector; returns per-face flags"""
+        flags = np.zeros(len(ids), dtype=np.uint8)
+        for f, track_id in enumerate(ids):
+            track = self.tracks[track_id]
+            track.ear = float(ears[f])
+            flags[f] = track.detector.update(track.ear)
+        return flags
+
+    def summary(self) -> List[dict]:
+        """Per-face counts for frame_data, oldest track first"""
+        return [{
+            "id": track.id,
+            "blink_count": track.detector.blink_count,
+            "ear": None if track.ear != track.ear else round(track.ear, 4),
+            "visible": track.missed == 0,
+        } for track in sorted(self.tracks.values(), key=lambda t: t.id)]
@@ -0,0 +1,156 @@
+"""
+Latest-frame camera grabber
+
+Drains the device on a background thread into a triple buffer; the tracker only takes the newest frame.
+"""
+import asyncio
+import logging
+import threading
+import time
+from typing import Optional, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+
+class LatestFrameGrabber:
+    """Reads a capture device continuously on a daemon thread, exposing only the newest frame"""
+
+    def __init__(self, cap, fps: float = 30.0):
+        self.cap = cap
+        # Real cameras block in read() until the next frame; this only paces sources
+        # that return immediately (video files, fakes) so they don't spin a core
+        self.min_interval = 1.0 / fps if fps else 0.0
+        self.buffers = []
+        self.back, self.middle, self.front = 0, 1, 2
+        self.captured_at = [0.0, 0.0, 0.0]
+        self.fresh = False
+        self.frames = 0    # Frames read from the device
+        self.skipped = 0   # Frames overwritten before the consumer took them
+        self.failed = False
+        self.running = False
+        self.lock = threading.Lock()
+        self.thread: Optional[threading.Thread] = None
+        self.exited = threading.Event()
+        self.release_when_done = False
+        self.loop: Optional[asyncio.AbstractEventLoop] = None
+        self.ready: Optional[asyncio.Event] = None
+
+    @property
+    def shape(self) -> Tuple[int, ...]:
+        return self.buffers[self.middle].shape
+
+    def start(self) -> bool:
+        """Read one frame to size the buffers, then start draining; call from the event loop"""
+        ret, first = self.cap.read()
+        if not ret:
+            return False
+        self.buffers = [first, np.empty_like(first), np.empty_like(first)]
+        self.back, self.middle, self.front = 1, 0, 2
+        self.captured_at[self.middle] = time.monotonic()
+        self.fresh = True
+        self.frames = 1
+        self.loop = asyncio.get_running_loop()
+        self.ready = asyncio.Event()
+        self.ready.set()
+        self.running = True
+        self.exited.clear()
+        self.thread = threading.Thread(target=self._run, name="frame-grabber", daemon=True)
+        self.thread.start()
+        return True
+
+    def _run(self):
+        try:
+            self._drain()
+        finally:
+            with self.lock:
+                self.exited.set()
+                release = self.release_when_done
+            if release:
+                self.cap.release()
+
+    def _drain(self):
+        while self.running:
+            started = time.monotonic()
+            buffer = self.buffers[self.back]
+            ret, frame = self.cap.read(buffer)
+            if not self.running:
+                break
+            if not ret:
+                logger.error("📷 Camera read failed, stopping frame grabber")
+                self.failed = True
+                self._notify()
+                break
+            with self.lock:
+                # A source may hand back its own array (e.g. after a size change); keep that one
+                self.buffers[self.back] = frame
+                self.captured_at[self.back] = time.monotonic()
+                self.back, self.middle = self.middle, self.back
+                if self.fresh:
+                    self.skipped += 1
+                self.fresh = True
+                self.frames += 1
+            self._notify()
+            remaining = self.min_interval - (time.monotonic() - started)
+            if remaining > 0:
+                time.sleep(remaining)
+
+    def _notify(self):
+        try:
+            self.loop.call_soon_threadsafe(self.ready.set)
+        except RuntimeError:
+            self.running = False  # Event loop closed underneath us
+
+    def take(self) -> Optional[Tuple[np.ndarray, float]]:
+        """(frame, capture time) of the newest frame not taken yet, or None if there is none
+
+        The frame stays valid until the next take().
+        """
+        with self.lock:
+            if not self.fresh:
+                return None
+            self.front, self.middle = self.middle, self.front
+            self.fresh = False
+            return self.buffers[self.front], self.captured_at[self.front]
+
+    async def next_frame(self, timeout: float = 2.0) -> Optional[Tuple[np.ndarray, float]]:
+        """Wait for a frame newer than the last one taken; None if the camera failed or stalled"""
+        while True:
+            taken = self.take()
+            if taken is not None:
+                return taken
+            if self.failed or not self.running:
+                return None
+            self.ready.clear()
+            # asyncio.wait rather than wait_for: before 3.12, wait_for can swallow a
+            # cancellation that lands as the event fires, leaving the session running
+            waiter = asyncio.ensure_future(self.ready.wait())
+            try:
+                done, _ = await asyncio.wait({waiter}, timeout=timeout)
+            finally:
+                waiter.cancel()
+            if not done:
+                logger.error("📷 No frame from camera within timeout")
+                return None
+
+    def stop(self, timeout: float = 1.0) -> bool:
+        """Stop draining and wait up to `timeout` for an in-flight read; off the event loop unless 0
+
+        True once the thread has exited and the capture can be released or reused;
+        False if a read is still blocked, see release_on_exit().
+        """
+        self.running = False
+        if self.loop is not None:
+            self._notify()  # Wake a pending next_frame()
+        if self.thread is not None and self.thread is not threading.current_thread():
+            self.thread.join(timeout=timeout)
+        return self.thread is None or self.exited.is_set()
+
+    def release_on_exit(self):
+        """Release the capture once the thread is out of read(); now if it already is"""
+        with self.lock:
+            release = self.thread is None or self.exited.is_set()
+            self.release_when_done = not release
+        if release:
+            self.cap.release()
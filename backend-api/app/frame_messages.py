@@ -0,0 +1,64 @@
+"""
+Change-driven frame_data messages and their JSON encoding
+
+The tracker used to send a full frame_data message for every camera frame,
+even when nothing a client shows had changed. FrameDataFilter lets a message
+through only when its blink state changed, when it carries a video frame, or
+as a heartbeat once per HEARTBEAT_INTERVAL so clients (and the stored blink
+history) still see a live session. Every message that is sent is complete, so
+clients never have to merge partial updates.
+
+dumps() serializes WebSocket messages with orjson when it is installed and
+falls back to the standard library otherwise.
+"""
+import json
+from typing import Optional
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+HEARTBEAT_INTERVAL = 1.0  # Seconds between frame_data messages when nothing changes
+
+
+def dumps(message) -> str:
+    """Serialize a message for websocket.send_text(); NumPy scalars are allowed"""
+    if orjson is not None:
+        return orjson.dumps(message, option=orjson.OPT_SERIALIZE_NUMPY).decode("utf-8")
+    return json.dumps(message, default=lambda value: value.item())
+
+
+def frame_state(message: dict) -> tuple:
+    """The parts of a frame_data message whose change is worth sending; live EARs are left out"""
+    return (
+        message["blink_count"],
+        message["frame_counter"],
+        message["ear_threshold"],
+        message["calibrating"],
+        tuple((face["id"], face["blink_count"], face["visible"]) for face in message.get("faces", ())),
+    )
+
+
+class FrameDataFilter:
+    """Decides which frame_data messages to send: on change, with video, or as a heartbeat"""
+
+    def __init__(self, heartbeat: float = HEARTBEAT_INTERVAL):
+        self.heartbeat = heartbeat
+        self.reset()
+
+    def reset(self):
+        self.last_state: Optional[tuple] = None
+        self.last_sent = float("-inf")
+        self.sent = 0
+        self.suppressed = 0
+
+    def should_send(self, message: dict, now: float, video: bool = False) -> bool:
+        state = frame_state(message)
+        if video or state != self.last_state or now - self.last_sent >= self.heartbeat:
+            self.last_state = state
+            self.last_sent = now
+            self.sent += 1
+            return True
+        self.suppressed += 1
+        return False
@@ -0,0 +1,104 @@
+"""
+Pipelined inference and render + encode stages of the tracker's frame loop
+
+Messages are delivered in submission order as soon as each and everything before it is ready.
+"""
+import asyncio
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from typing import Awaitable, Callable, Dict, Optional, Set
+
+from .cpu import available_cores
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_DEPTH = 2  # Frames allowed in render/encode at once before inference waits
+
+
+class OrderedSender:
+    """Sends messages strictly in sequence-number order, whatever order they become ready in"""
+
+    def __init__(self, send: Callable[[dict], Awaitable[None]]):
+        self.send = send
+        self.next_seq = 0
+        self.ready: Dict[int, dict] = {}
+        self.lock = asyncio.Lock()
+        self.error: Optional[Exception] = None
+
+    async def put(self, seq: int, message: dict):
+        self.ready[seq] = message
+        async with self.lock:
+            while self.error is None and self.next_seq in self.ready:
+                message = self.ready.pop(self.next_seq)
+                self.next_seq += 1
+                try:
+                    await self.send(message)
+                except Exception as e:
+                    self.error = e
+
+
+class FramePipeline:
+    """Inference and render/encode worker threads plus in-order delivery of their messages"""
+
+    def __init__(self, send: Callable[[dict], Awaitable[None]], depth: int = DEFAULT_DEPTH,
+                 threaded: Optional[bool] = None):
+        self.sender = OrderedSender(send)
+        self.depth = depth
+        self.threaded = len(available_cores()) > 1 if threaded is None else threaded
+        # One thread per stage: FaceMesh must not run concurrently with itself
+        self.infer_executor = self.executor = None
+        if self.threaded:
+            self.infer_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="frame-infer")
+            self.executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="frame-encode")
+        self.in_flight: Set[asyncio.Task] = set()
+        self.next_seq = 0
+
+    @property
+    def error(self) -> Optional[Exception]:
+        """First exception raised by the send callback; the session should stop"""
+        return self.sender.error
+
+    async def infer(self, fn: Callable, *args):
+        """Run an inference call on the inference thread"""
+        if not self.threaded:
+            return fn(*args)
+        return await asyncio.get_running_loop().run_in_executor(self.infer_executor, fn, *args)
+
+    async def submit(self, message: dict, render: Optional[Callable[[], str]] = None):
+        """Queue a message; `render` runs on the worker thread and its result becomes video_frame"""
+        # Bounded: a slow encoder throttles inference instead of queueing frames
+        while len(self.in_flight) >= self.depth:
+            await asyncio.wait(self.in_flight, return_when=asyncio.FIRST_COMPLETED)
+        seq = self.next_seq
+        self.next_seq += 1
+        if not self.threaded:
+            await self._run(seq, message, render)
+            return
+        task = asyncio.create_task(self._run(seq, message, render))
+        self.in_flight.add(task)
+        task.add_done_callback(self.in_flight.discard)
+
+    async def _run(self, seq: int, message: dict, render: Optional[Callable[[], str]]):
+        if render is not None:
+            try:
+                if self.executor is None:
+                    message["video_frame"] = render()
+                else:
+                    message["video_frame"] = await asyncio.get_running_loop().run_in_executor(self.executor, render)
+            except Exception as e:
+                logger.error(f"Error encoding frame: {e}")
+        await self.sender.put(seq, message)
+
+    async def drain(self):
+        """Wait until everything submitted so far has been sent"""
+        if self.in_flight:
+            await asyncio.gather(*self.in_flight, return_exceptions=True)
+
+    async def close(self):
+        """Drop unsent messages and wait for in-progress stages to finish with their frames"""
+        for task in self.in_flight:
+            task.cancel()
+        if self.threaded:
+            # A stage may be mid-FaceMesh or mid-encode; wait for it without blocking the event loop
+            await asyncio.to_thread(self.infer_executor.shutdown, wait=True, cancel_futures=True)
+            await asyncio.to_thread(self.executor.shutdown, wait=True, cancel_futures=True)
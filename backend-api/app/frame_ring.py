@@ -0,0 +1,149 @@
+"""
+Shared-memory ring buffer of preallocated video frame slots
+
+Capture, inference and encode stages hand each other slot indices instead of
+pickling or copying 640x480x3 arrays. The whole ring lives in one
+multiprocessing.shared_memory block, so a stage in another process can attach
+to it by name and see the same pixels.
+
+Layout of the block (all int64 header fields, then 64-byte aligned pixels):
+
+    [write_seq][reader cursor 0..R-1][slot seq 0..S-1][pixel slots]
+
+- write_seq is the sequence number the next published frame will get
+- each reader cursor is the next sequence that reader has not released yet
+- slot seq records which sequence a slot currently holds (-1 when empty)
+
+There is a single writer. The writer may only claim a slot once every reader
+has released the frame that previously occupied it, so a slow stage makes the
+writer drop frames instead of overwriting pixels still in use.
+
+Frame views handed out by frame() point straight into the mapping. close()
+unlinks the block right away but only unmaps it once every such view is gone,
+so a stage still holding a frame never reads freed memory.
+"""
+import weakref
+from multiprocessing import shared_memory
+from typing import Optional, Tuple
+
+import numpy as np
+
+_ALIGN = 64
+
+
+class FrameRing:
+    """Fixed pool of frame slots in shared memory with sequence numbers"""
+
+    def __init__(self, slots: int = 4, shape: Tuple[int, int, int] = (480, 640, 3),
+                 readers: int = 1, name: Optional[str] = None, create: bool = True):
+        if slots < 2:
+            raise ValueError("FrameRing needs at least 2 slots")
+        self.slots = slots
+        self.shape = tuple(shape)
+        self.readers = readers
+
+        header_words = 1 + readers + slots
+        self._pixels_offset = -(-header_words * 8 // _ALIGN) * _ALIGN
+        frame_bytes = int(np.prod(self.shape))
+        size = self._pixels_offset + frame_bytes * slots
+
+        self.shm = shared_memory.SharedMemory(name=name, create=create, size=size if create else 0)
+        self._owner = create
+        # Live frame() views by id; the mapping must outlive all of them
+        self._views = weakref.WeakValueDictionary()
+
+        header = np.ndarray((header_words,), dtype=np.int64, buffer=self.shm.buf)
+        self._write_seq = header[0:1]
+        self._cursors = header[1:1 + readers]
+        self._slot_seq = header[1 + readers:]
+        self._frames = np.ndarray((slots,) + self.shape, dtype=np.uint8,
+                                  buffer=self.shm.buf, offset=self._pixels_offset)
+        if create:
+            header[:] = 0
+            self._slot_seq[:] = -1
+
+    @property
+    def name(self) -> str:
+        return self.shm.name
+
+    @classmethod
+    def attach(cls, name: str, slots: int, shape: Tuple[int, int, int], readers: int = 1) -> "FrameRing":
+        """Map an existing ring created by another stage or process"""
+        return cls(slots=slots, shape=shape, readers=readers, name=name, create=False)
+
+    # Writer side
+
+    def claim(self) -> Optional[int]:
+        """Slot index for the next frame, or None when the slowest reader is a full ring behind"""
+        seq = int(self._write_seq[0])
+        if seq - int(self._cursors.min()) >= self.slots:
+            return None
+        return seq % self.slots
+
+    def publish(self, slot: int) -> int:
+        """Mark the claimed slot as holding a complete frame and return its sequence number"""
+        seq = int(self._write_seq[0])
+        self._slot_seq[slot] = seq
+        self._write_seq[0] = seq + 1
+        return seq
+
+    # Reader side
+
+    def next_for(self, reader: int) -> Optional[Tuple[int, int]]:
+        """(seq, slot) of the oldest frame this reader hasn't released, or None if caught up"""
+        seq = int(self._cursors[reader])
+        if seq >= int(self._write_seq[0]):
+            return None
+        return seq, seq % self.slots
+
+    def latest_for(self, reader: int) -> Optional[Tuple[int, int, int]]:
+        """(seq, slot, skipped) of the newest frame, releasing any older ones this reader never saw"""
+        newest = int(self._write_seq[0]) - 1
+        cursor = int(self._cursors[reader])
+        if newest < cursor:
+            return None
+        self._cursors[reader] = newest
+        return newest, newest % self.slots, newest - cursor
+
+    def release(self, reader: int, seq: int):
+        """Hand the slot holding `seq` (and everything before it) back to the writer"""
+        if seq + 1 > int(self._cursors[reader]):
+            self._cursors[reader] = seq + 1
+
+    # Shared
+
+    def frame(self, slot: int) -> np.ndarray:
+        """Writable view of a slot's pixels (no copy)"""
+        view = self._frames[slot]
+        self._views[id(view)] = view
+        return view
+
+    def sequence(self, slot: int) -> int:
+        return int(self._slot_seq[slot])
+
+    def pending(self, reader: int) -> int:
+        """Frames published but not yet released by this reader"""
+        return int(self._write_seq[0]) - int(self._cursors[reader])
+
+    def close(self):
+        """Unlink the block; unmap it now, or once the last frame view still held elsewhere is gone"""
+        live = list(self._views.values())
+        self._views = weakref.WeakValueDictionary()
+        self._write_seq = self._cursors = self._slot_seq = self._frames = None
+        if self._owner:
+            self.shm.unlink()
+            self._owner = False
+        if not live:
+            self.shm.close()
+            return
+        # The finalizers keep the SharedMemory object (and its mapping) alive until then
+        remaining = [len(live)]
+        shm = self.shm
+
+        def view_gone():
+            remaining[0] -= 1
+            if remaining[0] == 0:
+                shm.close()
+
+        for view in live:
+            weakref.finalize(view, view_gone)
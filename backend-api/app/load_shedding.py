@@ -0,0 +1,93 @@
+"""
+Global load shedding when the node falls behind
+
+Two signals say the node is overloaded regardless of which client causes it:
+
+- event-loop lag: how late a periodic 100 ms sleep wakes up, sampled by a
+  task the app starts at startup. Blocking work on the loop shows up here.
+- DB pool wait: how long a request waits to check out a database connection,
+  sampled in get_db. A saturated pool or database shows up here.
+
+Each is smoothed (EWMA). While either is over its threshold, HTTP requests
+other than the health check get a fast 503 with Retry-After instead of
+queueing behind the backlog. A signal that hasn't been sampled for STALE
+seconds stops counting, so shedding ends once the backlog is gone even if
+shedding stopped the requests that would have sampled it.
+"""
+import asyncio
+import logging
+import time
+
+from fastapi.responses import JSONResponse
+
+logger = logging.getLogger(__name__)
+
+LAG_INTERVAL = 0.1  # Seconds between event-loop lag samples
+ALPHA = 0.3         # EWMA weight of a new sample
+STALE = 2.0         # Seconds after which an unsampled signal no longer counts
+EXEMPT_PATHS = {"/"}
+
+
+class Signal:
+    """Smoothed seconds-valued measurement"""
+
+    def __init__(self):
+        self.value = 0.0
+        self.sampled_at = 0.0
+
+    def add(self, seconds: float, now: float):
+        self.value = seconds if self.sampled_at == 0.0 else ALPHA * seconds + (1 - ALPHA) * self.value
+        self.sampled_at = now
+
+    def over(self, threshold: float, now: float) -> bool:
+        return threshold > 0 and now - self.sampled_at < STALE and self.value > threshold
+
+
+class LoadMonitor:
+    def __init__(self, max_loop_lag: float, max_db_wait: float):
+        self.max_loop_lag = max_loop_lag
+        self.max_db_wait = max_db_wait
+        self.loop_lag = Signal()
+        self.db_wait = Signal()
+        self.shedding = False
+        self.shed = 0  # Requests answered 503, for monitoring
+
+    def add_db_wait(self, seconds: float):
+        self.db_wait.add(seconds, time.monotonic())
+
+    def overloaded(self) -> bool:
+        now = time.monotonic()
+        overloaded = self.loop_lag.over(self.max_loop_lag, now) or self.db_wait.over(self.max_db_wait, now)
+        if overloaded != self.shedding:
+            self.shedding = overloaded
+            if overloaded:
+                logger.warning(f"🚦 Shedding load: event-loop lag {self.loop_lag.value * 1000:.0f} ms, "
+                               f"DB pool wait {self.db_wait.value * 1000:.0f} ms")
+            else:
+                logger.info(f"🚦 Load back to normal after shedding {self.shed} request(s)")
+        return overloaded
+
+    async def watch_loop_lag(self):
+        """Sample how late the event loop wakes from a sleep, until cancelled"""
+        loop = asyncio.get_running_loop()
+        while True:
+            started = loop.time()
+            await asyncio.sleep(LAG_INTERVAL)
+            self.loop_lag.add(max(0.0, loop.time() - started - LAG_INTERVAL), time.monotonic())
+
+
+class LoadSheddingMiddleware:
+    """ASGI middleware answering HTTP requests 503 while the monitor reports overload"""
+
+    def __init__(self, app, monitor: LoadMonitor):
+        self.app = app
+        self.monitor = monitor
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "http" and scope["path"] not in EXEMPT_PATHS and self.monitor.overloaded():
+            self.monitor.shed += 1
+            response = JSONResponse(status_code=503, content={"detail": "Server overloaded, retry shortly"},
+                                    headers={"Retry-After": "1"})
+            await response(scope, receive, send)
+            return
+        await self.app(scope, receive, send)
@@ -1,25 +1,83 @@
 """
 Main FastAPI app for Wellness at Work backend.
 """
-from fastapi import FastAPI, Depends, HTTPException, Request, WebSocket, WebSocketDisconnect
+from fastapi import FastAPI, Depends, HTTPException, Query, Request, Response, WebSocket, WebSocketDisconnect
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.middleware.gzip import GZipMiddleware
 from fastapi.exceptions import RequestValidationError
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, StreamingResponse
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
 from fastapi.security import OAuth2PasswordRequestForm
-from . import models, schemas, database, crud, auth
+from pydantic import ValidationError
+from . import models, schemas, crud, auth, config, conditional
+from .blink_feed import blink_feed, blink_events
+from .blink_series import downsample
+from .blink_listing import blink_listing_json
+from .frame_messages import dumps
+from .load_shedding import LoadMonitor, LoadSheddingMiddleware
+from .rate_limit import RateLimiter
+from .session_hub import SessionHub
 from .database import SessionLocal, engine
-from .eye_tracker_service import eye_tracker_service
-from typing import List
+from typing import Dict, List, Optional, Tuple
+from datetime import datetime
+from contextlib import asynccontextmanager
 import logging
 import json
 import asyncio
+import time
 
 # Set up logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-app = FastAPI()
+# With a standalone vision worker, API workers only relay its results and can
+# be scaled with `uvicorn --workers N`
+# eye_tracker_service serves the default camera; device_trackers holds any others
+if config.VISION_WORKER_ADDRESS:
+    from .devices import remote_trackers
+    device_trackers = remote_trackers(config.VISION_WORKER_ADDRESS, config.CAMERA_DEVICES)
+    eye_tracker_service = device_trackers.pop(config.CAMERA_DEVICES[0])
+else:
+    from .eye_tracker_service import eye_tracker_service, EyeTrackerService, face_mesh_pool
+    device_trackers = {device: EyeTrackerService(device=device) for device in config.CAMERA_DEVICES[1:]}
+
+
+def tracker_for(device: Optional[int] = None):
+    """Tracker for a camera on this node (the default camera if None), or None if there is no such camera"""
+    if device is None or device == config.CAMERA_DEVICES[0]:
+        return eye_tracker_service
+    return device_trackers.get(device)
+
+
+def init_db():
+    """Create any missing database tables."""
+    models.Base.metadata.create_all(bind=engine)
+
+
+# Per-client request budgets and node-wide overload detection
+rate_limiter = RateLimiter(enabled=config.RATE_LIMITS_ENABLED)
+load_monitor = LoadMonitor(config.SHED_LOOP_LAG_MS / 1000.0, config.SHED_DB_WAIT_MS / 1000.0)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Schema creation runs at startup rather than as an import side effect
+    init_db()
+    lag_watch = asyncio.create_task(load_monitor.watch_loop_lag())
+    if config.FACE_MESH_PRELOAD and not config.VISION_WORKER_ADDRESS:
+        # Sessions on this process start on warm FaceMesh graphs; loads the vision stack off the loop
+        asyncio.get_running_loop().run_in_executor(None, face_mesh_pool.warm)
+    yield
+    lag_watch.cancel()
+    if not config.VISION_WORKER_ADDRESS:
+        # Cameras kept open between sessions go off with the server
+        for tracker in [eye_tracker_service, *device_trackers.values()]:
+            if isinstance(tracker, EyeTrackerService):
+                tracker.camera.close()
+
+
+app = FastAPI(lifespan=lifespan)
 
 # Custom validation error handler
 @app.exception_handler(RequestValidationError)
@@ -32,6 +90,9 @@ async def validation_exception_handler(request: Request, exc: RequestValidationE
         content={"detail": exc.errors(), "body": body.decode() if body else ""}
     )
 
+# Inside CORS below, so 503s still carry CORS headers
+app.add_middleware(LoadSheddingMiddleware, monitor=load_monitor)
+
 origins = [
     "http://localhost",
     "http://localhost:3000",
@@ -46,11 +107,16 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-models.Base.metadata.create_all(bind=engine)
+# Large JSON responses (blink histories) are gzipped; SSE streams and small responses are left alone
+app.add_middleware(GZipMiddleware, minimum_size=config.GZIP_MINIMUM_SIZE, compresslevel=config.GZIP_LEVEL)
 
 def get_db():
     db = SessionLocal()
     try:
+        # Check out the connection now to measure the pool wait for load shedding
+        started = time.monotonic()
+        db.connection()
+        load_monitor.add_db_wait(time.monotonic() - started)
         yield db
     finally:
         db.close()
@@ -60,7 +126,9 @@ def read_root():
     """Health check endpoint."""
     return {"msg": "Wellness at Work API is running."}
 
-@app.post("/register", response_model=schemas.UserOut)
+
+@app.post("/register", response_model=schemas.UserOut,
+          dependencies=[Depends(rate_limiter.limit("register", config.LOGIN_RATE, config.LOGIN_BURST))])
 def register(user: schemas.UserCreate, db: Session = Depends(get_db)):
     """Register a new user."""
     db_user = crud.get_user_by_email(db, email=user.email)
@@ -68,7 +136,9 @@ def register(user: schemas.UserCreate, db: Session = Depends(get_db)):
         raise HTTPException(status_code=400, detail="Email already registered")
     return crud.create_user(db, user)
 
-@app.post("/token", response_model=schemas.Token)
+
+@app.post("/token", response_model=schemas.Token,
+          dependencies=[Depends(rate_limiter.limit("token", config.LOGIN_RATE, config.LOGIN_BURST))])
 def login(form_data: OAuth2PasswordRequestForm = Depends(), db: Session = Depends(get_db)):
     """Login and get JWT token."""
     user = auth.authenticate_user(db, form_data.username, form_data.password)
@@ -77,162 +147,304 @@ def login(form_data: OAuth2PasswordRequestForm = Depends(), db: Session = Depend
     access_token = auth.create_access_token(data={"sub": user.email})
     return {"access_token": access_token, "token_type": "bearer"}
 
-@app.post("/blinks/upload", response_model=schemas.BlinkDataOut)
+
+@app.post("/blinks/upload", response_model=schemas.BlinkDataOut,
+          dependencies=[Depends(rate_limiter.limit("upload", config.UPLOAD_RATE, config.UPLOAD_BURST, per="user"))])
 def upload_blink(blink: schemas.BlinkDataCreate, current_user: models.User = Depends(auth.get_current_user), db: Session = Depends(get_db)):
     """Upload blink data for the current user."""
     logger.info(f"Received blink data: {blink}")
     logger.info(f"User: {current_user.email}")
-    return crud.create_blink_data(db, user_id=current_user.id, blink=blink)
+    db_blink = crud.create_blink_data(db, user_id=current_user.id, blink=blink)
+    blink_feed.notify(current_user.id)
+    return db_blink
 
 @app.get("/blinks/user", response_model=List[schemas.BlinkDataOut])
-def get_user_blinks(current_user: models.User = Depends(auth.get_current_user), db: Session = Depends(get_db)):
-    """Get all blink data for the current user."""
-    return crud.get_blinks_for_user(db, user_id=current_user.id)
+def get_user_blinks(request: Request, current_user: models.User = Depends(auth.get_current_user),
+                    db: Session = Depends(get_db)):
+    """Get all blink data for the current user; 304 if the client's copy is current."""
+    validators = conditional.blink_validators(db, current_user.id)
+    if conditional.is_not_modified(request, validators):
+        return conditional.not_modified(validators)
+    # Encoded straight from column tuples; response_model above only documents the shape
+    rows = crud.iter_blink_rows_for_user(db, current_user.id)
+    return Response(blink_listing_json(rows, current_user.id), media_type="application/json",
+                    headers=validators.headers())
 
-@app.websocket("/ws/eye-tracker/{token}")
-async def websocket_eye_tracker(websocket: WebSocket, token: str, db: Session = Depends(get_db)):
-    """WebSocket endpoint for real-time eye tracking"""
-    await websocket.accept()
-    
+
+# Changes returned per /sync call; clients page through larger gaps with has_more
+SYNC_PAGE_SIZE = 5000
+
+
+@app.post("/sync", response_model=schemas.SyncResponse,
+          dependencies=[Depends(rate_limiter.limit("sync", config.SYNC_RATE, config.SYNC_BURST, per="user"))])
+def sync_blinks(sync: schemas.SyncRequest, current_user: models.User = Depends(auth.get_current_user),
+                db: Session = Depends(get_db)):
+    """Push the client's pending records and pull the rows stored since its cursor, in one round trip."""
     try:
-        # Verify JWT token
-        try:
-            payload = auth.verify_token(token)
-            user_email = payload.get("sub")
-            if not user_email:
-                await websocket.send_text(json.dumps({"error": "Invalid token"}))
-                return
-                
-            user = crud.get_user_by_email(db, email=user_email)
-            if not user:
-                await websocket.send_text(json.dumps({"error": "User not found"}))
-                return
-                
-        except Exception as e:
-            await websocket.send_text(json.dumps({"error": "Authentication failed"}))
+        accepted = crud.push_blink_records(db, current_user.id, sync.records)
+    except IntegrityError:
+        # A concurrent sync stored some of the same client_ids first; retrying accepts them
+        db.rollback()
+        raise HTTPException(status_code=409, detail="Records were stored by a concurrent sync, retry")
+    if sync.records:
+        blink_feed.notify(current_user.id)
+    changes = crud.get_blinks_after(db, current_user.id, sync.cursor, limit=SYNC_PAGE_SIZE + 1)
+    has_more = len(changes) > SYNC_PAGE_SIZE
+    changes = changes[:SYNC_PAGE_SIZE]
+    return {
+        "cursor": changes[-1].id if changes else sync.cursor,
+        "accepted": accepted,
+        "changes": changes,
+        "has_more": has_more,
+    }
+
+
+@app.get("/blinks/user/series", response_model=schemas.BlinkSeriesOut)
+def get_user_blink_series(
+    request: Request,
+    response: Response,
+    points: int = Query(500, ge=3, le=5000),
+    start: Optional[datetime] = Query(None, alias="from"),
+    end: Optional[datetime] = Query(None, alias="to"),
+    current_user: models.User = Depends(auth.get_current_user),
+    db: Session = Depends(get_db),
+):
+    """The current user's blink_count over time, downsampled to at most `points` with LTTB; 304 if unchanged."""
+    if start is not None and end is not None and start > end:
+        raise HTTPException(status_code=400, detail="`from` must not be after `to`")
+    validators = conditional.blink_validators(db, current_user.id)
+    if conditional.is_not_modified(request, validators):
+        return conditional.not_modified(validators)
+    response.headers.update(validators.headers())
+    # Only rows up to the settled cursor: the live stream sends the rest, and series points have no id to dedupe on
+    rows = crud.get_blink_series(db, current_user.id, start, end, max_id=validators.blink_id)
+    timestamps, blink_counts = downsample(rows, points)
+    return {"samples": len(rows), "cursor": validators.blink_id, "timestamps": timestamps, "blink_counts": blink_counts}
+
+
+@app.get("/blinks/user/stream")
+def stream_user_blinks(
+    request: Request,
+    after: Optional[int] = Query(None, ge=0),
+    current_user: models.User = Depends(auth.get_current_user_from_header_or_query),
+):
+    """Server-Sent Events stream of the current user's new blink rows and per-minute rollup deltas.
+
+    Resumes after `?after=<id>` or the Last-Event-ID header; without either, only rows stored from now on are sent.
+    """
+    cursor = after
+    if cursor is None and request.headers.get("last-event-id", "").isdigit():
+        cursor = int(request.headers["last-event-id"])
+    return StreamingResponse(
+        blink_events(current_user.id, cursor),
+        media_type="text/event-stream",
+        # Keep proxies from buffering the stream
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+def blink_data_sink(user_id: int, device: int = 0):
+    """Tracker callback step that stores a session's blink data, calibration and summary, once per session"""
+    async def persist(message: dict):
+        kind = message.get("type")
+        if kind not in ("frame_data", "calibration_complete", "session_summary"):
             return
-        
-        logger.info(f"👤 Eye tracker WebSocket connected for user: {user.email}")
-        
-        # Callback function to send blink data
-        async def send_blink_data(blink_data):
-            try:
-                # Save to database
+        db = SessionLocal()
+        try:
+            if kind == "calibration_complete":
+                # Reuse this user's threshold in later sessions instead of recalibrating
+                crud.set_user_ear_threshold(db, user_id, message["ear_threshold"])
+            elif kind == "session_summary":
+                crud.create_tracking_session(db, user_id, device, message)
+            else:
                 blink_create = schemas.BlinkDataCreate(
-                    blink_count=blink_data["blink_count"],
+                    blink_count=message["blink_count"],
                     timestamp=None  # Will be set to India time in crud
                 )
-                crud.create_blink_data(db, user_id=user.id, blink=blink_create)
-                
-                # Only send to WebSocket client if connection is still open
-                try:
-                    if websocket.client_state.name == "CONNECTED":
-                        await websocket.send_text(json.dumps(blink_data))
-                        logger.info(f"📊 Sent blink data: {blink_data}")
-                    else:
-                        logger.info(f"📊 WebSocket closed, saved blink data to DB only: {blink_data}")
-                except:
-                    # WebSocket is closed, just save to database
-                    logger.info(f"📊 WebSocket unavailable, saved blink data to DB only: {blink_data}")
-                
-            except Exception as e:
-                logger.error(f"Error processing blink data: {e}")
-        
-        # Start eye tracking
+                crud.create_blink_data(db, user_id=user_id, blink=blink_create)
+                blink_feed.notify(user_id)
+        finally:
+            db.close()
+    return persist
+
+
+# One running session per (camera, user); further connections from that user watch it
+session_hubs: Dict[Tuple[int, int], SessionHub] = {}
+
+
+@app.websocket("/ws/eye-tracker/{token}")
+async def websocket_eye_tracker(websocket: WebSocket, token: str, device: Optional[int] = None,
+                                watch: bool = False, video: bool = True, db: Session = Depends(get_db)):
+    """WebSocket endpoint for real-time eye tracking on the default camera or `?device=N`
+
+    A connection from a user whose session is already running joins it instead of
+    restarting the camera. `?watch=true` only joins; `?video=false` leaves out video frames.
+    """
+    await websocket.accept()
+    tracker = tracker_for(device)
+    if tracker is None:
+        await websocket.send_text(dumps({"error": f"Unknown camera device {device}"}))
+        return
+
+    # Verify JWT token
+    try:
+        payload = auth.verify_token(token)
+        user_email = payload.get("sub")
+        if not user_email:
+            await websocket.send_text(dumps({"error": "Invalid token"}))
+            return
+
+        user = crud.get_user_by_email(db, email=user_email)
+        if not user:
+            await websocket.send_text(dumps({"error": "User not found"}))
+            return
+
+    except Exception:
+        await websocket.send_text(dumps({"error": "Authentication failed"}))
+        return
+
+    logger.info(f"👤 Eye tracker WebSocket connected for user: {user.email}")
+
+    key = (config.CAMERA_DEVICES[0] if device is None else device, user.id)
+    hub = session_hubs.get(key)
+    if hub is not None and hub.stopping:
+        # The previous session is winding down; let it release the camera first
+        await hub.stopped()
+    if watch and (hub is None or not hub.running):
+        await websocket.send_text(dumps({"error": "No tracking session to watch"}))
+        return
+    if hub is None or hub.ended:
+        hub = session_hubs[key] = SessionHub(tracker, sink=blink_data_sink(user.id, key[0]))
+    subscriber = hub.subscribe(websocket.send_text, video=video)
+    if hub.running:
+        logger.info(f"👀 Joined running eye tracking session for user: {user.email} "
+                    f"({len(hub.subscribers)} connections)")
+    else:
         logger.info(f"🎬 Starting eye tracking for user: {user.email}")
-        
-        # Create a task for eye tracking
-        tracking_task = asyncio.create_task(
-            eye_tracker_service.start_tracking(send_blink_data)
-        )
-        
-        # Create a task for listening to messages
-        async def message_listener():
-            try:
-                while True:
-                    message = await websocket.receive_text()
-                    try:
-                        data = json.loads(message)
-                        if data.get("type") == "stop_command":
-                            logger.info(f"🛑 Received stop command from user: {user.email}")
-                            eye_tracker_service.stop_tracking()
-                            await websocket.send_text(json.dumps({
-                                "type": "stop_confirmed",
-                                "message": "Eye tracker stopped successfully"
-                            }))
-                            return  # Exit the listener
-                    except json.JSONDecodeError:
-                        logger.warning(f"Invalid JSON message received: {message}")
-                    except Exception as e:
-                        logger.error(f"Error processing message: {e}")
-            except WebSocketDisconnect:
-                logger.info(f"👋 WebSocket disconnected for user: {user.email}")
-            except Exception as e:
-                logger.error(f"WebSocket message listener error: {e}")
-        
-        # Start message listener task
-        message_task = asyncio.create_task(message_listener())
-        
-        # Wait for either tracking to complete or message listener to stop
+        hub.start(user_id=user.id, ear_threshold=user.ear_threshold)
+
+    # Create a task for listening to messages
+    async def message_listener():
         try:
-            done, pending = await asyncio.wait(
-                [tracking_task, message_task],
-                return_when=asyncio.FIRST_COMPLETED
-            )
-            
-            # Cancel any pending tasks
-            for task in pending:
-                task.cancel()
+            while True:
+                message = await websocket.receive_text()
                 try:
-                    await task
-                except asyncio.CancelledError:
-                    pass
-                    
+                    data = json.loads(message)
+                    if data.get("type") == "stop_command":
+                        logger.info(f"🛑 Received stop command from user: {user.email}")
+                        await websocket.send_text(dumps({
+                            "type": "stop_confirmed",
+                            "message": "Eye tracker stopped successfully"
+                        }))
+                        # Ends the session for every connection watching it
+                        hub.stop()
+                        return  # Exit the listener
+                    elif data.get("type") == "preview_settings":
+                        # e.g. {"type": "preview_settings", "width": 320, "height": 240, "quality": 50, "fps": 10}
+                        try:
+                            settings = schemas.PreviewSettings(**data)
+                        except ValidationError as e:
+                            await websocket.send_text(dumps({
+                                "type": "error",
+                                "error": "Invalid preview settings",
+                                "details": [err["msg"] for err in e.errors()],
+                            }))
+                            continue
+                        if settings.video is not None:
+                            # Only this connection; the tracker encodes while any viewer wants video
+                            hub.set_video(subscriber, settings.video)
+                        preview = {k: v for k, v in settings if v is not None and k != "video"}
+                        if preview:
+                            tracker.configure_preview(**preview)
+                except json.JSONDecodeError:
+                    logger.warning(f"Invalid JSON message received: {message}")
+                except Exception as e:
+                    logger.error(f"Error processing message: {e}")
+        except WebSocketDisconnect:
+            logger.info(f"👋 WebSocket disconnected for user: {user.email}")
         except Exception as e:
-            logger.error(f"Error in task coordination: {e}")
-        
-        # Get result from tracking task if completed
-        result = None
-        if tracking_task.done() and not tracking_task.cancelled():
+            logger.error(f"WebSocket message listener error: {e}")
+
+    message_task = asyncio.create_task(message_listener())
+
+    # Wait for either the session to end (the subscriber has sent everything) or the client to stop / disconnect
+    try:
+        done, pending = await asyncio.wait(
+            [subscriber.task, message_task],
+            return_when=asyncio.FIRST_COMPLETED
+        )
+
+        # Cancel any pending tasks
+        for task in pending:
+            task.cancel()
             try:
-                result = await tracking_task
-            except Exception as e:
-                logger.error(f"Eye tracking task error: {e}")
-        
-        if result and not result.get("success", True):
-            await websocket.send_text(json.dumps({"error": result.get("message", "Failed to start eye tracking")}))
-            return
-        
-    except WebSocketDisconnect:
-        logger.info(f"👋 WebSocket disconnected for user: {user.email}")
+                await task
+            except asyncio.CancelledError:
+                pass
+
     except Exception as e:
-        logger.error(f"WebSocket error for user {user.email}: {e}")
-        try:
-            await websocket.send_text(json.dumps({"error": f"Tracking error: {str(e)}"}))
-        except:
-            pass  # WebSocket might be closed
+        logger.error(f"Error in task coordination: {e}")
     finally:
-        logger.info(f"🧹 Cleaning up eye tracker service for user: {user.email}")
-        try:
-            eye_tracker_service.stop_tracking()
-            logger.info(f"✅ Eye tracker service cleaned up successfully for user: {user.email}")
-        except Exception as e:
-            logger.error(f"Error during cleanup for user {user.email}: {e}")
-        
+        # The session stops once its last connection has gone, and stores its summary as it ends
+        logger.info(f"🧹 Leaving eye tracking session for user: {user.email}")
+        hub.unsubscribe(subscriber)
+        if not hub.subscribers:
+            await hub.stopped()
+            if session_hubs.get(key) is hub:
+                del session_hubs[key]
+
         # Ensure database connection is closed
         try:
             db.close()
         except:
             pass
 
+
+@app.get("/sessions", response_model=List[schemas.TrackingSessionOut])
+def get_sessions(
+    limit: int = Query(50, ge=1, le=500),
+    before: Optional[datetime] = None,
+    current_user: models.User = Depends(auth.get_current_user),
+    db: Session = Depends(get_db),
+):
+    """The current user's tracking session summaries, newest first; page back with `before=<started_at>`."""
+    return crud.get_tracking_sessions(db, current_user.id, limit, before)
+
+
 @app.post("/eye-tracker/start")
 async def start_eye_tracker(current_user: models.User = Depends(auth.get_current_user)):
     """Start eye tracking (alternative to WebSocket)"""
     # This could be used for simple start/stop without real-time data
     return {"message": "Use WebSocket endpoint /ws/eye-tracker/{token} for real-time tracking"}
 
+
+@app.get("/eye-tracker/ear-history", response_model=schemas.EarHistoryOut)
+async def get_ear_history(
+    seconds: float = Query(10.0, gt=0, le=600),
+    points: int = Query(300, ge=2, le=5000),
+    current_user: models.User = Depends(auth.get_current_user),
+):
+    """Per-frame EAR samples from the user's current or last tracking session, decimated to `points`."""
+    for device in config.CAMERA_DEVICES:
+        window = await tracker_for(device).ear_history_window(current_user.id, seconds, points)
+        if window is not None:
+            return window
+    raise HTTPException(status_code=404, detail="No tracking session for this user")
+
+
+@app.get("/eye-tracker/devices", response_model=List[schemas.DeviceStatusOut])
+async def get_devices(current_user: models.User = Depends(auth.get_current_user)):
+    """Cameras on this node with their session state, frame rate and CPU use."""
+    statuses = await asyncio.gather(*(tracker_for(device).device_status() for device in config.CAMERA_DEVICES))
+    # Unreachable workers can't report their index; fill it in from the configured list
+    return [dict(status, device=device) for device, status in zip(config.CAMERA_DEVICES, statuses)]
+
+
 @app.post("/eye-tracker/stop")
-async def stop_eye_tracker(current_user: models.User = Depends(auth.get_current_user)):
-    """Stop eye tracking"""
-    eye_tracker_service.stop_tracking()
+async def stop_eye_tracker(device: Optional[int] = None, current_user: models.User = Depends(auth.get_current_user)):
+    """Stop eye tracking on the default camera or `?device=N`"""
+    tracker = tracker_for(device)
+    if tracker is None:
+        raise HTTPException(status_code=404, detail="Unknown camera device")
+    tracker.stop_tracking()
     return {"message": "Eye tracker stopped"} 
\ No newline at end of file
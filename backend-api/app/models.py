@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Boolean, DateTime, ForeignKey
+from sqlalchemy import Column, Integer, String, Boolean, DateTime, Float, ForeignKey, UniqueConstraint
 from sqlalchemy.orm import relationship
 from .database import Base
 import datetime
@@ -10,7 +10,9 @@ class User(Base):
     hashed_password = Column(String, nullable=False)
     consent = Column(Boolean, default=False)
     created_at = Column(DateTime, default=datetime.datetime.utcnow)
+    ear_threshold = Column(Float, nullable=True)  # Calibrated per user; None until first session
     blinks = relationship("BlinkData", back_populates="user")
+    sessions = relationship("TrackingSession", back_populates="user")
 
 class BlinkData(Base):
     __tablename__ = "blinks"
@@ -18,4 +20,28 @@ class BlinkData(Base):
     user_id = Column(Integer, ForeignKey("users.id"))
     timestamp = Column(DateTime, default=datetime.datetime.utcnow)
     blink_count = Column(Integer, nullable=False)
-    user = relationship("User", back_populates="blinks") 
\ No newline at end of file
+    # Set by offline clients through /sync so a retried push doesn't store a row twice
+    client_id = Column(String(64), nullable=True)
+    # Server insert time (UTC); sync cursors only pass rows older than crud.SETTLE_SECONDS
+    created_at = Column(DateTime, nullable=True, default=datetime.datetime.utcnow)
+    user = relationship("User", back_populates="blinks")
+    __table_args__ = (UniqueConstraint("user_id", "client_id"),)
+
+
+class TrackingSession(Base):
+    """Summary of one eye tracking session, written once when it ends"""
+    __tablename__ = "tracking_sessions"
+    id = Column(Integer, primary_key=True, index=True)
+    user_id = Column(Integer, ForeignKey("users.id"), index=True)
+    device = Column(Integer, nullable=False, default=0)
+    started_at = Column(DateTime, nullable=False, index=True)
+    ended_at = Column(DateTime, nullable=False)
+    duration_s = Column(Float, nullable=False)
+    blink_count = Column(Integer, nullable=False)
+    blinks_per_minute = Column(Float, nullable=False)
+    frames = Column(Integer, nullable=False)          # Frames run through FaceMesh
+    dropped_frames = Column(Integer, nullable=False)  # Camera frames skipped to stay current
+    frame_age_ms = Column(Float, nullable=False)      # Mean camera grab to FaceMesh input
+    inference_ms = Column(Float, nullable=False)      # Mean FaceMesh time
+    encode_ms = Column(Float, nullable=False)         # Mean preview render + JPEG time
+    user = relationship("User", back_populates="sessions")
@@ -0,0 +1,97 @@
+"""
+Token-bucket rate limits for hot endpoints
+
+Each limited endpoint gets one bucket per client: per IP address for login
+and registration, per user (the token's subject) for uploads and sync. A
+bucket holds up to `burst` tokens and refills at `rate` tokens per second;
+a request takes one token or is answered 429 Too Many Requests with a
+Retry-After header before the endpoint runs. A check is one dict lookup and
+a little arithmetic under a lock.
+
+Buckets live in this process's memory (MemoryBucketStore), so with several
+API workers each enforces its own share. For limits shared between workers
+or nodes, pass RateLimiter a store with the same take() method backed by a
+shared service (e.g. a Redis script doing the same arithmetic).
+"""
+import math
+import threading
+import time
+from typing import Callable, Dict, Optional, Protocol, Tuple
+
+from fastapi import HTTPException, Request
+
+from . import auth
+
+
+class BucketStore(Protocol):
+    def take(self, key: str, rate: float, burst: int, now: float) -> float:
+        """Take a token from `key`'s bucket: 0.0 if there was one, otherwise seconds until there is"""
+
+
+class MemoryBucketStore:
+    """Token buckets in this process's memory; idle full buckets are dropped once there are max_keys"""
+
+    def __init__(self, max_keys: int = 100_000):
+        self.max_keys = max_keys
+        self.lock = threading.Lock()
+        self.buckets: Dict[str, Tuple[float, float, float]] = {}  # key -> (tokens, updated, full_at)
+
+    def take(self, key: str, rate: float, burst: int, now: float) -> float:
+        with self.lock:
+            bucket = self.buckets.get(key)
+            if bucket is None:
+                if len(self.buckets) >= self.max_keys:
+                    self.prune(now)
+                tokens = float(burst)
+            else:
+                tokens = min(float(burst), bucket[0] + (now - bucket[1]) * rate)
+            wait = 0.0
+            if tokens >= 1.0:
+                tokens -= 1.0
+            else:
+                wait = (1.0 - tokens) / rate
+            self.buckets[key] = (tokens, now, now + (burst - tokens) / rate)
+            return wait
+
+    def prune(self, now: float):
+        """Forget buckets that have refilled; a fresh bucket is identical"""
+        self.buckets = {key: bucket for key, bucket in self.buckets.items() if bucket[2] > now}
+
+
+def client_ip(request: Request) -> str:
+    return request.client.host if request.client else "unknown"
+
+
+def client_user(request: Request) -> str:
+    """The bearer token's subject, without a database lookup; the IP for requests without a valid token"""
+    scheme, _, token = request.headers.get("authorization", "").partition(" ")
+    if scheme.lower() == "bearer" and token:
+        try:
+            return "user:" + auth.verify_token(token)["sub"]
+        except HTTPException:
+            pass
+    return "ip:" + client_ip(request)
+
+
+class RateLimiter:
+    def __init__(self, store: Optional[BucketStore] = None, enabled: bool = True):
+        self.store = store or MemoryBucketStore()
+        self.enabled = enabled
+        self.limited = 0  # Requests answered 429, for monitoring
+
+    def limit(self, name: str, rate: float, burst: int, per: str = "ip") -> Callable[[Request], None]:
+        """FastAPI dependency allowing `rate` requests/s per client with bursts of `burst`"""
+        client = {"ip": client_ip, "user": client_user}[per]
+
+        def check(request: Request):
+            if not self.enabled:
+                return
+            wait = self.store.take(f"{name}:{client(request)}", rate, burst, time.time())
+            if wait > 0:
+                self.limited += 1
+                raise HTTPException(
+                    status_code=429,
+                    detail="Too many requests",
+                    headers={"Retry-After": str(math.ceil(wait))},
+                )
+        return check
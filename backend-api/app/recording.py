@@ -0,0 +1,162 @@
+"""
+Record-and-replay format for per-frame eye landmark and EAR streams
+
+Recording is opt-in: set RECORDINGS_DIR and every tracking session writes a
+`.ear` file there. Files are a small JSON header followed by fixed-size
+binary records, so a whole session maps straight into a NumPy structured
+array with np.memmap (no parsing, no copy):
+
+    MAGIC (8 bytes) | header length (uint32 LE) | JSON header | records...
+
+The JSON header is space-padded to a fixed size so metadata learned during
+the session (e.g. the calibrated EAR threshold) can be rewritten in place.
+
+Records are buffered and appended a chunk at a time; a crash loses at most
+the last unflushed chunk, and a partially written trailing record is ignored
+on load.
+
+Replay / re-score recorded sessions with different detector settings:
+    python -m app.recording recordings/*.ear --ear-thresh 0.22 --consec-frames 2
+"""
+import argparse
+import json
+import os
+import struct
+from datetime import datetime
+from typing import Optional, Tuple
+
+import numpy as np
+
+from .ear_history import EAR_FACE, EAR_BLINK, EAR_CALIBRATING
+from .blink_detection import detect_blinks
+
+MAGIC = b"WAWEAR1\n"
+HEADER_SIZE = 1024  # Bytes before the first record
+DEFAULT_CHUNK_FRAMES = 256
+
+RECORD_DTYPE = np.dtype([
+    ("t", "f8"),                      # monotonic seconds
+    ("left_ear", "f4"),
+    ("right_ear", "f4"),
+    ("flags", "u1"),                  # EAR_* flags from ear_history
+    ("left_eye", "i2", (6, 2)),       # pixel landmarks used for the EAR
+    ("right_eye", "i2", (6, 2)),
+])
+
+
+def recording_path(directory: str, user_id: Optional[int]) -> str:
+    stamp = datetime.now().strftime("%Y%m%dT%H%M%S")
+    return os.path.join(directory, f"session_{user_id if user_id is not None else 'anon'}_{stamp}.ear")
+
+
+class SessionRecorder:
+    """Appends per-frame records to a recording file in fixed-size chunks"""
+
+    def __init__(self, path: str, metadata: Optional[dict] = None, chunk_frames: int = DEFAULT_CHUNK_FRAMES):
+        self.path = path
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self.file = open(path, "wb")
+        self.metadata = dict(metadata or {}, dtype=RECORD_DTYPE.descr)
+        self.file.write(_encode_header(self.metadata))
+        self.chunk = np.zeros(chunk_frames, dtype=RECORD_DTYPE)
+        self.pending = 0
+        self.frames = 0
+
+    def append(self, t: float, left_ear: float, right_ear: float, flags: int, left_eye=None, right_eye=None):
+        row = self.chunk[self.pending]
+        row["t"] = t
+        row["left_ear"] = left_ear
+        row["right_ear"] = right_ear
+        row["flags"] = flags
+        row["left_eye"] = left_eye if left_eye is not None else 0
+        row["right_eye"] = right_eye if right_eye is not None else 0
+        self.pending += 1
+        self.frames += 1
+        if self.pending == len(self.chunk):
+            self.flush()
+
+    def update_metadata(self, **values):
+        """Rewrite the header with extra metadata, keeping the records where they are"""
+        self.metadata.update(values)
+        self.file.seek(0)
+        self.file.write(_encode_header(self.metadata))
+        self.file.seek(0, os.SEEK_END)
+
+    def flush(self):
+        if self.pending:
+            self.file.write(self.chunk[:self.pending].tobytes())
+            self.file.flush()
+            self.pending = 0
+
+    def close(self):
+        if self.file.closed:
+            return
+        self.flush()
+        self.file.close()
+
+
+def _encode_header(metadata: dict) -> bytes:
+    room = HEADER_SIZE - len(MAGIC) - 4
+    body = json.dumps(metadata).encode("utf-8")
+    if len(body) > room:
+        raise ValueError("Recording metadata does not fit in the header")
+    return MAGIC + struct.pack("<I", room) + body.ljust(room)
+
+
+def load_recording(path: str) -> Tuple[dict, np.ndarray]:
+    """Map a recording without copying: returns (metadata, structured record array)"""
+    with open(path, "rb") as f:
+        if f.read(len(MAGIC)) != MAGIC:
+            raise ValueError(f"{path} is not an eye tracker recording")
+        (length,) = struct.unpack("<I", f.read(4))
+        metadata = json.loads(f.read(length))
+    offset = len(MAGIC) + 4 + length
+
+    frames = (os.path.getsize(path) - offset) // RECORD_DTYPE.itemsize
+    if frames <= 0:
+        return metadata, np.zeros(0, dtype=RECORD_DTYPE)
+    return metadata, np.memmap(path, dtype=RECORD_DTYPE, mode="r", offset=offset, shape=(frames,))
+
+
+def mean_ear(records: np.ndarray) -> np.ndarray:
+    """Per-frame mean EAR, as the online detector sees it"""
+    return (records["left_ear"] + records["right_ear"]) / 2.0
+
+
+def rescore(records: np.ndarray, ear_thresh: float, consec_frames: int) -> int:
+    """Count blinks in a recording with different detector settings"""
+    # The online detector only advances on face frames once calibration is over
+    scored = (records["flags"] & (EAR_FACE | EAR_CALIBRATING)) == EAR_FACE
+    indices, _ = detect_blinks(mean_ear(records[scored]), ear_thresh, consec_frames)
+    return len(indices)
+
+
+def summarize(path: str, ear_thresh: Optional[float] = None, consec_frames: Optional[int] = None) -> dict:
+    metadata, records = load_recording(path)
+    ear_thresh = metadata.get("ear_thresh", 0.25) if ear_thresh is None else ear_thresh
+    consec_frames = metadata.get("consec_frames", 1) if consec_frames is None else consec_frames
+    duration = float(records["t"][-1] - records["t"][0]) if len(records) > 1 else 0.0
+    return {
+        "file": path,
+        "frames": int(len(records)),
+        "face_frames": int(np.count_nonzero(records["flags"] & EAR_FACE)),
+        "duration_s": round(duration, 2),
+        "recorded_blinks": int(np.count_nonzero(records["flags"] & EAR_BLINK)),
+        "ear_thresh": ear_thresh,
+        "consec_frames": consec_frames,
+        "rescored_blinks": rescore(records, ear_thresh, consec_frames),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay and re-score recorded tracking sessions")
+    parser.add_argument("files", nargs="+", help="Recording files (.ear)")
+    parser.add_argument("--ear-thresh", type=float, default=None, help="EAR threshold (default: as recorded)")
+    parser.add_argument("--consec-frames", type=int, default=None,
+                        help="Closed frames per blink (default: as recorded)")
+    args = parser.parse_args()
+    print(json.dumps([summarize(path, args.ear_thresh, args.consec_frames) for path in args.files], indent=2))
+
+
+if __name__ == "__main__":
+    main()
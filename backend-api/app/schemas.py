@@ -1,4 +1,4 @@
-from pydantic import BaseModel, EmailStr
+from pydantic import BaseModel, EmailStr, Field
 from typing import Optional, List
 from datetime import datetime
 
@@ -12,6 +12,7 @@ class UserCreate(UserBase):
 class UserOut(UserBase):
     id: int
     created_at: datetime
+    ear_threshold: Optional[float] = None
     class Config:
         orm_mode = True
 
@@ -28,9 +29,87 @@ class BlinkDataOut(BlinkDataBase):
     class Config:
         orm_mode = True
 
+
+class SyncRecord(BlinkDataBase):
+    client_id: str = Field(..., min_length=1, max_length=64)  # Client-generated, e.g. a UUID
+
+
+class SyncRequest(BaseModel):
+    cursor: int = Field(0, ge=0)  # From the previous response; 0 for a first sync
+    records: List[SyncRecord] = Field(default_factory=list, max_length=1000)
+
+
+class SyncBlinkOut(BlinkDataOut):
+    client_id: Optional[str] = None
+
+
+class SyncResponse(BaseModel):
+    cursor: int                  # Send back on the next sync
+    accepted: List[str]          # client_ids now stored, including ones stored by an earlier push
+    changes: List[SyncBlinkOut]  # Rows stored since the request's cursor, oldest first
+    has_more: bool               # More changes than fit in one response; sync again with `cursor`
+
 class Token(BaseModel):
     access_token: str
     token_type: str
 
 class TokenData(BaseModel):
-    email: Optional[str] = None 
\ No newline at end of file
+    email: Optional[str] = None
+
+
+class EarHistoryOut(BaseModel):
+    seconds: float
+    samples: int
+    ear_threshold: float
+    t: List[float]
+    left_ear: List[Optional[float]]
+    right_ear: List[Optional[float]]
+    flags: List[int]
+
+
+class BlinkSeriesOut(BaseModel):
+    samples: int            # Rows in the requested range before downsampling
+    cursor: int             # Newest blink id when read; pass as `after` to /blinks/user/stream
+    timestamps: List[datetime]
+    blink_counts: List[int]
+
+
+class TrackingSessionOut(BaseModel):
+    id: int
+    device: int
+    started_at: datetime
+    ended_at: datetime
+    duration_s: float
+    blink_count: int
+    blinks_per_minute: float
+    frames: int
+    dropped_frames: int
+    frame_age_ms: float
+    inference_ms: float
+    encode_ms: float
+
+    class Config:
+        orm_mode = True
+
+
+class DeviceStatusOut(BaseModel):
+    device: int
+    available: bool
+    is_running: bool
+    user_id: Optional[int] = None
+    fps: float
+    cpu_percent: float
+    frame_age_ms: float = 0.0
+    skipped_frames: int = 0
+    start_ms: Optional[float] = None
+    camera_open: bool = False
+    camera_idle_s: Optional[float] = None
+
+
+class PreviewSettings(BaseModel):
+    """Live video preview control message; omitted fields stay unchanged"""
+    video: Optional[bool] = None
+    width: Optional[int] = Field(None, ge=0, le=1920)    # 0 = camera resolution
+    height: Optional[int] = Field(None, ge=0, le=1080)
+    quality: Optional[int] = Field(None, ge=10, le=95)   # JPEG quality
+    fps: Optional[float] = Field(None, gt=0, le=30)
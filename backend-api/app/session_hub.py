@@ -0,0 +1,203 @@
+"""
+Broadcast hub for tracking sessions
+
+Runs one user's session on a camera and fans its messages out to every subscribed connection.
+"""
+import asyncio
+import logging
+from collections import deque
+from typing import Awaitable, Callable, Optional, Set
+
+from .frame_messages import dumps
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_QUEUE_SIZE = 8  # Messages a subscriber may fall behind before dropping
+SEND_WAIT = 1.0 / 30    # Longest the frame loop waits on one subscriber's send
+STOP_GRACE = 2.0        # Seconds a stopped tracker gets to finish before it is cancelled
+DROP_OLDEST = "oldest"
+DROP_NEWEST = "newest"
+
+
+class Subscriber:
+    """One connection: its send callable, bounded backlog queue and the task draining it"""
+
+    def __init__(self, send: Callable[[str], Awaitable[None]], queue_size: int = DEFAULT_QUEUE_SIZE,
+                 drop: str = DROP_OLDEST, video: bool = True):
+        if drop not in (DROP_OLDEST, DROP_NEWEST):
+            raise ValueError(f"Unknown drop policy {drop!r}")
+        self.send = send
+        self.queue_size = queue_size
+        self.drop = drop
+        self.video = video
+        self.messages = deque()  # (text, droppable)
+        self.ready = asyncio.Event()
+        self.sending = False
+        self.in_flight: Optional[asyncio.Task] = None
+        self.closed = False
+        self.dropped = 0
+        self.task = asyncio.create_task(self._drain())
+
+    async def deliver(self, text: str, droppable: bool = True):
+        """Send a frame_data now if nothing is queued or in flight; queue everything else in order"""
+        if self.closed:
+            return
+        if not droppable or self.sending or self.messages:
+            self.offer(text, droppable)
+            return
+        self.sending = True
+        self.in_flight = asyncio.create_task(self._send(text))
+        # A slower send finishes in the background; later messages queue behind it
+        await asyncio.wait({self.in_flight}, timeout=SEND_WAIT)
+
+    async def _send(self, text: str):
+        try:
+            await self.send(text)
+        except Exception:
+            self.close()
+        finally:
+            self.sending = False
+            self.ready.set()  # Let the drain task send whatever queued up meanwhile
+
+    def offer(self, text: str, droppable: bool = True):
+        """Queue a message without waiting, applying the drop policy when the queue is full"""
+        if self.closed:
+            return
+        if droppable and len(self.messages) >= self.queue_size:
+            self.dropped += 1
+            if self.drop == DROP_NEWEST:
+                return
+            for i, (_, queued_droppable) in enumerate(self.messages):
+                if queued_droppable:
+                    del self.messages[i]
+                    break
+        self.messages.append((text, droppable))
+        self.ready.set()
+
+    async def _drain(self):
+        """Send queued messages in order until the session ends or the connection fails"""
+        while True:
+            while self.sending or not self.messages:
+                if self.closed and not self.sending and not self.messages:
+                    return
+                self.ready.clear()
+                await self.ready.wait()
+            text, _ = self.messages.popleft()
+            self.sending = True
+            try:
+                await self.send(text)
+            except Exception:
+                self.close()
+                return
+            finally:
+                self.sending = False
+
+    def close(self):
+        """No more messages; whatever is already queued is still sent"""
+        self.closed = True
+        self.ready.set()
+
+
+class SessionHub:
+    """One tracking session on one camera, shared by every connection subscribed to it"""
+
+    def __init__(self, tracker, sink: Optional[Callable[[dict], Awaitable[None]]] = None):
+        self.tracker = tracker
+        self.sink = sink  # Called once per message before fan-out, e.g. to persist blink data
+        self.subscribers: Set[Subscriber] = set()
+        self.task: Optional[asyncio.Task] = None
+        self.stopping = False
+        self.send_video = False
+
+    @property
+    def running(self) -> bool:
+        """Started, not finished and not being stopped"""
+        return self.task is not None and not self.task.done() and not self.stopping
+
+    @property
+    def ended(self) -> bool:
+        return self.task is not None and self.task.done()
+
+    def subscribe(self, send: Callable[[str], Awaitable[None]], **options) -> Subscriber:
+        subscriber = Subscriber(send, **options)
+        self.subscribers.add(subscriber)
+        self.update_video()
+        return subscriber
+
+    def unsubscribe(self, subscriber: Subscriber):
+        """Remove a subscriber; the session stops when its last subscriber leaves"""
+        self.subscribers.discard(subscriber)
+        subscriber.close()
+        subscriber.task.cancel()
+        if subscriber.dropped:
+            logger.info(f"📉 Subscriber left after dropping {subscriber.dropped} message(s)")
+        if not self.subscribers:
+            self.stop()
+        else:
+            self.update_video()
+
+    def set_video(self, subscriber: Subscriber, video: bool):
+        """Turn video frames on or off for one connection"""
+        subscriber.video = video
+        self.update_video()
+
+    def update_video(self):
+        """Have the running tracker encode video frames only while some subscriber wants them"""
+        wanted = any(subscriber.video for subscriber in self.subscribers)
+        if self.running and wanted != self.send_video:
+            self.send_video = wanted
+            self.tracker.configure_preview(video=wanted)
+
+    def start(self, **session):
+        """Start the session's tracker unless it is already running"""
+        if self.task is None:
+            self.send_video = any(subscriber.video for subscriber in self.subscribers)
+            self.task = asyncio.create_task(self._run(self.send_video, session))
+
+    async def _run(self, send_video: bool, session: dict):
+        try:
+            result = await self.tracker.start_tracking(self.publish, send_video, **session)
+            if result and not result.get("success", True):
+                await self.publish({"error": result.get("message", "Failed to start eye tracking")})
+            elif result and result.get("summary"):
+                await self.publish({"type": "session_summary", **result["summary"]})
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.error(f"Eye tracking task error: {e}")
+            await self.publish({"error": f"Tracking error: {str(e)}"})
+        finally:
+            for subscriber in list(self.subscribers):
+                subscriber.close()
+
+    async def publish(self, message: dict):
+        """Tracker callback: hand the message to the sink, then to every subscriber"""
+        if self.sink is not None:
+            try:
+                await self.sink(message)
+            except Exception as e:
+                logger.error(f"Error processing blink data: {e}")
+        droppable = message.get("type") == "frame_data"
+        text = lean = None
+        for subscriber in list(self.subscribers):
+            if subscriber.video or "video_frame" not in message:
+                if text is None:
+                    text = dumps(message)
+                await subscriber.deliver(text, droppable)
+            else:
+                if lean is None:
+                    lean = dumps({k: v for k, v in message.items() if k != "video_frame"})
+                await subscriber.deliver(lean, droppable)
+
+    def stop(self):
+        """End the session for every subscriber"""
+        if self.running:
+            self.stopping = True
+            self.tracker.stop_tracking()
+            # A tracker that doesn't wind down (e.g. stuck on a stalled camera) is cancelled
+            asyncio.get_running_loop().call_later(STOP_GRACE, self.task.cancel)
+
+    async def stopped(self):
+        """Wait until the session has finished"""
+        if self.task is not None:
+            await asyncio.wait({self.task})
@@ -0,0 +1,305 @@
+"""
+Standalone vision worker process and the IPC client API workers use to drive it
+
+The camera and FaceMesh live in a single worker process, so the API tier can
+run `uvicorn --workers N` without every worker fighting over VideoCapture(0).
+API workers connect over a local multiprocessing.connection channel (a Unix
+socket by default) and exchange small dict messages:
+
+    API -> worker:  {"type": "start", "send_video": bool, "user_id": int, "ear_threshold": float or None}
+                    {"type": "stop"}
+                    {"type": "preview", "settings": {...}}
+                    {"type": "ear_history", "user_id": int, "seconds": float, "points": int}
+                    {"type": "status"}
+    worker -> API:  frame_data messages, exactly as the in-process service emits them
+                    {"type": "finished", "result": {...}}
+                    {"type": "ear_history", "window": {...} or None}
+                    {"type": "status", "status": {...}}
+
+One session owns the camera at a time; starting a new session stops the
+previous one, matching the in-process service.
+
+multiprocessing.connection unpickles what it receives, so anyone holding the
+authkey (SECRET_KEY) can run code in the worker; it refuses to listen on TCP
+with the default SECRET_KEY.
+
+Run it with:
+    python -m app.vision_worker --address /tmp/waw_vision.sock
+and point the API at it with VISION_WORKER_ADDRESS=/tmp/waw_vision.sock.
+Nodes with several cameras run python -m app.devices instead, which serves
+each camera on its own device_address().
+"""
+import argparse
+import asyncio
+import logging
+import os
+import threading
+from multiprocessing.connection import Client, Listener
+from typing import Callable, Optional, Set
+
+from . import config
+
+logger = logging.getLogger(__name__)
+
+
+def parse_address(address: str):
+    """Turn 'host:port' into an AF_INET tuple; anything else is a socket/pipe path"""
+    if ":" in address and not address.startswith(("/", "\\\\")):
+        host, port = address.rsplit(":", 1)
+        return (host, int(port))
+    return address
+
+
+def device_address(address: str, device: int) -> str:
+    """Where the worker for camera `device` listens: the base address for device 0,
+    `<path>.<device>` for socket paths and `host:<port + device>` for TCP"""
+    if device == 0:
+        return address
+    parsed = parse_address(address)
+    if isinstance(parsed, tuple):
+        return f"{parsed[0]}:{parsed[1] + device}"
+    return f"{address}.{device}"
+
+
+def default_authkey() -> bytes:
+    return config.SECRET_KEY.encode("utf-8")
+
+
+def pump(receive: Callable, loop: asyncio.AbstractEventLoop) -> asyncio.Queue:
+    """Feed results of a blocking receive() into an asyncio queue from a daemon thread
+
+    None is queued once receive() raises EOFError/OSError (peer or listener closed).
+    Daemon threads keep blocked accept()/recv() calls from holding up interpreter exit.
+    """
+    queue: asyncio.Queue = asyncio.Queue()
+
+    def run():
+        while True:
+            try:
+                item = receive()
+            except (EOFError, OSError):
+                item = None
+            try:
+                loop.call_soon_threadsafe(queue.put_nowait, item)
+            except RuntimeError:
+                return  # Event loop already closed
+            if item is None:
+                return
+
+    threading.Thread(target=run, daemon=True).start()
+    return queue
+
+
+class VisionWorkerServer:
+    """Owns the eye tracker and serves tracking sessions to API workers"""
+
+    def __init__(self, tracker=None):
+        if tracker is None:
+            from .eye_tracker_service import EyeTrackerService
+            tracker = EyeTrackerService()
+        self.tracker = tracker
+        self.session_conn = None
+        self.session_task: Optional[asyncio.Task] = None
+
+    async def serve(self, address, authkey: bytes):
+        address = parse_address(address)
+        if isinstance(address, tuple) and authkey == config.DEFAULT_SECRET_KEY.encode("utf-8"):
+            raise ValueError(f"Refusing to listen on {address[0]}:{address[1]} with the default SECRET_KEY; "
+                             "set SECRET_KEY or use a Unix socket path")
+        if isinstance(address, str) and os.path.exists(address):
+            os.unlink(address)  # Stale socket from a previous run
+        listener = Listener(address, authkey=authkey)
+        logger.info(f"👁️ Vision worker listening on {listener.address}")
+        connections = pump(listener.accept, asyncio.get_running_loop())
+        try:
+            while True:
+                conn = await connections.get()
+                if conn is None:
+                    break
+                asyncio.create_task(self.handle_connection(conn))
+        finally:
+            listener.close()
+
+    async def handle_connection(self, conn):
+        # send() blocks once the socket buffer is full (slow API worker), so it runs in a thread;
+        # the lock keeps the session's frames and command replies from interleaving on the wire
+        sending = asyncio.Lock()
+
+        async def send(message):
+            async with sending:
+                await asyncio.to_thread(conn.send, message)
+
+        commands = pump(conn.recv, asyncio.get_running_loop())
+        try:
+            while True:
+                command = await commands.get()
+                if command is None:
+                    logger.info("👋 API worker disconnected from vision worker")
+                    break
+                if command.get("type") == "start":
+                    await self.start_session(conn, send, command)
+                elif command.get("type") == "stop":
+                    if self.session_conn is conn:
+                        self.tracker.stop_tracking()
+                elif command.get("type") == "preview":
+                    if self.session_conn is conn:
+                        self.tracker.configure_preview(**command["settings"])
+                elif command.get("type") == "ear_history":
+                    window = await self.tracker.ear_history_window(
+                        command["user_id"], command["seconds"], command["points"])
+                    await send({"type": "ear_history", "window": window})
+                elif command.get("type") == "status":
+                    await send({"type": "status", "status": await self.tracker.device_status()})
+                else:
+                    logger.warning(f"Unknown vision worker command: {command}")
+        finally:
+            if self.session_conn is conn:
+                self.tracker.stop_tracking()
+                if self.session_task:
+                    await asyncio.gather(self.session_task, return_exceptions=True)
+            conn.close()
+
+    async def start_session(self, conn, send, command):
+        # Only one session can hold the camera; hand it over to the newcomer
+        if self.session_task and not self.session_task.done():
+            logger.info("🔁 New tracking session requested, stopping the current one")
+            self.tracker.stop_tracking()
+            await asyncio.gather(self.session_task, return_exceptions=True)
+
+        async def run_session():
+            try:
+                result = await self.tracker.start_tracking(
+                    send, command.get("send_video", True),
+                    user_id=command.get("user_id"), ear_threshold=command.get("ear_threshold"))
+            except Exception as e:
+                result = {"success": False, "message": f"Eye tracking failed: {str(e)}"}
+            try:
+                await send({"type": "finished", "result": result})
+            except (EOFError, OSError):
+                pass
+            finally:
+                if self.session_conn is conn:
+                    self.session_conn = None
+
+        self.session_conn = conn
+        self.session_task = asyncio.create_task(run_session())
+
+
+class VisionWorkerClient:
+    """Drop-in replacement for EyeTrackerService that drives a remote vision worker"""
+
+    def __init__(self, address: str, authkey: Optional[bytes] = None):
+        self.address = parse_address(address)
+        self.authkey = authkey or default_authkey()
+        self.connections: Set = set()
+        self.send_video = True
+
+    @property
+    def is_running(self):
+        return bool(self.connections)
+
+    async def start_tracking(self, callback: Callable[[dict], None], send_video: bool = True,
+                             user_id: Optional[int] = None, ear_threshold: Optional[float] = None):
+        """Start a session on the vision worker and relay its messages to callback"""
+        try:
+            conn = await asyncio.to_thread(Client, self.address, authkey=self.authkey)
+        except (OSError, EOFError) as e:
+            logger.error(f"Could not reach vision worker at {self.address}: {e}")
+            return {"success": False, "message": "Eye tracking service unavailable"}
+
+        self.connections.add(conn)
+        self.send_video = send_video
+        try:
+            conn.send({"type": "start", "send_video": send_video, "user_id": user_id,
+                       "ear_threshold": ear_threshold})
+            messages = pump(conn.recv, asyncio.get_running_loop())
+            while True:
+                message = await messages.get()
+                if message is None:
+                    raise EOFError
+                if message.get("type") == "finished":
+                    return message["result"]
+                try:
+                    await callback(message)
+                except Exception as e:
+                    logger.error(f"Error sending data via callback: {e}")
+                    conn.send({"type": "stop"})
+        except (EOFError, OSError):
+            logger.error("Vision worker connection lost")
+            return {"success": False, "message": "Eye tracking service disconnected"}
+        finally:
+            self.connections.discard(conn)
+            conn.close()
+
+    async def request(self, message: dict) -> Optional[dict]:
+        """Send one command on a short-lived connection and return the reply (None if unreachable)"""
+        try:
+            conn = await asyncio.to_thread(Client, self.address, authkey=self.authkey)
+        except (OSError, EOFError) as e:
+            logger.error(f"Could not reach vision worker at {self.address}: {e}")
+            return None
+        try:
+            conn.send(message)
+            return await pump(conn.recv, asyncio.get_running_loop()).get()
+        except (OSError, EOFError):
+            return None
+        finally:
+            conn.close()
+
+    async def ear_history_window(self, user_id: int, seconds: float, points: int) -> Optional[dict]:
+        """Ask the vision worker for the user's recent EAR samples"""
+        reply = await self.request({"type": "ear_history", "user_id": user_id, "seconds": seconds, "points": points})
+        return reply.get("window") if reply else None
+
+    async def device_status(self) -> dict:
+        """The worker's device status, or an unavailable placeholder if it can't be reached"""
+        reply = await self.request({"type": "status"})
+        if reply is None:
+            return {"device": None, "available": False, "is_running": False, "user_id": None,
+                    "fps": 0.0, "cpu_percent": 0.0}
+        return reply["status"]
+
+    def stop_tracking(self):
+        """Stop the sessions this API worker started"""
+        for conn in list(self.connections):
+            try:
+                conn.send({"type": "stop"})
+            except (OSError, EOFError):
+                pass
+
+    def configure_preview(self, **settings):
+        """Forward live preview changes to the sessions this API worker started"""
+        for conn in list(self.connections):
+            try:
+                conn.send({"type": "preview", "settings": settings})
+            except (OSError, EOFError):
+                pass
+
+    def get_status(self):
+        return {
+            "is_running": self.is_running,
+            "send_video": self.send_video,
+        }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the eye tracker vision worker")
+    parser.add_argument("--address", default=config.VISION_WORKER_ADDRESS or "/tmp/waw_vision.sock",
+                        help="Unix socket path, named pipe or host:port to listen on")
+    parser.add_argument("--device", type=int, default=0,
+                        help="Camera index; served on device_address(address, device)")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO)
+    from .eye_tracker_service import EyeTrackerService, face_mesh_pool
+    server = VisionWorkerServer(EyeTrackerService(device=args.device))
+
+    async def run():
+        # Warm the camera's FaceMesh while already accepting connections
+        asyncio.get_running_loop().run_in_executor(None, face_mesh_pool.warm, 1)
+        await server.serve(device_address(args.address, args.device), default_authkey())
+
+    asyncio.run(run())
+
+
+if __name__ == "__main__":
+    main()
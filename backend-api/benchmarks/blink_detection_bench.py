@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+"""
+Offline blink detection benchmark: per-frame state machine vs. vectorized detector
+
+Generates synthetic EAR sessions, checks both detectors agree, and times a
+parameter sweep (EAR thresholds x CONSEC_FRAMES) over all sessions.
+
+Usage (from backend-api/):
+    python benchmarks/blink_detection_bench.py --sessions 1000 --frames 9000
+"""
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import argparse
+import json
+import time
+
+import numpy as np
+
+from app.blink_detection import BlinkStateMachine, detect_blinks
+
+
+def synthetic_session(rng, frames):
+    ear = rng.normal(0.3, 0.02, frames).astype(np.float32)
+    for start in rng.integers(0, frames, frames // 100):
+        ear[start:start + rng.integers(1, 6)] = rng.uniform(0.1, 0.24)
+    return ear
+
+
+def count_online(ear, ear_thresh, consec_frames):
+    detector = BlinkStateMachine(ear_thresh, consec_frames)
+    for value in ear.tolist():
+        detector.update(value)
+    return detector.blink_count
+
+
+def count_vectorized(ear, ear_thresh, consec_frames):
+    return len(detect_blinks(ear, ear_thresh, consec_frames)[0])
+
+
+def time_sweep(count, sessions, thresholds, consec_values):
+    start = time.perf_counter()
+    totals = [[sum(count(ear, t, c) for ear in sessions) for c in consec_values] for t in thresholds]
+    return time.perf_counter() - start, totals
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare online and vectorized blink detection")
+    parser.add_argument("--sessions", type=int, default=1000)
+    parser.add_argument("--frames", type=int, default=9000, help="Frames per session (9000 = 5 min at 30 FPS)")
+    parser.add_argument("--online-sessions", type=int, default=20,
+                        help="Sessions to time with the per-frame detector (extrapolated)")
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    sessions = [synthetic_session(rng, args.frames) for _ in range(args.sessions)]
+    thresholds = np.round(np.arange(0.18, 0.30, 0.01), 2).tolist()
+    consec_values = [1, 2, 3]
+    sample = sessions[:args.online_sessions]
+
+    online_s, online_totals = time_sweep(count_online, sample, thresholds, consec_values)
+    vector_sample_s, vector_totals = time_sweep(count_vectorized, sample, thresholds, consec_values)
+    assert online_totals == vector_totals, "vectorized detector disagrees with the online state machine"
+    vector_s, _ = time_sweep(count_vectorized, sessions, thresholds, consec_values)
+
+    scale = args.sessions / len(sample)
+    print(json.dumps({
+        "benchmark": "blink_detection_sweep",
+        "sessions": args.sessions,
+        "frames_per_session": args.frames,
+        "parameter_combinations": len(thresholds) * len(consec_values),
+        "online_s_extrapolated": round(online_s * scale, 2),
+        "vectorized_s": round(vector_s, 2),
+        "speedup": round(online_s / vector_sample_s, 1),
+    }, indent=2))
+
+
+if __name__ == "__main__":
+    main()
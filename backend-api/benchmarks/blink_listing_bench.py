@@ -0,0 +1,149 @@
+#!/usr/bin/env python3
+"""
+/blinks/user serialization benchmark: ORM + Pydantic + json vs. the lean path
+
+For each history size, fills a scratch SQLite database (or --database-url)
+with one user's rows and reports, for both ways of producing the response
+body:
+
+- orm: BlinkData objects -> List[BlinkDataOut] via orm_mode -> json.dumps,
+  as FastAPI did for the endpoint before
+- lean: (id, blink_count, timestamp) tuples in chunks -> blink_listing_json
+
+the latency (best of --runs) and the peak Python memory (tracemalloc, in a
+separate run so tracing doesn't skew the timing), plus the body size and the
+time to gzip it at levels 6 and 9.
+
+Usage (from backend-api/):
+    python benchmarks/blink_listing_bench.py
+    python benchmarks/blink_listing_bench.py --rows 10000,100000 --runs 5 --output listing_bench.json
+"""
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import argparse
+import gzip
+import json
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Benchmark /blinks/user response serialization")
+    parser.add_argument("--rows", default="10000,100000,1000000", help="Comma-separated history sizes")
+    parser.add_argument("--runs", type=int, default=3, help="Timed runs per path; the best is reported")
+    parser.add_argument("--database-url", default=None, help="Database to run against (default: scratch SQLite)")
+    parser.add_argument("--output", default=None, help="Write the JSON report to this file")
+    return parser.parse_args()
+
+
+args = parse_args() if __name__ == "__main__" else None
+
+# The app reads DATABASE_URL at import time
+if args and args.database_url:
+    os.environ["DATABASE_URL"] = args.database_url
+else:
+    _DB_PATH = os.path.join(tempfile.mkdtemp(prefix="listing_bench_"), "bench.db")
+    os.environ.setdefault("DATABASE_URL", f"sqlite:///{_DB_PATH}")
+
+from typing import List
+
+from pydantic import TypeAdapter
+
+from app import crud, models, schemas
+from app.blink_listing import blink_listing_json
+from app.database import SessionLocal, engine
+
+BLINKS = TypeAdapter(List[schemas.BlinkDataOut])
+
+
+def orm_body(db, user_id):
+    """What FastAPI produced from response_model=List[BlinkDataOut] and JSONResponse"""
+    blinks = db.query(models.BlinkData).filter(models.BlinkData.user_id == user_id) \
+        .order_by(models.BlinkData.timestamp.desc()).all()
+    content = BLINKS.dump_python(BLINKS.validate_python(blinks, from_attributes=True), mode="json")
+    return json.dumps(content, ensure_ascii=False, allow_nan=False, indent=None, separators=(",", ":")).encode()
+
+
+def lean_body(db, user_id):
+    return blink_listing_json(crud.iter_blink_rows_for_user(db, user_id), user_id)
+
+
+def fill(user_id, rows):
+    start = datetime(2024, 1, 1)
+    db = SessionLocal()
+    try:
+        for offset in range(0, rows, 50000):
+            db.bulk_insert_mappings(models.BlinkData, [
+                {"user_id": user_id, "blink_count": i % 60, "timestamp": start + timedelta(seconds=10 * i, microseconds=i)}
+                for i in range(offset, min(rows, offset + 50000))
+            ])
+            db.commit()
+    finally:
+        db.close()
+
+
+def measure(path, user_id, runs):
+    best = float("inf")
+    for _ in range(runs):
+        db = SessionLocal()
+        try:
+            started = time.perf_counter()
+            body = path(db, user_id)
+            best = min(best, time.perf_counter() - started)
+        finally:
+            db.close()
+    db = SessionLocal()
+    try:
+        tracemalloc.start()
+        path(db, user_id)
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+    finally:
+        db.close()
+    return body, {"latency_ms": round(best * 1000, 1), "peak_mb": round(peak / 2 ** 20, 1)}
+
+
+def gzip_stats(body):
+    stats = {}
+    for level in (6, 9):
+        started = time.perf_counter()
+        size = len(gzip.compress(body, compresslevel=level))
+        stats[f"level_{level}"] = {"ms": round((time.perf_counter() - started) * 1000, 1), "kb": round(size / 1024, 1)}
+    return stats
+
+
+def main():
+    models.Base.metadata.create_all(bind=engine)
+    results = []
+    for user_id, rows in enumerate(int(r) for r in args.rows.split(",")):
+        user_id += 1
+        fill(user_id, rows)
+        orm, orm_stats = measure(orm_body, user_id, args.runs)
+        lean, lean_stats = measure(lean_body, user_id, args.runs)
+        assert json.loads(orm) == json.loads(lean), "lean body differs from the ORM body"
+        result = {
+            "rows": rows,
+            "orm": orm_stats,
+            "lean": lean_stats,
+            "speedup": round(orm_stats["latency_ms"] / max(lean_stats["latency_ms"], 0.1), 1),
+            "body_kb": round(len(lean) / 1024, 1),
+            "gzip": gzip_stats(lean),
+        }
+        results.append(result)
+        print(f"{rows:>8} rows: orm {orm_stats['latency_ms']} ms / {orm_stats['peak_mb']} MB, "
+              f"lean {lean_stats['latency_ms']} ms / {lean_stats['peak_mb']} MB, "
+              f"{result['body_kb']} KB -> {result['gzip']['level_6']['kb']} KB gzipped")
+
+    report = {"database": os.environ["DATABASE_URL"].split(":")[0], "results": results}
+    print(json.dumps(report, indent=2))
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+"""
+frame_data message benchmark: one message per frame vs. change-driven sending
+
+Replays a synthetic tracking session (30 FPS, one face, a blink every few
+seconds) through the frame_data message the tracker builds each frame and
+reports, with and without a video preview:
+
+- messages per second sent every frame vs. through FrameDataFilter
+- serialization CPU per second of session for json.dumps vs. frame_messages.dumps
+
+Usage (from backend-api/):
+    python benchmarks/frame_messages_bench.py --seconds 60
+    python benchmarks/frame_messages_bench.py --video-kbytes 30 --preview-fps 10
+"""
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import argparse
+import base64
+import json
+import time
+from datetime import datetime
+
+import numpy as np
+
+from app.blink_detection import BlinkStateMachine
+from app.frame_messages import FrameDataFilter, dumps
+
+FPS = 30
+
+
+def synthetic_session(seconds, rng):
+    """Per-frame open/closed EARs with a two-frame blink every 3-5 seconds"""
+    ears = rng.normal(0.3, 0.01, size=int(seconds * FPS))
+    frame = int(rng.uniform(3, 5) * FPS)
+    while frame < len(ears) - 2:
+        ears[frame:frame + 2] = 0.15
+        frame += int(rng.uniform(3, 5) * FPS)
+    return ears
+
+
+def frame_messages(ears, video_frame=None, preview_fps=FPS):
+    """(time, message, has_video) for every frame, as the tracker's loop builds them"""
+    detector = BlinkStateMachine(0.25, 1)
+    next_preview_at = 0.0
+    for i, ear in enumerate(ears):
+        now = i / FPS
+        detector.update(float(ear))
+        message = {
+            "type": "frame_data",
+            "blink_count": detector.blink_count,
+            "ear_threshold": 0.25,
+            "frame_counter": detector.frame_counter,
+            "calibrating": False,
+            "faces": [{"id": 0, "blink_count": detector.blink_count, "ear": round(float(ear), 4), "visible": True}],
+            "frame_age_ms": 1.2,
+        }
+        video = video_frame is not None and now >= next_preview_at
+        if video:
+            next_preview_at = now + 1.0 / preview_fps - 0.5 / FPS
+        yield now, message, video
+
+
+def finish(message, video, video_frame):
+    message = dict(message, timestamp=datetime.now().isoformat())
+    if video:
+        message["video_frame"] = video_frame
+    return message
+
+
+def serialize_cpu(messages, encode, repeat):
+    start = time.process_time()
+    for _ in range(repeat):
+        for message in messages:
+            encode(message)
+    return (time.process_time() - start) / repeat
+
+
+def main():
+    parser = argparse.ArgumentParser(description="frame_data message counts and serialization CPU")
+    parser.add_argument("--seconds", type=float, default=60.0, help="Length of the synthetic session")
+    parser.add_argument("--video-kbytes", type=float, default=30.0, help="Size of each base64 video frame")
+    parser.add_argument("--preview-fps", type=float, default=10.0, help="Preview frame rate")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    ears = synthetic_session(args.seconds, rng)
+    video_frame = base64.b64encode(rng.bytes(int(args.video_kbytes * 1024 * 3 / 4))).decode("ascii")
+
+    rows = []
+    for label, frame in (("no video", None), (f"video {args.preview_fps:g} FPS", video_frame)):
+        frames = list(frame_messages(ears, frame, args.preview_fps))
+        # Before: every frame was sent; video frames only on preview-rate frames
+        every = [finish(message, video, frame) for _, message, video in frames]
+        frame_filter = FrameDataFilter()
+        changed = [finish(message, video, frame) for now, message, video in frames
+                   if frame_filter.should_send(message, now, video)]
+        before = serialize_cpu(every, json.dumps, args.repeat)
+        after = serialize_cpu(changed, dumps, args.repeat)
+        rows.append({
+            "preview": label,
+            "messages_per_s_before": round(len(every) / args.seconds, 1),
+            "messages_per_s_after": round(len(changed) / args.seconds, 1),
+            "serialize_ms_per_s_before": round(before * 1000.0 / args.seconds, 3),
+            "serialize_ms_per_s_after": round(after * 1000.0 / args.seconds, 3),
+            "dumps_speedup_vs_json": round(serialize_cpu(changed, json.dumps, args.repeat) / after, 1),
+        })
+    print(json.dumps(rows, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+#!/usr/bin/env python3
+"""
+Cold-start import-time measurement for the API
+
+Each sample runs in a fresh interpreter so module caches don't hide the cost.
+Reports the time to import `app.main` (what every REST worker and the test
+suite pays) and the one-off cost of loading the vision stack, which now only
+happens when the first tracking session starts.
+
+Usage (from backend-api/):
+    python benchmarks/import_time.py --runs 5
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+
+import numpy as np
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+SNIPPETS = {
+    "import_app_main": (
+        "import time, sys\n"
+        "t = time.perf_counter()\n"
+        "import app.main\n"
+        "print(time.perf_counter() - t)\n"
+        "assert 'mediapipe' not in sys.modules, 'vision stack imported eagerly'\n"
+    ),
+    "load_vision_stack": (
+        "import time\n"
+        "import app.main\n"
+        "from app.eye_tracker_service import load_vision_stack\n"
+        "t = time.perf_counter()\n"
+        "load_vision_stack()\n"
+        "print(time.perf_counter() - t)\n"
+    ),
+}
+
+
+def sample(snippet, env):
+    out = subprocess.run([sys.executable, "-c", snippet], cwd=BACKEND_DIR, env=env,
+                         capture_output=True, text=True, check=True)
+    return float(out.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure API cold-start import time")
+    parser.add_argument("--runs", type=int, default=5, help="Fresh interpreters per measurement")
+    args = parser.parse_args()
+
+    env = dict(os.environ)
+    env.setdefault("DATABASE_URL", f"sqlite:///{os.path.join(tempfile.mkdtemp(prefix='import_time_'), 'db.sqlite')}")
+
+    report = {"benchmark": "import_time", "runs": args.runs}
+    for name, snippet in SNIPPETS.items():
+        samples = np.asarray([sample(snippet, env) for _ in range(args.runs)]) * 1000.0
+        report[name] = {
+            "median_ms": round(float(np.median(samples)), 1),
+            "min_ms": round(float(samples.min()), 1),
+            "max_ms": round(float(samples.max()), 1),
+        }
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+"""
+Multi-face EAR benchmark: per-face scalar EAR vs. one batched call per frame
+
+Builds synthetic FaceMesh landmark lists for 1..N faces and times the per-frame
+eye work the tracker does after FaceMesh (landmark extraction, EAR, track
+matching and per-face blink state), reporting frames/s as the face count grows.
+FaceMesh itself is not included; its cost grows with faces independently.
+
+Usage (from backend-api/):
+    python benchmarks/multi_face_bench.py --max-faces 8 --frames 2000
+"""
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import argparse
+import json
+import time
+from types import SimpleNamespace
+
+import numpy as np
+
+from app.blink_detection import BlinkStateMachine
+from app.face_tracks import FaceTracker, batch_ear, eye_points, LEFT_EYE, RIGHT_EYE
+
+WIDTH, HEIGHT = 640, 480
+
+
+def synthetic_faces(rng, count):
+    faces = []
+    for f in range(count):
+        offset = np.array([(f + 0.5) / count, 0.5])
+        points = offset + rng.normal(0, 0.02, size=(478, 2))
+        faces.append(SimpleNamespace(landmark=[SimpleNamespace(x=x, y=y) for x, y in points]))
+    return faces
+
+
+def per_face_loop(faces, detectors):
+    """The single-face code path repeated for every face"""
+    def ear_of(eye):
+        dist = lambda a, b: np.linalg.norm(np.array(eye[a]) - np.array(eye[b]))
+        return (dist(1, 5) + dist(2, 4)) / (2.0 * dist(0, 3))
+
+    for face, detector in zip(faces, detectors):
+        left = [(int(face.landmark[i].x * WIDTH), int(face.landmark[i].y * HEIGHT)) for i in LEFT_EYE]
+        right = [(int(face.landmark[i].x * WIDTH), int(face.landmark[i].y * HEIGHT)) for i in RIGHT_EYE]
+        detector.update((ear_of(left) + ear_of(right)) / 2.0)
+
+
+def batched(faces, tracker):
+    eyes = eye_points(faces, WIDTH, HEIGHT)
+    ears = batch_ear(eyes).mean(axis=1)
+    ids = tracker.match(eyes.reshape(len(eyes), -1, 2).mean(axis=1) / (WIDTH, HEIGHT))
+    tracker.update(ids, ears)
+
+
+def fps(fn, frames):
+    start = time.perf_counter()
+    for _ in range(frames):
+        fn()
+    return frames / (time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Per-frame multi-face EAR throughput")
+    parser.add_argument("--max-faces", type=int, default=8)
+    parser.add_argument("--frames", type=int, default=2000)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    rows = []
+    for count in range(1, args.max_faces + 1):
+        faces = synthetic_faces(rng, count)
+        detectors = [BlinkStateMachine() for _ in faces]
+        tracker = FaceTracker(0.25, 1)
+        loop_fps = fps(lambda: per_face_loop(faces, detectors), args.frames)
+        batch_fps = fps(lambda: batched(faces, tracker), args.frames)
+        assert len(tracker.tracks) == count, "tracks should stay stable on static faces"
+        rows.append({"faces": count, "per_face_fps": round(loop_fps), "batched_fps": round(batch_fps),
+                     "speedup": round(batch_fps / loop_fps, 2)})
+    print(json.dumps(rows, indent=2))
+
+
+if __name__ == "__main__":
+    main()
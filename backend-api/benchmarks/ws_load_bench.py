@@ -0,0 +1,338 @@
+#!/usr/bin/env python3
+"""
+WebSocket load-test harness for /ws/eye-tracker/{token}
+
+Runs the real FastAPI app in-process (uvicorn on a background thread, SQLite
+database) with a fake frame source instead of the webcam, opens N concurrent
+tracking sessions and reports, for each N:
+
+- message inter-arrival time and jitter (std-dev of inter-arrival)
+- inference-to-client latency: frame_data timestamp, stamped once FaceMesh has
+  run, to client receive (add frame age for the time since camera grab)
+- frame age at inference (camera grab -> FaceMesh input)
+- server event-loop thread CPU
+- database write rate
+- session start: WebSocket connect -> first frame_data, with FaceMesh graphs
+  warmed up front (as at service start) or built per session (--cold-face-mesh)
+
+Usage (from backend-api/):
+    python benchmarks/ws_load_bench.py --sessions 1,2,4,8 --duration 10
+    python benchmarks/ws_load_bench.py --video sample.mp4 --output ws_load.json
+    python benchmarks/ws_load_bench.py --sessions 4 --preview '{"width": 320, "height": 240, "quality": 50, "fps": 10}'
+    python benchmarks/ws_load_bench.py --sessions 1 --viewers 3
+    python benchmarks/ws_load_bench.py --sessions 1,1,1 --duration 2 --cold-face-mesh
+"""
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import argparse
+import asyncio
+import json
+import logging
+import socket
+import tempfile
+import threading
+import time
+from datetime import datetime
+
+import numpy as np
+
+# The app reads DATABASE_URL at import time, so point it at a scratch SQLite
+# file before anything from `app` is imported.
+_DB_PATH = os.path.join(tempfile.mkdtemp(prefix="ws_load_"), "load.db")
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{_DB_PATH}")
+
+import cv2
+import uvicorn
+import websockets
+from sqlalchemy import event
+
+from app import main, models, schemas, crud, auth, database
+from app.eye_tracker_service import EyeTrackerService, face_mesh_pool
+
+
+class FakeCamera:
+    """VideoCapture stand-in that serves synthetic frames or loops a video file"""
+
+    def __init__(self, video_path=None, width=640, height=480):
+        self.video = cv2.VideoCapture(video_path) if video_path else None
+        rng = np.random.default_rng(0)
+        self.frame = rng.integers(0, 255, (height, width, 3), dtype=np.uint8)
+        self.opened = True
+
+    def isOpened(self):
+        return self.opened
+
+    def set(self, prop, value):
+        return True
+
+    def read(self, image=None):
+        if self.video is not None:
+            ret, frame = self.video.read(image)
+            if not ret:
+                self.video.set(cv2.CAP_PROP_POS_FRAMES, 0)
+                ret, frame = self.video.read(image)
+            return ret, frame
+        if image is None:
+            return True, self.frame.copy()
+        image[...] = self.frame
+        return True, image
+
+    def release(self):
+        self.opened = False
+        if self.video is not None:
+            self.video.release()
+
+
+class PerSessionTrackers:
+    """Replaces the global tracker so every WebSocket session gets its own pipeline"""
+
+    def __init__(self, capture_factory):
+        self.capture_factory = capture_factory
+        self.trackers = set()
+        self.preview = {}
+
+    async def start_tracking(self, callback, send_video=True, **session):
+        tracker = EyeTrackerService(capture_factory=lambda: self.open_camera(tracker))
+        self.trackers.add(tracker)
+        try:
+            return await tracker.start_tracking(callback, send_video, **session)
+        finally:
+            self.trackers.discard(tracker)
+
+    def open_camera(self, tracker):
+        # start_tracking has just reset the tracker's preview; a session's preview_settings
+        # may have arrived before its tracker existed, so apply them now
+        if self.preview:
+            tracker.configure_preview(**self.preview)
+        return self.capture_factory()
+
+    def stop_tracking(self):
+        # A level's sessions all end together, so stopping one session's hub stops them all;
+        # each tracker then winds down and reports its summary like the real one
+        for tracker in list(self.trackers):
+            tracker.stop_tracking()
+
+    def configure_preview(self, **settings):
+        # Every load-test session asks for the same --preview, so apply it to all of them
+        self.preview.update(settings)
+        for tracker in self.trackers:
+            tracker.configure_preview(**settings)
+
+
+class ServerThread(threading.Thread):
+    """Runs uvicorn for the app on a background thread"""
+
+    def __init__(self, port):
+        super().__init__(daemon=True)
+        config = uvicorn.Config(main.app, host="127.0.0.1", port=port, log_level="warning", ws_max_size=2 ** 24)
+        self.server = uvicorn.Server(config)
+
+    def run(self):
+        self.server.run()
+
+    def cpu_seconds(self):
+        """CPU time consumed by the server's event-loop thread"""
+        return time.clock_gettime(time.pthread_getcpuclockid(self.ident))
+
+
+class DBWriteCounter:
+    """Counts INSERT/UPDATE/DELETE statements executed on the app engine"""
+
+    def __init__(self, engine):
+        self.writes = 0
+        event.listen(engine, "after_cursor_execute", self._on_execute)
+
+    def _on_execute(self, conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip()[:6].upper() in ("INSERT", "UPDATE", "DELETE"):
+            self.writes += 1
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def percentiles(values):
+    if not values:
+        return {"p50": None, "p95": None, "p99": None, "max": None}
+    arr = np.asarray(values) * 1000.0
+    p50, p95, p99 = np.percentile(arr, [50, 95, 99])
+    return {"p50": round(p50, 2), "p95": round(p95, 2), "p99": round(p99, 2), "max": round(arr.max(), 2)}
+
+
+def create_tokens(count):
+    """Create load-test users directly in the database and issue their JWTs"""
+    db = database.SessionLocal()
+    try:
+        tokens = []
+        for i in range(count):
+            email = f"load_{i}@example.com"
+            if crud.get_user_by_email(db, email) is None:
+                crud.create_user(db, schemas.UserCreate(email=email, password="loadtest123", consent=True))
+            tokens.append(auth.create_access_token(data={"sub": email}))
+        return tokens
+    finally:
+        db.close()
+
+
+async def run_session(url, deadline, stats, preview=None, started=None, join=None):
+    """Hold one tracking session open until `deadline` (perf_counter), recording arrivals
+
+    `started` is set on the first frame_data; a viewer waits for its session's `join` event.
+    """
+    if join is not None:
+        await join.wait()
+    arrivals = []
+    latencies = []
+    frame_ages = []
+    received_bytes = 0
+    connecting = time.perf_counter()
+    async with websockets.connect(url, max_size=None) as ws:
+        if preview:
+            await ws.send(json.dumps(dict(preview, type="preview_settings")))
+        while True:
+            remaining = deadline - time.perf_counter()
+            if remaining <= 0:
+                break
+            try:
+                raw = await asyncio.wait_for(ws.recv(), timeout=remaining)
+            except asyncio.TimeoutError:
+                break
+            now = time.perf_counter()
+            received_bytes += len(raw)
+            data = json.loads(raw)
+            if data.get("error"):
+                stats["errors"].append(data["error"])
+                break
+            if data.get("type") != "frame_data":
+                continue
+            if started is not None:
+                started.set()
+            if not arrivals:
+                stats["starts"].append(now - connecting)
+            arrivals.append(now)
+            sent_at = datetime.fromisoformat(data["timestamp"]).timestamp()
+            latencies.append(time.time() - sent_at)
+            if "frame_age_ms" in data:
+                frame_ages.append(data["frame_age_ms"] / 1000.0)
+    gaps = np.diff(arrivals).tolist() if len(arrivals) > 1 else []
+    stats["messages"] += len(arrivals)
+    stats["gaps"].extend(gaps)
+    stats["latencies"].extend(latencies)
+    stats["frame_ages"].extend(frame_ages)
+    stats["bytes"] += received_bytes
+    if gaps:
+        stats["session_jitter"].append(float(np.std(gaps)))
+
+
+def new_stats():
+    return {"bytes": 0, "messages": 0, "gaps": [], "latencies": [], "frame_ages": [], "session_jitter": [],
+            "starts": [], "errors": []}
+
+
+async def run_level(server, db_counter, tokens, port, sessions, duration, preview=None, viewers=0):
+    stats = new_stats()
+    viewer_stats = new_stats()
+    urls = [f"ws://127.0.0.1:{port}/ws/eye-tracker/{tokens[i]}" for i in range(sessions)]
+
+    cpu_start = server.cpu_seconds()
+    writes_start = db_counter.writes
+    wall_start = time.perf_counter()
+    deadline = wall_start + duration
+    started = [asyncio.Event() for _ in urls]
+    # Viewers join each session through the broadcast hub once it is streaming
+    watchers = [run_session(url + "?watch=true", deadline, viewer_stats, join=event)
+                for url, event in zip(urls, started) for _ in range(viewers)]
+    await asyncio.gather(*(run_session(url, deadline, stats, preview, started=event)
+                           for url, event in zip(urls, started)), *watchers)
+    wall = time.perf_counter() - wall_start
+    cpu = server.cpu_seconds() - cpu_start
+    writes = db_counter.writes - writes_start
+
+    # Let the server finish tearing down the sessions before the next level
+    await asyncio.sleep(0.5)
+
+    return {
+        "sessions": sessions,
+        "duration_s": round(wall, 2),
+        "messages": stats["messages"],
+        "messages_per_s": round(stats["messages"] / wall, 1),
+        "per_session_fps": round(stats["messages"] / wall / sessions, 1),
+        "per_session_kbytes_per_s": round(stats["bytes"] / 1024.0 / wall / sessions, 1),
+        "inter_arrival_ms": percentiles(stats["gaps"]),
+        "jitter_ms": round(float(np.mean(stats["session_jitter"])) * 1000.0, 2) if stats["session_jitter"] else None,
+        "inference_to_client_ms": percentiles(stats["latencies"]),
+        "frame_age_ms": percentiles(stats["frame_ages"]),
+        "session_start_ms": percentiles(stats["starts"]),
+        "server_cpu_percent": round(cpu / wall * 100.0, 1),
+        "db_writes": writes,
+        "db_writes_per_s": round(writes / wall, 1),
+        "viewers_per_session": viewers,
+        "viewer_messages_per_s": round(viewer_stats["messages"] / wall, 1),
+        "viewer_inference_to_client_ms": percentiles(viewer_stats["latencies"]),
+        "errors": stats["errors"] + viewer_stats["errors"],
+    }
+
+
+async def run(args):
+    models.Base.metadata.create_all(bind=database.engine)
+    main.eye_tracker_service = PerSessionTrackers(lambda: FakeCamera(args.video))
+
+    levels = [int(n) for n in args.sessions.split(",")]
+    tokens = create_tokens(max(levels))
+    # One warm FaceMesh per concurrent session, as the service does per camera at startup;
+    # cold builds a fresh one for every session like before the pool existed
+    face_mesh_pool.warm(0 if args.cold_face_mesh else max(levels))
+    db_counter = DBWriteCounter(database.engine)
+
+    port = free_port()
+    server = ServerThread(port)
+    server.start()
+    while not server.server.started:
+        await asyncio.sleep(0.05)
+
+    results = []
+    try:
+        for sessions in levels:
+            print(f"🚦 Running {sessions} concurrent session(s) for {args.duration}s...")
+            result = await run_level(server, db_counter, tokens, port, sessions, args.duration, args.preview,
+                                     args.viewers)
+            print(f"   {result['messages_per_s']} msg/s, {result['per_session_fps']} fps/session, "
+                  f"inference-to-client p95 {result['inference_to_client_ms']['p95']} ms, start p50 {result['session_start_ms']['p50']} ms, "
+                  f"CPU {result['server_cpu_percent']}%, "
+                  f"{result['db_writes_per_s']} DB writes/s")
+            results.append(result)
+    finally:
+        server.server.should_exit = True
+        server.join(timeout=5)
+    return results
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Load test the eye tracker WebSocket endpoint")
+    parser.add_argument("--sessions", default="1,2,4,8", help="Comma-separated concurrency levels")
+    parser.add_argument("--duration", type=float, default=10.0, help="Seconds to hold each level")
+    parser.add_argument("--video", default=None, help="Loop this video file instead of synthetic frames")
+    parser.add_argument("--preview", type=json.loads, default=None,
+                        help='Preview settings each session requests, e.g. \'{"width": 320, "height": 240, "fps": 10}\'')
+    parser.add_argument("--viewers", type=int, default=0,
+                        help="Extra ?watch=true connections per session, sharing its pipeline")
+    parser.add_argument("--cold-face-mesh", action="store_true",
+                        help="Build a new FaceMesh per session instead of leasing warm ones")
+    parser.add_argument("--output", default=None, help="Write the JSON report to this file")
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    # The app logs every frame at INFO; keep the report readable
+    logging.getLogger().setLevel(os.environ.get("LOG_LEVEL", "WARNING"))
+    report = {"benchmark": "ws_load", "results": asyncio.run(run(args))}
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(output)
+    print(output)
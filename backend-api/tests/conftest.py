@@ -0,0 +1,72 @@
+"""
+Fixtures and fakes shared by the test modules
+"""
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app import auth, main, models
+
+
+@pytest.fixture
+def db_sessions():
+    """Session factory for a fresh in-memory database"""
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    models.Base.metadata.create_all(bind=engine)
+    return sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+
+@pytest.fixture
+def api(db_sessions):
+    """TestClient for the app on the db_sessions database, logged in as user 1"""
+    def get_db():
+        db = db_sessions()
+        try:
+            yield db
+        finally:
+            db.close()
+
+    # Other modules install their own overrides at import time; put those back afterwards
+    saved = dict(main.app.dependency_overrides)
+    main.app.dependency_overrides[main.get_db] = get_db
+    main.app.dependency_overrides[auth.get_current_user] = lambda: SimpleNamespace(id=1)
+    yield TestClient(main.app)
+    main.app.dependency_overrides.clear()
+    main.app.dependency_overrides.update(saved)
+
+
+class FakeCamera:
+    """VideoCapture stand-in returning the same noise frame; counts opens and records release()"""
+    opened = 0
+
+    def __init__(self, works=True):
+        FakeCamera.opened += 1
+        self.works = works
+        self.released = False
+        self.settings = {}
+        self.frame = np.random.default_rng(0).integers(0, 255, (480, 640, 3), dtype=np.uint8)
+
+    def isOpened(self):
+        return self.works and not self.released
+
+    def set(self, prop, value):
+        self.settings[prop] = value
+        return True
+
+    def read(self, image=None):
+        if image is None:
+            return True, self.frame.copy()
+        image[...] = self.frame
+        return True, image
+
+    def release(self):
+        self.released = True
@@ -0,0 +1,63 @@
+"""
+Tests for the online blink state machine and the vectorized offline detector
+"""
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+import pytest
+
+from app.blink_detection import BlinkStateMachine, detect_blinks
+from app.ear_history import EAR_BLINK
+
+
+def online(ear, ear_thresh, consec_frames, cooldown_frames):
+    detector = BlinkStateMachine(ear_thresh, consec_frames, cooldown_frames)
+    indices, durations = [], []
+    for i, value in enumerate(ear):
+        run_before = detector.frame_counter
+        if detector.update(value) & EAR_BLINK:
+            indices.append(i)
+            durations.append(run_before)
+    return np.array(indices, dtype=np.intp), np.array(durations, dtype=np.intp)
+
+
+def random_ear(rng, frames):
+    """Mostly-open EAR with closed runs of random length, jitter and dropped faces"""
+    ear = rng.normal(0.3, 0.02, frames)
+    for start in rng.integers(0, frames, frames // 15):
+        ear[start:start + rng.integers(1, 6)] = rng.uniform(0.1, 0.26)
+    ear[rng.random(frames) < 0.01] = np.nan
+    return ear
+
+
+def test_state_machine_counts_on_reopen_with_cooldown():
+    detector = BlinkStateMachine(ear_thresh=0.25, consec_frames=1, cooldown_frames=3)
+    # closed, open (blink), closed, open (inside cooldown), ..., closed, open (blink)
+    for ear in [0.2, 0.3, 0.2, 0.3, 0.3, 0.3, 0.2, 0.3]:
+        detector.update(ear)
+    assert detector.blink_count == 2
+
+
+@pytest.mark.parametrize("seed", range(20))
+@pytest.mark.parametrize("consec_frames,cooldown_frames", [(1, 3), (2, 3), (3, 0), (1, 6)])
+def test_vectorized_matches_online(seed, consec_frames, cooldown_frames):
+    rng = np.random.default_rng(seed)
+    ear = random_ear(rng, 3000)
+    ear_thresh = rng.uniform(0.2, 0.28)
+
+    expected = online(ear, ear_thresh, consec_frames, cooldown_frames)
+    indices, durations = detect_blinks(ear, ear_thresh, consec_frames, cooldown_frames)
+    np.testing.assert_array_equal(indices, expected[0])
+    np.testing.assert_array_equal(durations, expected[1])
+
+
+def test_run_without_reopen_is_not_counted():
+    indices, _ = detect_blinks(np.array([0.3, 0.2, 0.2]), 0.25, 1)
+    assert len(indices) == 0
+
+
+def test_rejects_zero_consec_frames():
+    with pytest.raises(ValueError):
+        detect_blinks(np.array([0.3]), 0.25, 0)
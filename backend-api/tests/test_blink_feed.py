@@ -0,0 +1,94 @@
+"""
+Tests for the live blink data stream (Server-Sent Events)
+"""
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import asyncio
+import json
+from datetime import datetime
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app import blink_feed, crud, main, schemas
+from app.blink_feed import BlinkFeed, blink_events, rollup_deltas
+
+
+@pytest.fixture
+def db_sessions(db_sessions, monkeypatch):
+    monkeypatch.setattr(blink_feed, "SessionLocal", db_sessions)
+    monkeypatch.setattr(crud, "SETTLE_SECONDS", 0)
+    return db_sessions
+
+
+def store(sessions, user_id, blink_count, timestamp=None):
+    db = sessions()
+    try:
+        return crud.create_blink_data(db, user_id, schemas.BlinkDataCreate(blink_count=blink_count, timestamp=timestamp)).id
+    finally:
+        db.close()
+
+
+def parse(event):
+    fields = dict(line.split(": ", 1) for line in event.strip().splitlines())
+    return fields["event"], int(fields["id"]), json.loads(fields["data"])
+
+
+def test_rollup_deltas_bucket_rows_by_minute():
+    timestamps = [datetime(2024, 1, 1, 9, 0, 10), datetime(2024, 1, 1, 9, 0, 50), datetime(2024, 1, 1, 9, 1, 5)]
+    rows = [{"blink_count": 4}, {"blink_count": 7}, {"blink_count": 2}]
+    assert rollup_deltas(rows, timestamps) == [
+        {"minute": "2024-01-01T09:00:00", "samples": 2, "max_blink_count": 7},
+        {"minute": "2024-01-01T09:01:00", "samples": 1, "max_blink_count": 2},
+    ]
+
+
+def test_stream_pushes_only_rows_stored_after_connecting(db_sessions):
+    store(db_sessions, 1, 3)
+    feed = BlinkFeed()
+
+    async def run():
+        events = blink_events(1, None, feed=feed, poll_interval=10.0, batch_delay=0)
+        assert (await anext(events)).startswith("retry:")
+        ready = parse(await anext(events))
+        assert await anext(events) == ": keepalive\n\n"
+        # A notification wakes the stream well before its poll interval
+        next_event = asyncio.ensure_future(anext(events))
+        store(db_sessions, 2, 9)  # Another user's row isn't sent
+        new_id = store(db_sessions, 1, 5)
+        feed.notify(1)
+        pushed = parse(await asyncio.wait_for(next_event, 1.0))
+        await events.aclose()
+        return ready, pushed, new_id
+
+    ready, pushed, new_id = asyncio.run(run())
+    assert ready == ("ready", 1, {"cursor": 1})
+    event, cursor, data = pushed
+    assert (event, cursor) == ("blinks", new_id)
+    assert [(row["id"], row["blink_count"]) for row in data["blinks"]] == [(new_id, 5)]
+    assert [(r["samples"], r["max_blink_count"]) for r in data["rollups"]] == [(1, 5)]
+    assert not feed.waiters
+
+
+def test_stream_resumes_after_cursor(db_sessions):
+    ids = [store(db_sessions, 1, n) for n in range(4)]
+
+    async def run():
+        events = blink_events(1, ids[1], feed=BlinkFeed(), poll_interval=10.0)
+        await anext(events)
+        await anext(events)
+        event = parse(await anext(events))
+        await events.aclose()
+        return event
+
+    event, cursor, data = asyncio.run(run())
+    assert (event, cursor) == ("blinks", ids[-1])
+    assert [row["id"] for row in data["blinks"]] == ids[2:]
+
+
+def test_stream_requires_auth():
+    client = TestClient(main.app)
+    assert client.get("/blinks/user/stream").status_code == 401
+    assert client.get("/blinks/user/stream?access_token=not-a-jwt").status_code == 401
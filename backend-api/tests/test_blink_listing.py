@@ -0,0 +1,65 @@
+"""
+Tests for the lean /blinks/user encoding and response compression
+"""
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import json
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
+from typing import List
+
+import pytest
+from pydantic import TypeAdapter
+
+from app import blink_listing, crud, schemas
+from app.blink_listing import blink_listing_json
+
+ROWS = [
+    (3, 7, datetime(2024, 1, 1, 9, 0, 0, 123456)),
+    (2, 0, datetime(2024, 1, 1, 8, 59)),
+    (1, 12, datetime(2024, 1, 1, 8, 58, tzinfo=timezone(timedelta(hours=5, minutes=30)))),
+]
+
+
+def pydantic_json(rows, user_id):
+    """What response_model=List[BlinkDataOut] produced"""
+    adapter = TypeAdapter(List[schemas.BlinkDataOut])
+    blinks = [SimpleNamespace(id=i, blink_count=c, timestamp=t, user_id=user_id) for i, c, t in rows]
+    return adapter.dump_json(adapter.validate_python(blinks, from_attributes=True))
+
+
+@pytest.mark.parametrize("use_orjson", [True, False])
+def test_lean_json_matches_pydantic_output(monkeypatch, use_orjson):
+    if not use_orjson:
+        monkeypatch.setattr(blink_listing, "orjson", None)
+    # Chunk boundaries don't show in the output
+    monkeypatch.setattr(blink_listing, "CHUNK_ROWS", 2)
+    assert json.loads(blink_listing_json(ROWS, 5)) == json.loads(pydantic_json(ROWS, 5))
+    assert blink_listing_json([], 5) == b"[]"
+
+
+@pytest.fixture
+def client(db_sessions, api):
+    db = db_sessions()
+    for i in range(500):
+        crud.create_blink_data(db, 1, schemas.BlinkDataCreate(blink_count=i, timestamp=datetime(2024, 1, 1) + timedelta(minutes=i)))
+    db.close()
+    return api
+
+
+def test_listing_is_newest_first_and_gzipped(client):
+    response = client.get("/blinks/user", headers={"Accept-Encoding": "gzip"})
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/json"
+    assert response.headers["content-encoding"] == "gzip"
+    blinks = response.json()  # httpx decompresses
+    assert len(blinks) == 500
+    assert [b["blink_count"] for b in blinks[:2]] == [499, 498]
+    assert set(blinks[0]) == {"id", "user_id", "blink_count", "timestamp"}
+
+
+def test_small_responses_are_not_compressed(client):
+    response = client.get("/", headers={"Accept-Encoding": "gzip"})
+    assert "content-encoding" not in response.headers
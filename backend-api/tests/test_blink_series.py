@@ -0,0 +1,81 @@
+"""
+Tests for LTTB downsampling and the blink series endpoint
+"""
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from datetime import datetime, timedelta
+
+import numpy as np
+import pytest
+
+from app import crud, models, schemas
+from app.blink_series import lttb, downsample
+
+
+def test_lttb_keeps_endpoints_and_extremes():
+    x = np.arange(10_000, dtype=np.float64)
+    y = np.sin(x / 500)
+    y[4321], y[7777] = 40.0, -40.0
+    kept = lttb(x, y, 100)
+    assert len(kept) == 100
+    assert kept[0] == 0 and kept[-1] == len(x) - 1
+    assert np.all(np.diff(kept) > 0)
+    assert {4321, 7777} <= set(kept.tolist())
+
+
+def test_lttb_returns_short_series_unchanged():
+    assert lttb(np.arange(5.0), np.zeros(5), 10).tolist() == [0, 1, 2, 3, 4]
+    with pytest.raises(ValueError):
+        lttb(np.arange(5.0), np.zeros(5), 2)
+
+
+def test_downsample_keeps_timestamps_with_their_counts():
+    start = datetime(2024, 1, 1)
+    seconds = [0, 1, 2, 3, 600, 601, 602]
+    rows = [(start + timedelta(seconds=s), n) for s, n in zip(seconds, [0, 0, 0, 0, 30, 0, 0])]
+    timestamps, counts = downsample(rows, 3)
+    assert counts == [0, 30, 0]
+    assert timestamps == [rows[0][0], start + timedelta(seconds=600), rows[-1][0]]
+    assert downsample([], 10) == ([], [])
+
+
+@pytest.fixture
+def client(db_sessions, api, monkeypatch):
+    monkeypatch.setattr(crud, "SETTLE_SECONDS", 0)
+    db = db_sessions()
+    start = datetime(2024, 1, 1)
+    for i in range(2000):
+        crud.create_blink_data(db, 1, schemas.BlinkDataCreate(blink_count=i % 50, timestamp=start + timedelta(seconds=i)))
+    db.close()
+    return api
+
+
+def test_series_endpoint_is_bounded_by_points(client):
+    data = client.get("/blinks/user/series?points=100").json()
+    assert data["samples"] == 2000
+    assert data["cursor"] == 2000
+    assert len(data["timestamps"]) == len(data["blink_counts"]) == 100
+    assert max(data["blink_counts"]) == 49
+
+
+def test_series_endpoint_filters_range(client):
+    data = client.get("/blinks/user/series?from=2024-01-01T00:10:00&to=2024-01-01T00:11:00").json()
+    assert data["samples"] == 61
+    assert data["timestamps"][0] == "2024-01-01T00:10:00"
+    assert client.get("/blinks/user/series?from=2024-01-02T00:00:00&to=2024-01-01T00:00:00").status_code == 400
+    assert client.get("/blinks/user/series?points=2").status_code == 422
+
+
+def test_series_stops_at_the_settled_cursor(client, db_sessions, monkeypatch):
+    db = db_sessions()
+    db.query(models.BlinkData).update({models.BlinkData.created_at: datetime(2024, 1, 1)})
+    db.commit()
+    crud.create_blink_data(db, 1, schemas.BlinkDataCreate(blink_count=99))  # Still settling
+    db.close()
+    monkeypatch.setattr(crud, "SETTLE_SECONDS", 60)
+    data = client.get("/blinks/user/series?points=100").json()
+    # The new row reaches the dashboard through the stream after `cursor`, not twice
+    assert data["cursor"] == 2000 and data["samples"] == 2000
+    assert 99 not in data["blink_counts"]
@@ -0,0 +1,48 @@
+"""
+Tests for the streaming quantile estimator and per-user EAR calibration
+"""
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+import pytest
+
+from app.calibration import P2Quantile, EarCalibrator, MIN_EAR_THRESH, MAX_EAR_THRESH
+
+
+@pytest.mark.parametrize("p", [0.1, 0.5, 0.9])
+def test_p2_tracks_numpy_quantile(p):
+    values = np.random.default_rng(3).normal(0.3, 0.03, 5000)
+    estimator = P2Quantile(p)
+    for v in values:
+        estimator.add(float(v))
+    assert estimator.value() == pytest.approx(np.quantile(values, p), abs=0.003)
+
+
+def test_p2_with_fewer_than_five_samples():
+    estimator = P2Quantile(0.5)
+    assert estimator.value() is None
+    for v in (0.3, 0.1, 0.2):
+        estimator.add(v)
+    assert estimator.value() == 0.2
+
+
+def test_calibrator_ignores_blinks_and_missing_frames():
+    rng = np.random.default_rng(5)
+    ear = rng.normal(0.30, 0.01, 90)
+    ear[::15] = 0.08  # a few blinks during calibration
+    calibrator = EarCalibrator(frames=90)
+    results = [calibrator.update(float("nan"))] + [calibrator.update(float(v)) for v in ear]
+    assert results[:-1] == [None] * 90
+    assert calibrator.done
+    assert results[-1] == pytest.approx(0.30 * 0.8, abs=0.01)
+    assert calibrator.update(0.3) is None
+
+
+@pytest.mark.parametrize("open_ear, expected", [(0.05, MIN_EAR_THRESH), (0.9, MAX_EAR_THRESH)])
+def test_calibrator_clamps_threshold(open_ear, expected):
+    calibrator = EarCalibrator(frames=10)
+    for _ in range(10):
+        threshold = calibrator.update(open_ear)
+    assert threshold == expected
@@ -0,0 +1,147 @@
+"""
+Tests for keeping the camera open across sessions with an idle timeout
+"""
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import asyncio
+import threading
+import time
+
+from app.camera_manager import CameraManager
+from app.eye_tracker_service import EyeTrackerService
+from conftest import FakeCamera
+
+
+def test_camera_is_reused_until_idle_timeout():
+    configured = []
+    manager = CameraManager(FakeCamera, idle_timeout=0.05, configure=configured.append)
+
+    async def run():
+        first = await manager.acquire()
+        manager.release()
+        assert manager.is_open and manager.status()["camera_idle_s"] is not None
+        second = await manager.acquire()  # Back-to-back session: same handle, no reconfiguration
+        assert second is first and configured == [first]
+        manager.release()
+        await asyncio.sleep(0.1)
+        return first
+
+    camera = asyncio.run(run())
+    assert camera.released and not manager.is_open
+    assert (manager.opens, manager.reuses) == (1, 1)
+    assert manager.status() == {"camera_open": False, "camera_idle_s": None}
+
+
+def test_zero_timeout_releases_at_once_and_unopenable_camera_is_released():
+    manager = CameraManager(FakeCamera, idle_timeout=0)
+
+    async def run():
+        camera = await manager.acquire()
+        manager.release()
+        return camera
+
+    assert asyncio.run(run()).released and not manager.is_open
+
+    broken = CameraManager(lambda: FakeCamera(works=False), idle_timeout=10)
+    assert asyncio.run(broken.acquire()) is None and not broken.is_open
+
+
+def test_device_is_opened_off_the_event_loop_once_for_concurrent_sessions():
+    threads = []
+
+    def open_camera():
+        threads.append(threading.current_thread())
+        time.sleep(0.1)
+        return FakeCamera()
+
+    manager = CameraManager(open_camera, idle_timeout=10)
+
+    async def run():
+        first, second = await asyncio.gather(manager.acquire(), manager.acquire())
+        manager.close()
+        return first, second
+
+    first, second = asyncio.run(run())
+    assert first is second and len(threads) == 1 and threads[0] is not threading.main_thread()
+    assert (manager.opens, manager.reuses) == (1, 1)
+
+
+def test_back_to_back_sessions_open_the_device_once():
+    FakeCamera.opened = 0
+    tracker = EyeTrackerService(capture_factory=FakeCamera, camera_idle_timeout=0.2)
+
+    async def callback(message):
+        if message["type"] == "frame_data":
+            tracker.stop_tracking()
+
+    async def run():
+        for _ in range(2):
+            result = await asyncio.wait_for(tracker.start_tracking(callback, send_video=False), timeout=60)
+            assert result["success"]
+        status = await tracker.device_status()
+        await asyncio.sleep(0.3)
+        return status, await tracker.device_status()
+
+    between, after = asyncio.run(run())
+    assert FakeCamera.opened == 1
+    assert between["camera_open"] and not between["is_running"]
+    assert not after["camera_open"]
+
+
+def test_superseded_session_leaves_the_new_session_running():
+    tracker = EyeTrackerService(capture_factory=FakeCamera, camera_idle_timeout=10)
+    second = []
+
+    async def first_callback(message):
+        if message["type"] == "frame_data" and not second:
+            second.append(asyncio.create_task(tracker.start_tracking(second_callback, send_video=False)))
+            await asyncio.sleep(0.5)  # Still sending when the new session takes over
+
+    async def second_callback(message):
+        pass
+
+    async def run():
+        await asyncio.wait_for(tracker.start_tracking(first_callback, send_video=False), timeout=60)
+        for _ in range(100):
+            if tracker.grabber is not None:
+                break
+            await asyncio.sleep(0.05)
+        # The first session's cleanup didn't stop the second one or release its camera
+        running = tracker.is_running, tracker.grabber is not None, tracker.camera.in_use
+        tracker.stop_tracking()
+        result = await asyncio.wait_for(second[0], timeout=60)
+        tracker.camera.close()
+        return running, result
+
+    running, result = asyncio.run(run())
+    assert running == (True, True, True)
+    assert result["success"]
+
+
+def test_stop_leaves_a_read_in_progress_to_finish_off_the_event_loop():
+    class SlowCamera(FakeCamera):
+        def read(self, image=None):
+            time.sleep(0.3)  # Grabber thread spends most of its time inside read()
+            return super().read(image)
+
+    tracker = EyeTrackerService(capture_factory=SlowCamera, camera_idle_timeout=10)
+    stop_took = []
+
+    async def callback(message):
+        if message["type"] == "frame_data" and not stop_took:
+            started = time.perf_counter()
+            tracker.stop_tracking()
+            stop_took.append(time.perf_counter() - started)
+
+    async def run():
+        result = await asyncio.wait_for(tracker.start_tracking(callback, send_video=False), timeout=60)
+        camera = tracker.camera.cap
+        tracker.camera.close()
+        return result, camera
+
+    result, camera = asyncio.run(run())
+    assert result["success"] and stop_took[0] < 0.1
+    # The read returned within the join timeout, so the camera was kept for reuse rather than detached
+    assert camera is not None and camera.released
@@ -0,0 +1,83 @@
+"""
+Tests for ETag / Last-Modified conditional GET on blink listings
+"""
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from datetime import datetime
+
+import pytest
+
+from app import crud, schemas
+
+
+@pytest.fixture
+def client(db_sessions, api, monkeypatch):
+    monkeypatch.setattr(crud, "SETTLE_SECONDS", 0)
+
+    def store(blink_count, timestamp=datetime(2024, 1, 1, 15, 30), created_at=None):
+        db = db_sessions()
+        blink = crud.create_blink_data(db, 1, schemas.BlinkDataCreate(blink_count=blink_count, timestamp=timestamp))
+        if created_at is not None:
+            blink.created_at = created_at
+            db.commit()
+        db.close()
+
+    return api, store
+
+
+@pytest.mark.parametrize("url", ["/blinks/user", "/blinks/user/series"])
+def test_matching_etag_gets_304_until_a_row_is_added(client, url):
+    client, store = client
+    store(3)
+    first = client.get(url)
+    assert first.status_code == 200
+    etag = first.headers["etag"]
+    assert first.headers["cache-control"] == "private, no-cache"
+
+    again = client.get(url, headers={"If-None-Match": etag})
+    assert again.status_code == 304
+    assert again.content == b""
+    assert again.headers["etag"] == etag
+
+    store(4)
+    changed = client.get(url, headers={"If-None-Match": etag})
+    assert changed.status_code == 200
+    assert changed.headers["etag"] != etag
+
+
+def test_last_modified_is_when_the_newest_row_was_stored(client):
+    client, store = client
+    store(3, created_at=datetime(2024, 1, 2, 8, 0, 0, 500000))
+    response = client.get("/blinks/user")
+    assert response.headers["last-modified"] == "Tue, 02 Jan 2024 08:00:00 GMT"
+
+    # A row recorded earlier on the client but stored later is still a change
+    store(4, timestamp=datetime(2023, 12, 31, 9, 0), created_at=datetime(2024, 1, 2, 9, 0))
+    since = {"If-Modified-Since": response.headers["last-modified"]}
+    assert client.get("/blinks/user", headers=since).status_code == 200
+    assert client.get("/blinks/user", headers={"If-Modified-Since": "Wed, 01 Jan 2031 00:00:00 GMT"}).status_code == 200
+    stale = dict(since, **{"If-None-Match": response.headers["etag"]})
+    assert client.get("/blinks/user", headers=stale).status_code == 200
+
+
+def test_empty_history_has_etag_but_no_last_modified(client):
+    client, _ = client
+    response = client.get("/blinks/user")
+    assert response.json() == []
+    assert "last-modified" not in response.headers
+    assert client.get("/blinks/user", headers={"If-None-Match": response.headers["etag"]}).status_code == 304
+
+
+def test_etag_ignores_rows_that_may_still_be_committing(client, monkeypatch):
+    client, store = client
+    store(3, created_at=datetime(2024, 1, 2, 8, 0))
+    etag = client.get("/blinks/user").headers["etag"]
+    monkeypatch.setattr(crud, "SETTLE_SECONDS", 60)
+    store(4)  # Just stored: a lower id from a concurrent writer may still be on its way
+    response = client.get("/blinks/user", headers={"If-None-Match": etag})
+    # The ETag only moves once the row has settled
+    assert response.status_code == 304
+    monkeypatch.setattr(crud, "SETTLE_SECONDS", 0)
+    assert client.get("/blinks/user", headers={"If-None-Match": etag}).status_code == 200
@@ -0,0 +1,57 @@
+"""
+Tests for the camera device pool and the device listing endpoint
+"""
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from types import SimpleNamespace
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app import main, auth
+from app.devices import DeviceManager
+from app.eye_tracker_service import EyeTrackerService, FrameLoopStats
+
+
+def test_pool_is_sized_to_cores_and_shares_devices_round_robin():
+    manager = DeviceManager([0, 1, 2, 3, 4], "/tmp/vision.sock", authkey=b"k", workers=2)
+    assert manager.workers == 2
+    assert manager.assignment(0) == [0, 2, 4]
+    assert manager.assignment(1) == [1, 3]
+    # Never more workers than devices
+    assert DeviceManager([0], "/tmp/vision.sock", authkey=b"k", workers=8).workers == 1
+
+
+def test_frame_loop_stats_reports_per_window():
+    stats = FrameLoopStats(window=0.0)
+    stats.since -= 1.0
+    stats.add_frame(0.25)
+    assert stats.fps == pytest.approx(1.0, rel=0.1)
+    assert stats.cpu_percent == pytest.approx(25.0, rel=0.1)
+
+
+@pytest.fixture
+def two_cameras(monkeypatch):
+    second = EyeTrackerService(device=3)
+    monkeypatch.setattr(main.config, "CAMERA_DEVICES", [0, 3])
+    monkeypatch.setattr(main, "device_trackers", {3: second})
+    main.app.dependency_overrides[auth.get_current_user] = lambda: SimpleNamespace(id=1)
+    yield second
+    main.app.dependency_overrides.pop(auth.get_current_user, None)
+
+
+def test_devices_endpoint_lists_each_camera(two_cameras):
+    two_cameras.stats.fps = 29.5
+    response = TestClient(main.app).get("/eye-tracker/devices")
+    assert response.status_code == 200
+    devices = response.json()
+    assert [d["device"] for d in devices] == [0, 3]
+    assert devices[1]["fps"] == 29.5
+    assert all(d["is_running"] is False for d in devices)
+
+
+def test_stop_unknown_device(two_cameras):
+    assert TestClient(main.app).post("/eye-tracker/stop?device=7").status_code == 404
+    assert TestClient(main.app).post("/eye-tracker/stop?device=3").status_code == 200
@@ -0,0 +1,101 @@
+"""
+Tests for the per-session EAR ring buffer and its query endpoint
+"""
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+from fastapi.testclient import TestClient
+
+from app import main, auth
+from app.ear_history import EarHistory, EAR_FACE, EAR_CLOSED, EAR_BLINK, decimate
+
+
+def fill(history, count, start=0.0, fps=30.0):
+    for i in range(count):
+        history.append(start + i / fps, 0.3, 0.3, EAR_FACE)
+
+
+def test_ring_keeps_most_recent_samples_in_order():
+    history = EarHistory(capacity=5)
+    for i in range(8):
+        history.append(float(i), 0.3, 0.3, 0)
+    assert history.count == 8
+    assert history.ordered()["t"].tolist() == [3.0, 4.0, 5.0, 6.0, 7.0]
+
+
+def test_window_is_measured_from_newest_sample():
+    history = EarHistory(capacity=100)
+    fill(history, 90)  # 3 seconds at 30 FPS
+    window = history.window(1.0)
+    assert len(window) in (30, 31)
+    assert window["t"][-1] == pytest.approx(89 / 30.0)
+
+
+def test_decimation_keeps_blink_dips_and_flags():
+    history = EarHistory(capacity=1000)
+    fill(history, 600)
+    history.samples["left"][300] = 0.1
+    history.samples["flags"][300] = EAR_FACE | EAR_CLOSED | EAR_BLINK
+
+    out = decimate(history.window(60.0), 50)
+    assert len(out) == 50
+    assert out["left"].min() == pytest.approx(0.1)
+    assert np.any(out["flags"] & EAR_BLINK)
+
+
+def test_query_bounds_points_and_maps_missing_face_to_null():
+    history = EarHistory(capacity=1000)
+    fill(history, 500)
+    history.append(20.0, np.nan, np.nan, 0)
+
+    result = history.query(seconds=60.0, points=100)
+    assert result["samples"] == 501
+    assert len(result["t"]) <= 100
+
+    result = history.query(seconds=60.0, points=1000)
+    assert len(result["t"]) == 501
+    assert result["t"][-1] == 0.0
+    assert result["left_ear"][-1] is None
+    assert result["left_ear"][0] == pytest.approx(0.3)
+    assert result["flags"][-1] == 0
+
+
+@pytest.fixture
+def client_as_user():
+    tracker = main.eye_tracker_service
+    saved = (tracker.ear_history, tracker.session_user_id)
+    tracker.ear_history = EarHistory(capacity=300)
+    fill(tracker.ear_history, 300)
+    tracker.session_user_id = 1
+
+    def as_user(user_id):
+        main.app.dependency_overrides[auth.get_current_user] = lambda: SimpleNamespace(id=user_id)
+        return TestClient(main.app)
+
+    yield as_user
+    main.app.dependency_overrides.pop(auth.get_current_user, None)
+    tracker.ear_history, tracker.session_user_id = saved
+
+
+def test_endpoint_returns_decimated_window(client_as_user):
+    response = client_as_user(1).get("/eye-tracker/ear-history?seconds=5&points=40")
+    assert response.status_code == 200
+    data = response.json()
+    assert data["samples"] == 151
+    assert len(data["t"]) <= 40
+    assert data["ear_threshold"] == main.eye_tracker_service.EAR_THRESH
+
+
+def test_endpoint_hides_other_users_sessions(client_as_user):
+    response = client_as_user(2).get("/eye-tracker/ear-history")
+    assert response.status_code == 404
+
+
+def test_endpoint_requires_auth():
+    response = TestClient(main.app).get("/eye-tracker/ear-history")
+    assert response.status_code == 401
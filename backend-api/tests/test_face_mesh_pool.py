@@ -0,0 +1,87 @@
+"""
+Tests for the warm FaceMesh pool
+"""
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import asyncio
+
+from app import eye_tracker_service
+from app.eye_tracker_service import EyeTrackerService
+from app.face_mesh_pool import FaceMeshPool
+from conftest import FakeCamera
+
+
+class FakeMesh:
+    def __init__(self):
+        self.frames = 0
+        self.resets = 0
+        self.closed = False
+
+    def process(self, image):
+        self.frames += 1
+
+    def reset(self):
+        self.resets += 1
+
+    def close(self):
+        self.closed = True
+
+
+def test_warm_builds_instances_with_a_frame_through_each():
+    pool = FaceMeshPool(FakeMesh)
+    pool.warm(2)
+    assert len(pool.idle) == 2
+    assert all(mesh.frames == 1 and mesh.resets == 1 for mesh in pool.idle)
+    pool.warm(2)  # Already full
+    assert len(pool.idle) == 2
+
+
+def test_leases_reuse_warm_instances_and_reset_them_on_return():
+    pool = FaceMeshPool(FakeMesh, size=1)
+    pool.warm()
+    first = pool.acquire()
+    second = pool.acquire()  # Pool empty: built on demand
+    assert (pool.hits, pool.misses) == (1, 1)
+
+    pool.release(first)
+    pool.release(second)  # Over size: closed instead of kept
+    assert pool.idle == [first] and first.resets == 2
+    assert second.closed and not first.closed
+    assert pool.acquire() is first
+
+
+def test_instance_that_fails_to_reset_is_discarded():
+    class BrokenMesh(FakeMesh):
+        def reset(self):
+            if self.frames > 1:
+                raise RuntimeError("graph error")
+
+    pool = FaceMeshPool(BrokenMesh)
+    mesh = pool.acquire()
+    mesh.process(None)
+    pool.release(mesh)
+    assert pool.idle == [] and mesh.closed and pool.leased == 0
+
+
+def test_back_to_back_sessions_share_a_warm_face_mesh(monkeypatch):
+    pool = FaceMeshPool(eye_tracker_service.create_face_mesh)
+    monkeypatch.setattr(eye_tracker_service, "face_mesh_pool", pool)
+    pool.warm()
+    tracker = EyeTrackerService(capture_factory=FakeCamera)
+    start_ms = []
+
+    async def callback(message):
+        if message["type"] == "frame_data":
+            tracker.stop_tracking()
+
+    for _ in range(2):
+        result = asyncio.run(asyncio.wait_for(tracker.start_tracking(callback, send_video=False), timeout=60))
+        assert result["success"]
+        start_ms.append(tracker.start_ms)
+
+    assert (pool.hits, pool.misses) == (2, 0)
+    assert len(pool.idle) == 1 and pool.leased == 0
+    assert all(ms is not None and ms > 0 for ms in start_ms)
+    pool.close()
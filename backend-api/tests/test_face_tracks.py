@@ -0,0 +1,67 @@
+"""
+Tests for batched EAR and multi-face track assignment
+"""
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+
+from app.face_tracks import FaceTracker, batch_ear, eye_points, EYE_LANDMARKS
+
+
+def scalar_ear(eye):
+    dist = lambda a, b: np.linalg.norm(np.array(eye[a]) - np.array(eye[b]))
+    return (dist(1, 5) + dist(2, 4)) / (2.0 * dist(0, 3))
+
+
+def test_batch_ear_matches_per_eye_formula():
+    eyes = np.random.default_rng(1).integers(0, 640, size=(5, 2, 6, 2))
+    expected = np.array([[scalar_ear(eye) for eye in face] for face in eyes])
+    np.testing.assert_allclose(batch_ear(eyes), expected)
+
+
+def test_eye_points_reads_landmarks_in_eye_order():
+    landmark = [SimpleNamespace(x=i / 1000, y=i / 2000) for i in range(478)]
+    eyes = eye_points([SimpleNamespace(landmark=landmark)], 1000, 2000)
+    assert eyes.shape == (1, 2, 6, 2)
+    assert eyes[0].reshape(-1, 2)[:, 0].tolist() == EYE_LANDMARKS
+    assert eyes[0].reshape(-1, 2)[:, 1].tolist() == EYE_LANDMARKS
+
+
+def test_track_ids_follow_faces_when_order_changes():
+    tracker = FaceTracker(0.25, 1)
+    a, b = np.array([0.2, 0.5]), np.array([0.7, 0.5])
+    assert tracker.match(np.array([a, b])) == [0, 1]
+    # FaceMesh reports them the other way round and both moved a little
+    assert tracker.match(np.array([b + 0.02, a - 0.02])) == [1, 0]
+
+
+def test_per_face_blink_counts():
+    tracker = FaceTracker(0.25, 1)
+    centroids = np.array([[0.2, 0.5], [0.7, 0.5]])
+    for ears in ([0.3, 0.3], [0.1, 0.3], [0.3, 0.3], [0.3, 0.1], [0.3, 0.1], [0.3, 0.3]):
+        tracker.update(tracker.match(centroids), np.array(ears))
+    assert [(f["id"], f["blink_count"]) for f in tracker.summary()] == [(0, 1), (1, 1)]
+
+
+def test_lost_face_gets_a_new_id_after_max_missed():
+    tracker = FaceTracker(0.25, 1, max_missed=2)
+    face = np.array([[0.5, 0.5]])
+    assert tracker.match(face) == [0]
+    tracker.match(np.empty((0, 2)))
+    assert tracker.summary()[0]["visible"] is False
+    assert tracker.match(face) == [0]
+    for _ in range(3):
+        tracker.match(np.empty((0, 2)))
+    assert tracker.tracks == {}
+    assert tracker.match(face) == [1]
+
+
+def test_distant_face_starts_a_new_track():
+    tracker = FaceTracker(0.25, 1, max_distance=0.1)
+    tracker.match(np.array([[0.2, 0.5]]))
+    assert tracker.match(np.array([[0.8, 0.5]])) == [1]
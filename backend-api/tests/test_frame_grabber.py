@@ -0,0 +1,122 @@
+"""
+Tests for the latest-frame camera grabber
+"""
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import asyncio
+import threading
+import time
+
+import numpy as np
+
+from app.frame_grabber import LatestFrameGrabber
+
+
+class CountingCamera:
+    """Stamps a frame counter into each frame; fails after `limit` reads"""
+
+    def __init__(self, limit=None):
+        self.count = 0
+        self.limit = limit
+
+    def read(self, image=None):
+        if self.limit is not None and self.count >= self.limit:
+            return False, None
+        if image is None:
+            image = np.zeros((4, 4, 3), dtype=np.uint8)
+        image[0, 0, 0] = self.count % 256
+        self.count += 1
+        return True, image
+
+
+def test_slow_consumer_gets_newest_frame_and_skips_are_counted():
+    async def run():
+        camera = CountingCamera()
+        grabber = LatestFrameGrabber(camera, fps=500)
+        assert grabber.start()
+        assert grabber.shape == (4, 4, 3)
+        assert await grabber.next_frame() is not None
+
+        await asyncio.sleep(0.1)  # Inference "falls behind"
+        frame, captured_at = await grabber.next_frame()
+        newest = (camera.count - 1) % 256
+        grabber.stop()
+        assert frame[0, 0, 0] in (newest, (newest - 1) % 256)
+        assert grabber.skipped > 10
+        assert grabber.frames == camera.count
+        assert time.monotonic() - captured_at < 0.1
+
+    asyncio.run(run())
+
+
+def test_taken_frame_is_not_overwritten_until_next_take():
+    async def run():
+        grabber = LatestFrameGrabber(CountingCamera(), fps=500)
+        grabber.start()
+        await asyncio.sleep(0.02)
+        frame, _ = await grabber.next_frame()
+        value = int(frame[0, 0, 0])
+        await asyncio.sleep(0.05)
+        assert frame[0, 0, 0] == value
+        grabber.stop()
+
+    asyncio.run(run())
+
+
+def test_camera_failure_ends_the_stream():
+    async def run():
+        grabber = LatestFrameGrabber(CountingCamera(limit=3), fps=500)
+        assert grabber.start()
+        frames = 0
+        while await grabber.next_frame(timeout=1.0) is not None:
+            frames += 1
+        assert grabber.failed
+        assert 1 <= frames <= 3
+        grabber.stop()
+
+    asyncio.run(run())
+
+
+def test_stop_wakes_a_waiting_consumer():
+    async def run():
+        grabber = LatestFrameGrabber(CountingCamera(), fps=1)
+        grabber.start()
+        await grabber.next_frame()
+        asyncio.get_running_loop().call_later(0.05, grabber.stop)
+        started = time.monotonic()
+        assert await grabber.next_frame(timeout=5.0) is None
+        assert time.monotonic() - started < 1.5
+
+    asyncio.run(run())
+
+
+def test_capture_blocked_in_read_is_released_only_once_the_read_returns():
+    class StuckCamera(CountingCamera):
+        def __init__(self):
+            super().__init__()
+            self.unblock = threading.Event()
+            self.released = False
+
+        def read(self, image=None):
+            if self.count >= 1:
+                self.unblock.wait()
+                self.reading_after_release = self.released
+            return super().read(image)
+
+        def release(self):
+            self.released = True
+
+    async def run():
+        camera = StuckCamera()
+        grabber = LatestFrameGrabber(camera, fps=500)
+        grabber.start()
+        assert not grabber.stop(timeout=0.05)
+        grabber.release_on_exit()
+        assert not camera.released
+        camera.unblock.set()
+        assert grabber.exited.wait(1.0)
+        assert camera.released and not camera.reading_after_release
+
+    asyncio.run(run())
@@ -0,0 +1,55 @@
+"""
+Tests for change-driven frame_data messages and their JSON encoding
+"""
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import json
+
+import numpy as np
+
+from app import frame_messages
+from app.frame_messages import FrameDataFilter, dumps
+
+
+def frame_data(blink_count=0, frame_counter=0, ear=0.3, visible=True):
+    return {
+        "type": "frame_data",
+        "blink_count": blink_count,
+        "ear_threshold": 0.25,
+        "frame_counter": frame_counter,
+        "calibrating": False,
+        "faces": [{"id": 0, "blink_count": blink_count, "ear": ear, "visible": visible}],
+        "frame_age_ms": 1.0,
+    }
+
+
+def test_unchanged_frames_are_suppressed_until_heartbeat():
+    frame_filter = FrameDataFilter(heartbeat=1.0)
+    sent = [t for t in np.arange(0, 3, 1 / 30) if frame_filter.should_send(frame_data(ear=0.3 + t / 100), t)]
+    # First frame, then one heartbeat per second; live EAR changes alone don't count
+    assert len(sent) == 3
+    assert frame_filter.suppressed == 90 - 3
+
+
+def test_state_changes_and_video_frames_are_sent():
+    frame_filter = FrameDataFilter(heartbeat=10.0)
+    assert frame_filter.should_send(frame_data(), 0.0)
+    assert not frame_filter.should_send(frame_data(), 0.1)
+    assert frame_filter.should_send(frame_data(frame_counter=1), 0.2)
+    assert frame_filter.should_send(frame_data(blink_count=1), 0.3)
+    assert frame_filter.should_send(frame_data(blink_count=1, visible=False), 0.4)
+    assert not frame_filter.should_send(frame_data(blink_count=1, visible=False), 0.5)
+    assert frame_filter.should_send(frame_data(blink_count=1, visible=False), 0.6, video=True)
+
+
+def test_dumps_matches_json_and_accepts_numpy_scalars():
+    message = dict(frame_data(), ear_threshold=np.float64(0.21), frame_counter=np.int64(2))
+    assert json.loads(dumps(message)) == json.loads(json.dumps(message, default=lambda v: v.item()))
+
+
+def test_dumps_falls_back_to_json(monkeypatch):
+    monkeypatch.setattr(frame_messages, "orjson", None)
+    message = dict(frame_data(), frame_counter=np.int64(2))
+    assert json.loads(dumps(message))["frame_counter"] == 2
@@ -0,0 +1,84 @@
+"""
+Tests for the pipelined inference / render + encode stages
+"""
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import asyncio
+import threading
+import time
+
+import pytest
+
+from app.frame_pipeline import FramePipeline, OrderedSender
+
+
+def test_ordered_sender_holds_messages_until_their_turn():
+    sent = []
+
+    async def send(message):
+        sent.append(message["n"])
+
+    async def run():
+        sender = OrderedSender(send)
+        await sender.put(2, {"n": 2})
+        await sender.put(1, {"n": 1})
+        assert sent == []
+        await sender.put(0, {"n": 0})
+        assert sent == [0, 1, 2]
+
+    asyncio.run(run())
+
+
+@pytest.mark.parametrize("threaded", [True, False])
+def test_pipeline_sends_in_submission_order(threaded):
+    sent = []
+
+    async def send(message):
+        sent.append(message)
+
+    def render_after(delay, n):
+        def render():
+            time.sleep(delay)
+            return f"frame-{n}-{threading.current_thread().name}"
+        return render
+
+    async def run():
+        pipeline = FramePipeline(send, threaded=threaded)
+        for n in range(6):
+            # Slow renders for even frames, plain messages mixed in
+            render = render_after(0.02 if n % 2 == 0 else 0.0, n) if n != 3 else None
+            await pipeline.submit({"n": n}, render)
+        await pipeline.drain()
+        await pipeline.close()
+
+    asyncio.run(run())
+    assert [m["n"] for m in sent] == list(range(6))
+    assert "video_frame" not in sent[3]
+    assert sent[0]["video_frame"].startswith("frame-0-")
+    assert ("frame-encode" in sent[0]["video_frame"]) is threaded
+
+
+def test_inference_runs_off_the_event_loop_when_threaded():
+    async def run():
+        pipeline = FramePipeline(lambda message: None, threaded=True)
+        name = await pipeline.infer(lambda: threading.current_thread().name)
+        await pipeline.close()
+        return name
+
+    assert asyncio.run(run()).startswith("frame-infer")
+
+
+def test_send_error_is_reported():
+    async def send(message):
+        raise ConnectionError("client went away")
+
+    async def run():
+        pipeline = FramePipeline(send, threaded=True)
+        await pipeline.submit({"n": 0}, lambda: "jpeg")
+        await pipeline.drain()
+        await pipeline.close()
+        return pipeline.error
+
+    assert isinstance(asyncio.run(run()), ConnectionError)
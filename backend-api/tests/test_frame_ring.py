@@ -0,0 +1,100 @@
+"""
+Tests for the shared-memory frame ring buffer
+"""
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+import pytest
+
+from app.frame_ring import FrameRing
+
+SHAPE = (4, 6, 3)
+
+
+@pytest.fixture
+def ring():
+    ring = FrameRing(slots=3, shape=SHAPE, readers=2)
+    yield ring
+    ring.close()
+
+
+def write(ring, value):
+    slot = ring.claim()
+    assert slot is not None
+    ring.frame(slot)[...] = value
+    return ring.publish(slot)
+
+
+def test_frames_pass_by_slot_in_order(ring):
+    assert ring.next_for(0) is None
+    assert write(ring, 1) == 0
+    assert write(ring, 2) == 1
+
+    seq, slot = ring.next_for(0)
+    assert seq == 0
+    assert ring.sequence(slot) == 0
+    assert ring.frame(slot).max() == 1
+    ring.release(0, seq)
+
+    seq, slot = ring.next_for(0)
+    assert seq == 1
+    assert ring.frame(slot).max() == 2
+
+
+def test_writer_cannot_overrun_slowest_reader(ring):
+    for value in range(3):
+        write(ring, value)
+    # Reader 0 is done with everything, reader 1 still holds frame 0
+    ring.release(0, 2)
+    assert ring.claim() is None
+
+    ring.release(1, 0)
+    assert ring.claim() == 0
+    assert ring.pending(1) == 2
+
+
+def test_latest_for_skips_stale_frames(ring):
+    for value in range(3):
+        write(ring, value)
+    seq, slot, skipped = ring.latest_for(0)
+    assert (seq, skipped) == (2, 2)
+    assert ring.frame(slot).max() == 2
+    ring.release(0, seq)
+    assert ring.latest_for(0) is None
+
+
+def test_attach_shares_pixels_without_copying(ring):
+    other = FrameRing.attach(ring.name, slots=3, shape=SHAPE, readers=2)
+    try:
+        seq = write(ring, 7)
+        entry = other.next_for(1)
+        assert entry == (seq, 0)
+        other.frame(0)[0, 0, 0] = 42
+        assert ring.frame(0)[0, 0, 0] == 42
+        assert np.shares_memory(ring.frame(0), ring.frame(0))
+    finally:
+        other.close()
+
+
+def test_rejects_single_slot():
+    with pytest.raises(ValueError):
+        FrameRing(slots=1, shape=SHAPE)
+
+
+def test_close_keeps_memory_mapped_while_a_frame_view_is_held():
+    ring = FrameRing(slots=2, shape=SHAPE)
+    slot = ring.claim()
+    view = ring.frame(slot)
+    view[...] = 7
+    ring.publish(slot)
+    ring.close()
+
+    # Still readable and writable: the mapping outlives close() while the view exists
+    assert view.max() == 7
+    view[...] = 9
+    assert ring.shm.buf is not None
+
+    del view
+    assert ring.shm.buf is None  # Unmapped with the last view
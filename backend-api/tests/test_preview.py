@@ -0,0 +1,90 @@
+"""
+Tests for live video preview settings (resolution, JPEG quality, preview FPS)
+"""
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import asyncio
+import base64
+from datetime import datetime
+
+import cv2
+import numpy as np
+import pytest
+from pydantic import ValidationError
+
+from app import schemas
+from app.eye_tracker_service import EyeTrackerService, DEFAULT_PREVIEW
+from conftest import FakeCamera
+
+
+@pytest.mark.parametrize("width, height, expected", [
+    (0, 0, None),
+    (320, 240, (320, 240)),
+    (320, 0, (320, 240)),
+    (0, 120, (160, 120)),
+    (1280, 960, None),  # never upscale
+])
+def test_preview_size(width, height, expected):
+    tracker = EyeTrackerService()
+    assert tracker.preview_size((480, 640, 3), dict(DEFAULT_PREVIEW, width=width, height=height)) == expected
+
+
+def test_preview_settings_validation():
+    assert schemas.PreviewSettings(type="preview_settings", width=320).width == 320
+    with pytest.raises(ValidationError):
+        schemas.PreviewSettings(fps=0)
+    with pytest.raises(ValidationError):
+        schemas.PreviewSettings(quality=100)
+
+
+def test_settings_apply_live_to_a_running_session():
+    tracker = EyeTrackerService(capture_factory=FakeCamera)
+    messages = []
+
+    async def callback(message):
+        messages.append(message)
+        frames = [m for m in messages if m["type"] == "frame_data"]
+        if len(frames) == 5:
+            tracker.configure_preview(width=320, height=240, quality=40, fps=10)
+        if len(frames) == 40:
+            tracker.stop_tracking()
+
+    result = asyncio.run(asyncio.wait_for(tracker.start_tracking(callback), timeout=60))
+    assert result["success"] is True
+
+    types = [m["type"] for m in messages]
+    ack = types.index("preview_settings")
+    assert messages[ack] == {"type": "preview_settings", "video": True, "width": 320, "height": 240,
+                             "quality": 40, "fps": 10}
+    before, after = messages[:ack], messages[ack + 1:]
+    assert all("video_frame" in m for m in before)
+
+    def decoded_shape(message):
+        jpeg = np.frombuffer(base64.b64decode(message["video_frame"]), dtype=np.uint8)
+        return cv2.imdecode(jpeg, cv2.IMREAD_COLOR).shape
+
+    assert decoded_shape(before[0]) == (480, 640, 3)
+    with_video = [m for m in after if "video_frame" in m]
+    assert with_video and all(decoded_shape(m) == (240, 320, 3) for m in with_video)
+    # ~10 of the ~30 camera frames per second still carry video; frames in between aren't sent
+    gaps = np.diff([datetime.fromisoformat(m["timestamp"]).timestamp() for m in with_video])
+    assert np.median(gaps) > 0.06
+
+
+def test_video_can_be_turned_off_mid_session():
+    tracker = EyeTrackerService(capture_factory=FakeCamera)
+    messages = []
+
+    async def callback(message):
+        messages.append(message)
+        if len(messages) == 3:
+            tracker.configure_preview(video=False)
+        if len(messages) == 10:
+            tracker.stop_tracking()
+
+    asyncio.run(asyncio.wait_for(tracker.start_tracking(callback), timeout=60))
+    ack = [m["type"] for m in messages].index("preview_settings")
+    assert messages[ack]["video"] is False
+    assert not any("video_frame" in m for m in messages[ack + 1:])
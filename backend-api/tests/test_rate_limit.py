@@ -0,0 +1,101 @@
+"""
+Tests for token-bucket rate limits and load shedding
+"""
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import asyncio
+import time
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app import auth, load_shedding, main
+from app.load_shedding import LoadMonitor
+from app.rate_limit import MemoryBucketStore
+
+
+def test_bucket_allows_burst_then_refills_at_rate():
+    store = MemoryBucketStore()
+    assert [store.take("k", 2.0, 3, 100.0) for _ in range(3)] == [0.0, 0.0, 0.0]
+    assert store.take("k", 2.0, 3, 100.0) == pytest.approx(0.5)
+    assert store.take("k", 2.0, 3, 100.5) == 0.0  # One token back after 1 / rate
+    assert store.take("other", 2.0, 3, 100.5) == 0.0
+
+
+def test_full_buckets_are_pruned_at_capacity():
+    store = MemoryBucketStore(max_keys=2)
+    store.take("a", 1.0, 1, 0.0)
+    store.take("b", 1.0, 1, 0.0)
+    store.take("c", 1.0, 1, 5.0)  # a and b refilled by now, so forgetting them changes nothing
+    assert set(store.buckets) == {"c"}
+
+
+@pytest.fixture
+def limiter(monkeypatch):
+    monkeypatch.setattr(main.rate_limiter, "store", MemoryBucketStore())
+    monkeypatch.setattr(main.rate_limiter, "enabled", True)
+    return main.rate_limiter
+
+
+def test_login_is_limited_per_ip_with_retry_after(limiter):
+    client = TestClient(main.app)
+    form = {"username": "nobody@example.com", "password": "wrong"}
+    # Fill the bucket without running the endpoint
+    for _ in range(main.config.LOGIN_BURST):
+        limiter.store.take("token:testclient", main.config.LOGIN_RATE, main.config.LOGIN_BURST, time.time())
+    response = client.post("/token", data=form)
+    assert response.status_code == 429
+    assert int(response.headers["retry-after"]) >= 1
+
+
+def test_uploads_are_limited_per_user(limiter):
+    tokens = {email: auth.create_access_token({"sub": email}) for email in ("a@example.com", "b@example.com")}
+    check = limiter.limit("upload", 0.001, 2, per="user")
+
+    class FakeRequest:
+        client = None
+
+        def __init__(self, token):
+            self.headers = {"authorization": f"Bearer {token}"}
+
+    check(FakeRequest(tokens["a@example.com"]))
+    check(FakeRequest(tokens["a@example.com"]))
+    with pytest.raises(main.HTTPException) as limited:
+        check(FakeRequest(tokens["a@example.com"]))
+    assert limited.value.status_code == 429
+    check(FakeRequest(tokens["b@example.com"]))  # Another user has their own bucket
+
+
+def test_overload_sheds_requests_but_not_health_check(monkeypatch):
+    lag = load_shedding.Signal()
+    monkeypatch.setattr(main.load_monitor, "loop_lag", lag)
+    client = TestClient(main.app)
+
+    lag.add(10 * main.load_monitor.max_loop_lag, time.monotonic())
+    response = client.get("/blinks/user")
+    assert response.status_code == 503
+    assert response.headers["retry-after"] == "1"
+    assert client.get("/").status_code == 200
+
+    # A signal nobody has sampled for a while stops counting
+    lag.sampled_at -= load_shedding.STALE
+    assert client.get("/blinks/user").status_code == 401
+
+
+def test_loop_lag_watch_sees_blocking_work(monkeypatch):
+    monkeypatch.setattr(load_shedding, "LAG_INTERVAL", 0.01)
+    monitor = LoadMonitor(max_loop_lag=0.05, max_db_wait=0)
+
+    async def run():
+        watch = asyncio.create_task(monitor.watch_loop_lag())
+        await asyncio.sleep(0.05)
+        assert not monitor.overloaded()
+        time.sleep(0.3)  # Blocks the loop
+        await asyncio.sleep(0.02)
+        overloaded = monitor.overloaded()
+        watch.cancel()
+        return overloaded
+
+    assert asyncio.run(run())
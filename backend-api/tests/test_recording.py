@@ -0,0 +1,75 @@
+"""
+Tests for session recording, zero-copy replay and offline re-scoring
+"""
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+
+from app.blink_detection import BlinkStateMachine
+from app.ear_history import EAR_FACE, EAR_BLINK
+from app.recording import SessionRecorder, load_recording, rescore, summarize
+
+# Open eyes with two blinks: one 1-frame dip, one 3-frame dip
+EARS = [0.3] * 5 + [0.2] + [0.3] * 5 + [0.18, 0.15, 0.19] + [0.3] * 5
+
+
+def record(path, ears, chunk_frames=4):
+    detector = BlinkStateMachine()
+    recorder = SessionRecorder(str(path), {"ear_thresh": 0.25, "consec_frames": 1}, chunk_frames=chunk_frames)
+    eye = [(10, 10), (12, 8), (14, 8), (16, 10), (14, 12), (12, 12)]
+    for i, ear in enumerate(ears):
+        flags = EAR_FACE | detector.update(ear)
+        recorder.append(i / 30.0, ear, ear, flags, eye, eye)
+    recorder.close()
+    return detector.blink_count
+
+
+def test_round_trip_is_memory_mapped(tmp_path):
+    path = tmp_path / "session.ear"
+    record(path, EARS)
+
+    metadata, records = load_recording(str(path))
+    assert isinstance(records, np.memmap)
+    assert metadata["ear_thresh"] == 0.25
+    assert len(records) == len(EARS)
+    np.testing.assert_allclose(records["left_ear"], EARS, rtol=1e-6)
+    assert records["left_eye"][0].tolist()[1] == [12, 8]
+
+
+def test_trailing_partial_record_is_ignored(tmp_path):
+    path = tmp_path / "session.ear"
+    record(path, EARS)
+    with open(path, "ab") as f:
+        f.write(b"\x00" * 7)
+
+    _, records = load_recording(str(path))
+    assert len(records) == len(EARS)
+
+
+def test_rescore_matches_online_detector(tmp_path):
+    path = tmp_path / "session.ear"
+    online_blinks = record(path, EARS)
+    _, records = load_recording(str(path))
+
+    assert online_blinks == 2
+    assert np.count_nonzero(records["flags"] & EAR_BLINK) == 2
+    assert rescore(records, 0.25, 1) == 2
+    # Requiring 2 closed frames drops the single-frame dip
+    assert rescore(records, 0.25, 2) == 1
+
+
+def test_summarize_defaults_to_recorded_settings(tmp_path):
+    path = tmp_path / "session.ear"
+    record(path, EARS)
+    summary = summarize(str(path))
+    assert summary["frames"] == len(EARS)
+    assert summary["recorded_blinks"] == summary["rescored_blinks"] == 2
+
+
+def test_empty_recording(tmp_path):
+    path = tmp_path / "empty.ear"
+    SessionRecorder(str(path)).close()
+    _, records = load_recording(str(path))
+    assert len(records) == 0
@@ -0,0 +1,229 @@
+"""
+Tests for the tracking session broadcast hub
+"""
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import asyncio
+import json
+import time
+
+import pytest
+
+from app.session_hub import SessionHub, Subscriber, DROP_NEWEST
+
+
+class FakeTracker:
+    """Publishes numbered frame_data messages with a video frame until stopped"""
+
+    def __init__(self, frames=5):
+        self.frames = frames
+        self.starts = 0
+        self.running = False
+
+    async def start_tracking(self, callback, send_video=True, **session):
+        self.starts += 1
+        self.running = True
+        for n in range(self.frames):
+            if not self.running:
+                break
+            await callback({"type": "frame_data", "blink_count": n, "video_frame": "jpeg"})
+            await asyncio.sleep(0)
+        if self.running:
+            await callback({"type": "calibration_complete", "ear_threshold": 0.2})
+            # Keep the session open until stopped, like a camera would
+            while self.running:
+                await asyncio.sleep(0.01)
+        return {"success": True}
+
+    def stop_tracking(self):
+        self.running = False
+
+
+class VideoTracker(FakeTracker):
+    """Records the video setting of each start and preview change"""
+
+    def __init__(self):
+        super().__init__()
+        self.video = []
+
+    async def start_tracking(self, callback, send_video=True, **session):
+        self.video.append(send_video)
+        return await super().start_tracking(callback, send_video, **session)
+
+    def configure_preview(self, video=None, **settings):
+        self.video.append(video)
+
+
+class Inbox:
+    """Send callable for a subscriber that collects what it was sent"""
+
+    def __init__(self):
+        self.messages = []
+
+    async def __call__(self, text):
+        self.messages.append(json.loads(text))
+
+
+def test_one_session_fans_out_to_every_subscriber():
+    tracker = FakeTracker()
+    stored = []
+
+    async def sink(message):
+        stored.append(message["type"])
+
+    async def run():
+        hub = SessionHub(tracker, sink=sink)
+        viewer, dashboard = Inbox(), Inbox()
+        first = hub.subscribe(viewer)
+        second = hub.subscribe(dashboard, video=False)
+        hub.start(user_id=1)
+        hub.start(user_id=1)  # Already running: joins, doesn't restart
+        while len(stored) < 6:
+            await asyncio.sleep(0.01)
+        hub.stop()
+        await asyncio.gather(first.task, second.task)
+        return viewer.messages, dashboard.messages
+
+    viewer, dashboard = asyncio.run(run())
+    assert tracker.starts == 1
+    # The sink sees each message once, however many subscribers there are
+    assert stored == ["frame_data"] * 5 + ["calibration_complete"]
+    assert [m.get("blink_count") for m in viewer] == [0, 1, 2, 3, 4, None]
+    assert all("video_frame" in m for m in viewer[:5])
+    assert not any("video_frame" in m for m in dashboard)
+
+
+def test_session_stops_when_last_subscriber_leaves():
+    tracker = FakeTracker()
+
+    async def run():
+        hub = SessionHub(tracker)
+        first, second = hub.subscribe(Inbox()), hub.subscribe(Inbox())
+        hub.start()
+        await asyncio.sleep(0.05)
+        hub.unsubscribe(first)
+        assert hub.running
+        hub.unsubscribe(second)
+        await asyncio.sleep(0.05)
+        return hub
+
+    hub = asyncio.run(run())
+    assert not hub.running and not tracker.running
+
+
+@pytest.mark.parametrize("drop, kept", [("oldest", [8, 9]), (DROP_NEWEST, [0, 1])])
+def test_backlogged_subscriber_applies_drop_policy(drop, kept):
+    inbox = Inbox()
+
+    async def run():
+        subscriber = Subscriber(inbox, queue_size=3, drop=drop)
+        # Queued while its drain task hasn't had a chance to run, as when the socket is backed up
+        subscriber.offer(json.dumps({"type": "calibration_complete"}), droppable=False)
+        for n in range(10):
+            await subscriber.deliver(json.dumps({"type": "frame_data", "n": n}))
+        subscriber.close()
+        await subscriber.task
+        return subscriber
+
+    subscriber = asyncio.run(run())
+    # Control messages are never dropped and keep their place in the queue
+    assert inbox.messages[0] == {"type": "calibration_complete"}
+    assert [m["n"] for m in inbox.messages[1:]] == kept
+    assert subscriber.dropped == 8
+
+
+def test_slow_send_falls_back_to_the_queue():
+    sent = []
+
+    async def slow_send(text):
+        await asyncio.sleep(0.2)
+        sent.append(text)
+
+    async def run():
+        subscriber = Subscriber(slow_send)
+        started = time.perf_counter()
+        await subscriber.deliver("a")
+        await subscriber.deliver("b")
+        waited = time.perf_counter() - started
+        subscriber.close()
+        await subscriber.task
+        return waited
+
+    # The frame loop waited at most SEND_WAIT; the slow send still completed, once
+    assert asyncio.run(run()) < 0.1
+    assert sent == ["a", "b"]
+
+
+def test_control_messages_on_a_slow_socket_are_sent_exactly_once():
+    sent = []
+
+    async def slow_send(text):
+        await asyncio.sleep(0.1)
+        sent.append(json.loads(text))
+
+    async def run():
+        subscriber = Subscriber(slow_send)
+        await subscriber.deliver(json.dumps({"type": "frame_data", "n": 0}))
+        await subscriber.deliver(json.dumps({"type": "calibration_complete"}), droppable=False)
+        await subscriber.deliver(json.dumps({"type": "frame_data", "n": 1}))
+        subscriber.close()
+        await subscriber.task
+        return subscriber
+
+    subscriber = asyncio.run(run())
+    assert sent == [{"type": "frame_data", "n": 0}, {"type": "calibration_complete"}, {"type": "frame_data", "n": 1}]
+    assert subscriber.dropped == 0
+
+
+def test_video_is_encoded_only_while_a_subscriber_wants_it():
+    tracker = VideoTracker()
+
+    async def run():
+        hub = SessionHub(tracker)
+        dashboard = hub.subscribe(Inbox(), video=False)
+        hub.start()
+        await asyncio.sleep(0.05)
+        viewer = hub.subscribe(Inbox())
+        hub.unsubscribe(viewer)
+        hub.unsubscribe(dashboard)
+        await hub.stopped()
+
+    asyncio.run(run())
+    assert tracker.video == [False, True, False]
+
+
+def test_one_viewer_turning_video_off_leaves_it_on_for_the_others():
+    tracker = VideoTracker()
+
+    async def run():
+        hub = SessionHub(tracker)
+        first, second = hub.subscribe(Inbox()), hub.subscribe(Inbox())
+        hub.start()
+        await asyncio.sleep(0.05)
+        hub.set_video(first, False)   # second still wants video
+        hub.set_video(second, False)  # nobody does
+        third = hub.subscribe(Inbox())
+        for subscriber in (first, second, third):
+            hub.unsubscribe(subscriber)
+        await hub.stopped()
+
+    asyncio.run(run())
+    assert tracker.video == [True, False, True]
+
+
+def test_failed_session_reports_error_to_subscribers():
+    class BrokenTracker(FakeTracker):
+        async def start_tracking(self, callback, send_video=True, **session):
+            return {"success": False, "message": "Could not open camera"}
+
+    async def run():
+        hub = SessionHub(BrokenTracker())
+        inbox = Inbox()
+        subscriber = hub.subscribe(inbox)
+        hub.start()
+        await subscriber.task
+        return inbox.messages
+
+    assert asyncio.run(run()) == [{"error": "Could not open camera"}]
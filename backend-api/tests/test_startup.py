@@ -0,0 +1,43 @@
+"""
+Startup behaviour: importing the app must stay cheap for REST-only workers
+"""
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import subprocess
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def run_snippet(snippet, tmp_path):
+    env = dict(os.environ, DATABASE_URL=f"sqlite:///{tmp_path / 'startup.db'}")
+    result = subprocess.run([sys.executable, "-c", snippet], cwd=BACKEND_DIR, env=env,
+                            capture_output=True, text=True)
+    assert result.returncode == 0, result.stderr
+    return result.stdout.strip()
+
+
+def test_import_does_not_load_vision_stack(tmp_path):
+    """cv2 and mediapipe are only imported when a tracking session starts"""
+    out = run_snippet(
+        "import sys, app.main\n"
+        "print('cv2' in sys.modules, 'mediapipe' in sys.modules)",
+        tmp_path,
+    )
+    assert out == "False False"
+
+
+def test_import_does_not_create_schema(tmp_path):
+    """Tables are created by the startup hook, not at import time"""
+    out = run_snippet(
+        "import app.main\n"
+        "from sqlalchemy import inspect\n"
+        "from app.database import engine\n"
+        "print(inspect(engine).get_table_names())\n"
+        "from fastapi.testclient import TestClient\n"
+        "with TestClient(app.main.app):\n"
+        "    print(sorted(inspect(engine).get_table_names()))",
+        tmp_path,
+    )
+    assert out.splitlines() == ["[]", "['blinks', 'tracking_sessions', 'users']"]
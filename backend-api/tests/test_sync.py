@@ -0,0 +1,101 @@
+"""
+Tests for the /sync delta protocol
+"""
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from datetime import datetime, timedelta
+
+import pytest
+
+from app import crud, main, models, schemas
+
+
+@pytest.fixture
+def client(db_sessions, api, monkeypatch):
+    monkeypatch.setattr(main.rate_limiter, "enabled", False)  # These tests sync faster than SYNC_RATE allows
+    monkeypatch.setattr(crud, "SETTLE_SECONDS", 0)  # Rows are read back as soon as they are stored
+
+    def store(user_id, blink_count):
+        db = db_sessions()
+        crud.create_blink_data(db, user_id, schemas.BlinkDataCreate(blink_count=blink_count))
+        db.close()
+
+    return api, store, db_sessions
+
+
+def records(*ids):
+    return [{"client_id": client_id, "blink_count": n, "timestamp": f"2024-01-01T09:00:0{n}"} for n, client_id in enumerate(ids)]
+
+
+def test_first_sync_pushes_pending_records_and_returns_cursor(client):
+    client, store, _ = client
+    store(1, 40)  # Recorded online before this client went offline
+    store(2, 99)  # Someone else's
+    data = client.post("/sync", json={"cursor": 0, "records": records("a", "b")}).json()
+    assert data["accepted"] == ["a", "b"]
+    assert [(c["blink_count"], c["client_id"]) for c in data["changes"]] == [(40, None), (0, "a"), (1, "b")]
+    assert data["cursor"] == data["changes"][-1]["id"]
+    assert data["has_more"] is False
+
+
+def test_resync_transfers_only_the_delta_and_never_duplicates(client):
+    client, store, _ = client
+    first = client.post("/sync", json={"records": records("a", "b")}).json()
+
+    # The response was lost, so the client pushes the same records again along with a new one
+    retry = client.post("/sync", json={"cursor": first["cursor"], "records": records("a", "b", "c")}).json()
+    assert retry["accepted"] == ["a", "b", "c"]
+    assert [c["client_id"] for c in retry["changes"]] == ["c"]
+
+    store(1, 7)  # Uploaded from another device meanwhile
+    later = client.post("/sync", json={"cursor": retry["cursor"]}).json()
+    assert [c["blink_count"] for c in later["changes"]] == [7]
+    assert client.post("/sync", json={"cursor": later["cursor"]}).json()["changes"] == []
+    assert len(client.get("/blinks/user").json()) == 4
+
+
+def test_large_gaps_are_paged(client, monkeypatch):
+    client, _, _ = client
+    monkeypatch.setattr(main, "SYNC_PAGE_SIZE", 2)
+    client.post("/sync", json={"records": records("a", "b", "c", "d", "e")})
+    cursor, pages = 0, []
+    while True:
+        data = client.post("/sync", json={"cursor": cursor}).json()
+        pages.append([c["client_id"] for c in data["changes"]])
+        cursor = data["cursor"]
+        if not data["has_more"]:
+            break
+    assert pages == [["a", "b"], ["c", "d"], ["e"]]
+
+
+def test_sync_validates_records(client):
+    client, _, _ = client
+    assert client.post("/sync", json={"records": [{"client_id": "", "blink_count": 1}]}).status_code == 422
+    assert client.post("/sync", json={"cursor": -1}).status_code == 422
+
+
+def test_cursor_does_not_pass_rows_that_may_still_be_committing(client, monkeypatch):
+    client, _, sessions = client
+    monkeypatch.setattr(crud, "SETTLE_SECONDS", 60)
+    db = sessions()
+    db.add(models.BlinkData(user_id=1, blink_count=3, created_at=datetime.utcnow() - timedelta(minutes=5)))
+    db.commit()
+    db.close()
+    # Just stored: a concurrent writer may still commit a row with a lower id
+    data = client.post("/sync", json={"records": records("a")}).json()
+    assert data["accepted"] == ["a"]
+    assert [c["blink_count"] for c in data["changes"]] == [3]
+    assert data["cursor"] == data["changes"][0]["id"]
+
+    monkeypatch.setattr(crud, "SETTLE_SECONDS", 0)
+    later = client.post("/sync", json={"cursor": data["cursor"]}).json()
+    assert [c["client_id"] for c in later["changes"]] == ["a"]
+
+
+def test_timestamps_with_an_offset_are_stored_in_india_time(client):
+    client, _, _ = client
+    record = {"client_id": "a", "blink_count": 1, "timestamp": "2024-01-01T09:00:00Z"}
+    data = client.post("/sync", json={"records": [record]}).json()
+    assert data["changes"][0]["timestamp"] == "2024-01-01T14:30:00"
@@ -0,0 +1,118 @@
+"""
+Tests for end-of-session summaries and the /sessions listing
+"""
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import asyncio
+
+import pytest
+
+from app import crud, session_hub
+from app.eye_tracker_service import EyeTrackerService
+from app.session_hub import SessionHub
+from conftest import FakeCamera
+
+
+SUMMARY = {
+    "started_at": "2024-01-01T09:00:00+05:30", "ended_at": "2024-01-01T09:10:00+05:30",
+    "duration_s": 600.0, "blink_count": 150, "blinks_per_minute": 15.0, "frames": 17000,
+    "dropped_frames": 12, "frame_age_ms": 4.2, "inference_ms": 11.5, "encode_ms": 6.1,
+}
+
+
+def test_tracker_reports_summary_after_external_stop():
+    tracker = EyeTrackerService(capture_factory=FakeCamera)
+    frames = []
+
+    async def callback(message):
+        if message["type"] == "frame_data":
+            frames.append(message)
+            if len(frames) == 10:
+                tracker.stop_tracking()  # As SessionHub.stop does, from outside the frame loop
+
+    result = asyncio.run(asyncio.wait_for(tracker.start_tracking(callback), timeout=60))
+    summary = result["summary"]
+    assert summary["frames"] >= 10
+    assert summary["duration_s"] > 0
+    assert summary["inference_ms"] > 0 and summary["encode_ms"] > 0
+    assert summary["blink_count"] == 0 and summary["dropped_frames"] >= 0
+    assert set(summary) == set(SUMMARY)
+
+
+def test_hub_publishes_summary_once_to_sink_and_subscribers():
+    class SummaryTracker:
+        def __init__(self):
+            self.running = False
+
+        async def start_tracking(self, callback, send_video=True, **session):
+            self.running = True
+            while self.running:
+                await asyncio.sleep(0.01)
+            return {"success": True, "summary": SUMMARY}
+
+        def stop_tracking(self):
+            self.running = False
+
+    stored, received = [], []
+
+    async def sink(message):
+        stored.append(message)
+
+    async def inbox(text):
+        received.append(text)
+
+    async def run():
+        hub = SessionHub(SummaryTracker(), sink=sink)
+        subscriber = hub.subscribe(inbox)
+        hub.start()
+        await asyncio.sleep(0.05)
+        hub.stop()
+        assert not hub.running
+        await hub.stopped()
+        await subscriber.task
+
+    asyncio.run(run())
+    assert stored == [{"type": "session_summary", **SUMMARY}]
+    assert len(received) == 1 and "session_summary" in received[0]
+
+
+def test_stuck_tracker_is_cancelled_after_grace(monkeypatch):
+    monkeypatch.setattr(session_hub, "STOP_GRACE", 0.05)
+
+    class StuckTracker:
+        async def start_tracking(self, callback, send_video=True, **session):
+            await asyncio.sleep(60)
+
+        def stop_tracking(self):
+            pass
+
+    async def run():
+        hub = SessionHub(StuckTracker())
+        hub.start()
+        await asyncio.sleep(0)
+        hub.stop()
+        await asyncio.wait_for(hub.stopped(), 1.0)
+        return hub
+
+    assert asyncio.run(run()).ended
+
+
+@pytest.fixture
+def client(db_sessions, api):
+    db = db_sessions()
+    for minute in range(3):
+        crud.create_tracking_session(db, 1, 0, dict(SUMMARY, started_at=f"2024-01-01T09:0{minute}:00"))
+    crud.create_tracking_session(db, 2, 0, SUMMARY)
+    db.close()
+    return api
+
+
+def test_sessions_endpoint_lists_own_summaries_newest_first(client):
+    sessions = client.get("/sessions").json()
+    assert [s["started_at"] for s in sessions] == [f"2024-01-01T09:0{m}:00" for m in (2, 1, 0)]
+    assert sessions[0]["blinks_per_minute"] == 15.0 and sessions[0]["dropped_frames"] == 12
+
+    older = client.get("/sessions", params={"limit": 1, "before": sessions[0]["started_at"]}).json()
+    assert [s["id"] for s in older] == [sessions[1]["id"]]
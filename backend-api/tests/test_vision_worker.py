@@ -0,0 +1,102 @@
+"""
+Tests for the standalone vision worker and its IPC client
+"""
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import asyncio
+import threading
+
+import pytest
+
+from app import config
+from app.eye_tracker_service import EyeTrackerService
+from app.vision_worker import VisionWorkerClient, VisionWorkerServer, parse_address, device_address
+from conftest import FakeCamera
+
+AUTHKEY = b"test-authkey"
+
+
+@pytest.fixture
+def worker_address(tmp_path):
+    address = str(tmp_path / "vision.sock")
+    server = VisionWorkerServer(EyeTrackerService(capture_factory=FakeCamera))
+    thread = threading.Thread(target=asyncio.run, args=(server.serve(address, AUTHKEY),), daemon=True)
+    thread.start()
+    for _ in range(100):
+        if os.path.exists(address):
+            break
+        threading.Event().wait(0.05)
+    return address
+
+
+def test_parse_address():
+    assert parse_address("127.0.0.1:9100") == ("127.0.0.1", 9100)
+    assert parse_address("/tmp/vision.sock") == "/tmp/vision.sock"
+
+
+def test_device_address():
+    assert device_address("/tmp/vision.sock", 0) == "/tmp/vision.sock"
+    assert device_address("/tmp/vision.sock", 2) == "/tmp/vision.sock.2"
+    assert device_address("127.0.0.1:9100", 3) == "127.0.0.1:9103"
+
+
+def test_client_streams_frames_and_stops(worker_address):
+    client = VisionWorkerClient(worker_address, authkey=AUTHKEY)
+    received = []
+
+    async def callback(message):
+        received.append(message)
+        if len(received) == 3:
+            client.stop_tracking()
+
+    result = asyncio.run(asyncio.wait_for(client.start_tracking(callback, send_video=False, user_id=7),
+                                          timeout=60))
+
+    assert result["success"] is True
+    assert len(received) >= 3
+    assert received[0]["type"] == "frame_data"
+    assert "video_frame" not in received[0]
+    assert client.is_running is False
+
+    window = asyncio.run(client.ear_history_window(7, seconds=10, points=50))
+    assert window["samples"] >= 3
+    assert asyncio.run(client.ear_history_window(8, seconds=10, points=50)) is None
+
+    status = asyncio.run(client.device_status())
+    assert status["device"] == 0 and status["available"] is True and status["is_running"] is False
+
+
+def test_preview_settings_reach_the_worker_session(worker_address):
+    client = VisionWorkerClient(worker_address, authkey=AUTHKEY)
+    received = []
+
+    async def callback(message):
+        received.append(message)
+        if len(received) == 2:
+            client.configure_preview(width=320, quality=50)
+        if message["type"] == "preview_settings":
+            client.stop_tracking()
+
+    asyncio.run(asyncio.wait_for(client.start_tracking(callback, send_video=False), timeout=60))
+    acks = [m for m in received if m["type"] == "preview_settings"]
+    assert acks[0] == {"type": "preview_settings", "video": False, "width": 320, "height": 0,
+                       "quality": 50, "fps": 30}
+
+
+def test_client_reports_unreachable_worker(tmp_path):
+    client = VisionWorkerClient(str(tmp_path / "missing.sock"), authkey=AUTHKEY)
+
+    async def callback(message):
+        pass
+
+    result = asyncio.run(client.start_tracking(callback))
+    assert result["success"] is False
+    assert asyncio.run(client.device_status())["available"] is False
+
+
+def test_worker_refuses_tcp_with_the_default_secret_key():
+    server = VisionWorkerServer(EyeTrackerService(capture_factory=FakeCamera))
+    with pytest.raises(ValueError):
+        asyncio.run(server.serve("127.0.0.1:0", config.DEFAULT_SECRET_KEY.encode("utf-8")))
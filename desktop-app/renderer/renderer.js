@@ -15,6 +15,19 @@ const syncStatus = document.getElementById('syncStatus');
 let blinkCount = 0;
 let accessToken = localStorage.getItem('accessToken');
 let unsyncedBlinks = JSON.parse(localStorage.getItem('unsyncedBlinks') || '[]');
+// Server-issued position in this user's blink history; /sync returns only rows after it
+let syncCursor = parseInt(localStorage.getItem('syncCursor') || '0', 10);
+// At most one sync scheduled and one running at a time
+let syncTimer = null;
+let syncing = false;
+
+function scheduleSync(delayMs) {
+  if (syncTimer) return;
+  syncTimer = setTimeout(() => {
+    syncTimer = null;
+    syncUnsyncedBlinks();
+  }, delayMs);
+}
 
 // Clean up any corrupted data
 function cleanupUnsyncedBlinks() {
@@ -75,6 +88,9 @@ async function login() {
 function logout() {
   accessToken = null;
   localStorage.removeItem('accessToken');
+  // The cursor belongs to this user's history
+  syncCursor = 0;
+  localStorage.removeItem('syncCursor');
   showLogin();
 }
 
@@ -105,8 +121,11 @@ function updateBlinkCount(data) {
       blinkCountSpan.textContent = blinkCount;
       
       // Save blink data locally for sync (but don't spam the API)
-      const blinkData = { 
-        blink_count: blinkCount  // Ensure it's a valid number
+      // client_id lets the server ignore a record pushed twice after a lost response
+      const blinkData = {
+        client_id: crypto.randomUUID(),
+        blink_count: blinkCount,  // Ensure it's a valid number
+        timestamp: new Date().toISOString(),  // UTC; the server stores it in IST like its own timestamps
       };
       
       console.log('Blink data to save:', blinkData);
@@ -118,7 +137,7 @@ function updateBlinkCount(data) {
         setSyncStatus('Blink data saved locally', false);
         
         // Try to sync with a small delay to avoid overwhelming the API
-        setTimeout(() => syncUnsyncedBlinks(), 1000);
+        scheduleSync(1000);
       }
     } else {
       console.warn('Invalid blink count received:', data);
@@ -129,6 +148,11 @@ function updateBlinkCount(data) {
 }
 
 async function syncUnsyncedBlinks() {
+  if (syncing) {
+    // Records saved meanwhile go out with the next run
+    scheduleSync(1000);
+    return;
+  }
   if (!accessToken) {
     setSyncStatus('Not logged in - data saved locally', false);
     return;
@@ -140,59 +164,56 @@ async function syncUnsyncedBlinks() {
   }
   
   console.log(`Syncing ${unsyncedBlinks.length} blink entries...`);
-  console.log('Unsynced blinks array:', unsyncedBlinks);
-  
-  for (let i = 0; i < unsyncedBlinks.length; i++) {
-    try {
-      const blinkData = unsyncedBlinks[i];
-      console.log('Syncing blink data:', blinkData);
-      
-      // Validate data before sending
-      if (!blinkData || typeof blinkData.blink_count !== 'number' || isNaN(blinkData.blink_count)) {
-        console.error('Invalid blink data, skipping:', blinkData);
-        unsyncedBlinks.splice(i, 1);
-        i--;
-        continue;
-      }
-      
-      // Send only blink_count, no timestamp
-      const payload = {
-        blink_count: blinkData.blink_count
-      };
-      
-      console.log('Sending payload:', payload);
-      
-      const res = await fetch(`${API_URL}/blinks/upload`, {
+
+  // Entries saved before client ids existed get one now
+  unsyncedBlinks.forEach(item => { item.client_id = item.client_id || crypto.randomUUID(); });
+
+  syncing = true;
+  try {
+    // One round trip pushes every pending record and pulls what changed on the server since our cursor
+    let hasMore = true;
+    let records = unsyncedBlinks.slice(0, 1000);
+    while (hasMore) {
+      const res = await fetch(`${API_URL}/sync`, {
         method: 'POST',
         headers: {
           'Content-Type': 'application/json',
           'Authorization': `Bearer ${accessToken}`,
         },
-        body: JSON.stringify(payload),
+        body: JSON.stringify({ cursor: syncCursor, records }),
       });
-      
-      if (res.ok) {
-        const result = await res.json();
-        console.log('Sync successful:', result);
-        unsyncedBlinks.splice(i, 1);
-        i--;
-        setSyncStatus(`Synced to cloud (${unsyncedBlinks.length} pending)`, false);
-      } else {
+
+      if (res.status === 429 || res.status === 503) {
+        // Rate limited or server overloaded: records stay pending, retry when the server says
+        const retryAfter = parseInt(res.headers.get('Retry-After') || '5', 10);
+        setSyncStatus(`Server busy - retrying in ${retryAfter}s`, false);
+        scheduleSync(retryAfter * 1000);
+        break;
+      }
+
+      if (!res.ok) {
         const errorText = await res.text();
         console.error('Sync failed:', res.status, errorText);
-        console.error('Data that failed:', JSON.stringify(unsyncedBlinks[i]));
-        console.error('Request headers:', {
-          'Content-Type': 'application/json',
-          'Authorization': `Bearer ${accessToken.substring(0, 20)}...`,
-        });
         setSyncStatus(`Sync failed: ${res.status} ${res.statusText}`, true);
         break; // Stop trying if there's an auth or server error
       }
-    } catch (err) {
-      console.error('Network error during sync:', err);
-      setSyncStatus('Network error - will retry when online', true);
-      break;
+
+      const result = await res.json();
+      const accepted = new Set(result.accepted);
+      unsyncedBlinks = unsyncedBlinks.filter(item => !accepted.has(item.client_id));
+      syncCursor = result.cursor;
+      localStorage.setItem('syncCursor', String(syncCursor));
+      console.log(`Sync successful: ${accepted.size} pushed, ${result.changes.length} new on server`);
+      setSyncStatus(`Synced to cloud (${unsyncedBlinks.length} pending)`, false);
+      // Keep going while the server has more changes or we have more records
+      records = unsyncedBlinks.slice(0, 1000);
+      hasMore = result.has_more || records.length > 0;
     }
+  } catch (err) {
+    console.error('Network error during sync:', err);
+    setSyncStatus('Network error - will retry when online', true);
+  } finally {
+    syncing = false;
   }
   localStorage.setItem('unsyncedBlinks', JSON.stringify(unsyncedBlinks));
 }
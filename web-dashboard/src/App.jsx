@@ -2,9 +2,13 @@ import React, { useState, useEffect } from 'react';
 import LoginForm from './components/LoginForm.jsx';
 import RegisterForm from './components/RegisterForm.jsx';
 import BlinkChart from './components/BlinkChart.jsx';
+import lttb from './lttb.js';
 import axios from 'axios';
 
 const API_URL = 'http://localhost:8000';
+// The chart gets at most this many points however long the history is (LTTB on the server,
+// and again here as live rows arrive)
+const CHART_POINTS = 1000;
 
 export default function App() {
   const [token, setToken] = useState(localStorage.getItem('accessToken') || '');
@@ -12,6 +16,7 @@ export default function App() {
   const [loading, setLoading] = useState(false);
   const [error, setError] = useState('');
   const [showRegister, setShowRegister] = useState(false);
+  const [live, setLive] = useState(false);
 
   // Login handler
   const handleLogin = async (email, password) => {
@@ -56,22 +61,46 @@ export default function App() {
     localStorage.removeItem('accessToken');
   };
 
-  // Fetch blink data when logged in
+  // Fetch a downsampled blink series when logged in, then follow new rows over Server-Sent Events
   useEffect(() => {
     if (!token) return;
+    let source = null;
+    let cancelled = false;
     setLoading(true);
     axios
-      .get(`${API_URL}/blinks/user`, {
+      .get(`${API_URL}/blinks/user/series`, {
         headers: { Authorization: `Bearer ${token}` },
+        params: { points: CHART_POINTS },
       })
       .then((res) => {
-        setBlinks(res.data);
+        if (cancelled) return;
+        const { timestamps, blink_counts, cursor } = res.data;
+        setBlinks(timestamps.map((timestamp, i) => ({ timestamp, blink_count: blink_counts[i] })).reverse());
         setLoading(false);
+        // Only rows stored after the series was read; EventSource resumes from the last event id on reconnect
+        source = new EventSource(`${API_URL}/blinks/user/stream?access_token=${encodeURIComponent(token)}&after=${cursor}`);
+        source.onopen = () => setLive(true);
+        source.onerror = () => setLive(false);
+        source.addEventListener('blinks', (event) => {
+          const { blinks: added } = JSON.parse(event.data);
+          setBlinks((current) => {
+            const seen = new Set(current.map((b) => b.id));
+            const merged = [...added.filter((b) => !seen.has(b.id)).reverse(), ...current];
+            // Newest first here; LTTB wants time order
+            return merged.length > CHART_POINTS ? lttb(merged.reverse(), CHART_POINTS).reverse() : merged;
+          });
+        });
       })
       .catch(() => {
+        if (cancelled) return;
         setError('Failed to fetch blink data.');
         setLoading(false);
       });
+    return () => {
+      cancelled = true;
+      if (source) source.close();
+      setLive(false);
+    };
   }, [token]);
 
   if (!token) {
@@ -106,6 +135,7 @@ export default function App() {
       >
         Logout
       </button>
+      {live && <span style={{ color: '#4fd1c5', marginLeft: '1em', fontWeight: 600 }}>● Live</span>}
       {loading ? (
         <p>Loading blink data...</p>
       ) : error ? (
@@ -47,7 +47,8 @@ export default function BlinkChart({ blinks }) {
           return getGradient(ctx, chartArea);
         },
         tension: 0.35,
-        pointRadius: 6,
+        // Markers only while they stay readable
+        pointRadius: sorted.length > 200 ? 0 : 6,
         pointHoverRadius: 10,
         pointBackgroundColor: 'rgb(75, 192, 192)',
         pointBorderColor: '#fff',
@@ -0,0 +1,43 @@
+// Largest-Triangle-Three-Buckets, as the server's blink_series.py: keeps the first and last
+// points and, from each bucket in between, the one forming the largest triangle with the
+// previously kept point and the next bucket's mean. Points are {timestamp, blink_count}
+// in time order; returns at most `threshold` of them.
+export default function lttb(points, threshold) {
+  const n = points.length;
+  if (threshold >= n || threshold < 3) return points;
+  const x = points.map((p) => new Date(p.timestamp).getTime());
+  const y = points.map((p) => p.blink_count);
+  const bucketSize = (n - 2) / (threshold - 2);
+  const kept = [points[0]];
+  let a = 0;
+  for (let i = 0; i < threshold - 2; i++) {
+    const start = Math.floor(i * bucketSize) + 1;
+    const end = Math.floor((i + 1) * bucketSize) + 1;
+    // Mean of the next bucket; the last bucket looks at the last point
+    const nextStart = end;
+    const nextEnd = Math.min(Math.floor((i + 2) * bucketSize) + 1, n);
+    let meanX = 0;
+    let meanY = 0;
+    for (let j = nextStart; j < nextEnd; j++) {
+      meanX += x[j];
+      meanY += y[j];
+    }
+    const count = nextEnd - nextStart;
+    meanX = count > 0 ? meanX / count : x[n - 1];
+    meanY = count > 0 ? meanY / count : y[n - 1];
+
+    let best = start;
+    let bestArea = -1;
+    for (let j = start; j < end; j++) {
+      const area = Math.abs((x[a] - meanX) * (y[j] - y[a]) - (x[a] - x[j]) * (meanY - y[a]));
+      if (area > bestArea) {
+        bestArea = area;
+        best = j;
+      }
+    }
+    kept.push(points[best]);
+    a = best;
+  }
+  kept.push(points[n - 1]);
+  return kept;
+}